@@ -0,0 +1,52 @@
+"""Benchmark: a batch of maps from one load vs. one build_map() run per map
+
+Writes two synthetic registry workbooks (GK zone 4, see bench_streaming_reader)
+and builds one Germany-wide map, one map per dataset and a few bbox maps,
+first as a batch, then map by map with the sheet cache off.
+Run from the repo root:  python -m benchmarks.bench_batch [rows] [jobs]
+"""
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.bench_streaming_reader import write_registry
+from boreholes.batch import print_batch_summary, run_batch, run_separately
+from boreholes.config import validate_batch
+
+# GK zone 4 of the synthetic registries is roughly 50.1-51.6°N, 9.9-12.0°E
+BBOXES = {
+    "west": [50.0, 9.8, 51.7, 10.6],
+    "center": [50.0, 10.5, 51.7, 11.3],
+    "east": [50.0, 11.2, 51.7, 12.1],
+    "north": [51.0, 9.8, 51.7, 12.1],
+}
+
+
+def batch_settings(directory, rows):
+    datasets = []
+    for i, name in enumerate(("Registry A", "Registry B")):
+        path = Path(directory) / f"registry_{i}.xlsx"
+        write_registry(path, rows, seed=i)
+        datasets.append({"file": str(path), "sheet": "Bohrungen", "bohr_id_col": "B",
+                         "x_col": "C", "y_col": "D", "name": name})
+
+    maps = [{"output_map": "all.html"}]
+    maps += [{"output_map": f"{ds['name'].lower().replace(' ', '_')}.html", "datasets": [ds['name']]} for ds in datasets]
+    maps += [{"output_map": f"{region}.html", "bbox": bbox} for region, bbox in BBOXES.items()]
+    return {"render_mode": "data", "cache": False, "dedup_mode": "off", "datasets": datasets, "maps": maps}
+
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    jobs = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+
+    print("\n" + "="*70)
+    print(f"⏱️  Batch of maps: {rows:,} rows per workbook, {jobs} render job(s)")
+    print("="*70)
+
+    with tempfile.TemporaryDirectory() as directory:
+        base, configs = validate_batch(batch_settings(directory, rows), base_dir=directory)
+        batch = run_batch(base, configs, workers=jobs, executor="process" if jobs > 1 else "thread")
+        print("\n  One build_map() run per map:\n")
+        batch['measured_separate_seconds'] = run_separately(configs)
+        print_batch_summary(batch)
@@ -0,0 +1,87 @@
+"""Benchmark: memory of loaded DataFrames vs. compact BoreholeTables
+
+The synthetic frame looks like a cleaned registry sheet after loading:
+the raw sheet columns (IDs, GK coordinates, municipality, drilling type,
+dates, notes, a few numbers) plus the added bohr_id, X, Y, latitude,
+longitude and source_epsg columns. Memory is pandas' deep memory usage.
+Two ratios are printed: the in-memory table (about 2.2x with pandas 2's
+object text columns) and the table with attributes spilled to Parquet
+(9.3x); only the spilled one reaches the 5x target.
+Run from the repo root:  python -m benchmarks.bench_borehole_table [rows ...]
+"""
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from boreholes.table import BoreholeTable
+
+DRILLING_TYPES = ["Kernbohrung", "Spülbohrung", "Rammkernsondierung", "Brunnen", "Pegel", "Schurf"]
+PURPOSES = ["Baugrund", "Hydrogeologie", "Rohstoff", "Geothermie", "Altlast", "Forschung"]
+
+
+def loaded_frame(n, seed=0):
+    """A frame shaped like load_datasets' output for an n-row registry"""
+    rng = np.random.default_rng(seed)
+    towns = np.array([f"Gemeinde {i}" for i in range(2000)], dtype=object)
+    x = rng.uniform(4350000, 4500000, n).round(1)
+    y = rng.uniform(5550000, 5720000, n).round(1)
+    ids = np.array([f"Bohrung {i}/{1950 + i % 70}" for i in range(n)], dtype=object)
+    notes = np.where(rng.random(n) < 0.85, None, "Kern archiviert, Schichtenverzeichnis vorhanden")
+    df = pd.DataFrame({
+        'Nr': np.arange(n),
+        'Bohrung': ids,
+        'Rechtswert': x.astype(object),
+        'Hochwert': y.astype(object),
+        'Gemeinde': towns[rng.integers(0, len(towns), n)],
+        'Bohrart': np.array(DRILLING_TYPES, dtype=object)[rng.integers(0, len(DRILLING_TYPES), n)],
+        'Zweck': np.array(PURPOSES, dtype=object)[rng.integers(0, len(PURPOSES), n)],
+        'Datum': pd.to_datetime(rng.integers(-600, 18000, n), unit='D').strftime('%d.%m.%Y').astype(object),
+        'Endteufe (m)': rng.uniform(2, 400, n).round(1),
+        'Ansatzhöhe (m NN)': rng.uniform(50, 900, n).round(2),
+        'Bemerkung': notes.astype(object),
+    })
+    df['bohr_id'] = df['Bohrung'].astype(str)
+    df['X'] = x
+    df['Y'] = y
+    df['latitude'] = rng.uniform(50.2, 51.6, n)
+    df['longitude'] = rng.uniform(9.9, 12.0, n)
+    df['source_epsg'] = np.full(n, 31468, dtype=np.int32)
+    return df
+
+
+def _mb(nbytes):
+    return nbytes / 1024**2
+
+
+if __name__ == '__main__':
+    sizes = [int(a) for a in sys.argv[1:]] or [100000, 1000000]
+
+    print("\n" + "="*70)
+    print("⏱️  Loaded dataset memory: DataFrame vs. BoreholeTable")
+    print("="*70 + "\n")
+    print(f"  {'rows':>9}  {'frame MB':>9}  {'table MB':>9}  {'ratio':>6}  {'spilled MB':>10}  {'ratio':>6}  "
+          f"{'build s':>8}  {'popups s':>8}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            df = loaded_frame(n)
+            frame_bytes = int(df.memory_usage(index=True, deep=True).sum())
+
+            table = BoreholeTable.from_frame(df, "Registry")
+            start = time.perf_counter()
+            spilled = BoreholeTable.from_frame(df, "Registry", spill_dir=tmp)
+            build = time.perf_counter() - start
+
+            # What a layer reads back: core + every popup attribute
+            start = time.perf_counter()
+            spilled.frame(spilled.attribute_columns)
+            popups = time.perf_counter() - start
+
+            print(f"  {n:>9,}  {_mb(frame_bytes):>9.1f}  {_mb(table.nbytes()):>9.1f}  "
+                  f"{frame_bytes / table.nbytes():>5.1f}x  {_mb(spilled.nbytes()):>10.1f}  "
+                  f"{frame_bytes / spilled.nbytes():>5.1f}x  {build:>8.2f}  {popups:>8.2f}")
+            spilled.release()
+    print()
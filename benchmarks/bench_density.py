@@ -0,0 +1,47 @@
+"""Benchmark: density layer binning time and size vs. embedding the points
+
+Bins synthetic boreholes into the density levels (zooms 5-10, 8 px cells),
+times it and compares the density layer's JSON with the point payload a
+"data" / "canvas" layer embeds for the same points.
+Run from the repo root:  python -m benchmarks.bench_density [points ...]
+"""
+import sys
+import time
+
+from benchmarks.bench_popups import synthetic_boreholes
+from boreholes.density import DENSITY_CELL_PX, DENSITY_MAX_ZOOM, DENSITY_MIN_ZOOM, density_levels, density_payload
+from boreholes.marker_layer import dataset_payload, payload_json
+
+
+def best_of(repeats, fn):
+    """(fastest seconds, result of the last run)"""
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best, result
+
+
+if __name__ == '__main__':
+    sizes = [int(a) for a in sys.argv[1:]] or [100000, 1000000]
+
+    print("\n" + "="*70)
+    print(f"⏱️  Density layers: zooms {DENSITY_MIN_ZOOM}-{DENSITY_MAX_ZOOM}, {DENSITY_CELL_PX} px cells")
+    print("="*70 + "\n")
+    print(f"  {'points':>10}  {'binning s':>9}  {'pts/sec':>12}  {'density KB':>10}  {'points MB':>9}  {'ratio':>7}")
+
+    levels = None
+    for n in sizes:
+        df = synthetic_boreholes(n, n_attrs=0)
+        seconds, levels = best_of(3, lambda: density_levels(df['latitude'], df['longitude']))
+        density_bytes = len(payload_json(density_payload(df, "All Points", "0066CC")).encode('utf-8'))
+        points_bytes = len(payload_json(dataset_payload(df, "All Points", "blue", "0066CC")).encode('utf-8'))
+        print(f"  {n:>10,}  {seconds:>9.3f}  {n / seconds:>12,.0f}  {density_bytes / 1024:>10.1f}  "
+              f"{points_bytes / 1024**2:>9.1f}  {points_bytes / density_bytes:>6.0f}x")
+
+    print(f"\n  Cells per zoom ({sizes[-1]:,} points):")
+    for level in levels:
+        print(f"    zoom {level['z']:>2}: {len(level['n']):>8,} cells, fullest {level['max']:,}")
+    print()
@@ -0,0 +1,47 @@
+"""Benchmark: level-of-detail precomputation for the embedded point layers
+
+Times boreholes.lod.point_zooms on synthetic boreholes (it should grow
+about linearly with the points), the "canvas" layer build with and
+without it, and reports how many points each zoom draws.
+Run from the repo root:  python -m benchmarks.bench_lod [points ...]
+"""
+import sys
+import time
+
+from benchmarks.bench_popups import synthetic_boreholes
+from boreholes.layers import build_dataset_layer
+from boreholes.lod import LOD_CELL_PX, LOD_MAX_ZOOM, LOD_MIN_ZOOM, point_zooms, points_per_zoom
+
+
+def best_of(repeats, fn):
+    """(fastest seconds, result of the last run)"""
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best, result
+
+
+if __name__ == '__main__':
+    sizes = [int(a) for a in sys.argv[1:]] or [10000, 100000, 1000000]
+
+    print("\n" + "="*70)
+    print(f"⏱️  Level of detail: zooms {LOD_MIN_ZOOM}-{LOD_MAX_ZOOM}, {LOD_CELL_PX} px cells")
+    print("="*70 + "\n")
+    print(f"  {'points':>10}  {'LOD s':>7}  {'ns/point':>8}  {'layer s':>8}  {'with LOD s':>10}")
+
+    zooms = None
+    for n in sizes:
+        df = synthetic_boreholes(n, n_attrs=0)
+        seconds, zooms = best_of(3, lambda: point_zooms(df['latitude'], df['longitude']))
+        plain, _ = best_of(1, lambda: build_dataset_layer(df, "All Points", "blue", "0066CC", mode="canvas"))
+        with_lod, _ = best_of(1, lambda: build_dataset_layer(df, "All Points", "blue", "0066CC", mode="canvas",
+                                                             lod=(LOD_MIN_ZOOM, LOD_MAX_ZOOM)))
+        print(f"  {n:>10,}  {seconds:>7.3f}  {seconds / n * 1e9:>8.0f}  {plain:>8.2f}  {with_lod:>10.2f}")
+
+    print(f"\n  Points drawn per zoom ({sizes[-1]:,} points; without LOD every zoom draws all):")
+    for z, drawn in points_per_zoom(zooms).items():
+        print(f"    zoom {z:>2}: {drawn:>10,}  ({drawn / sizes[-1]:.1%})")
+    print()
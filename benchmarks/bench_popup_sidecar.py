@@ -0,0 +1,66 @@
+"""Benchmark: popup attributes inline vs. in sidecar shards loaded on click
+
+Builds a one-layer "data" map of a wide synthetic dataset (attribute
+columns like Sample_data) with popup_details "inline" and "sidecar" and
+compares the HTML size, build + save time and the bytes one popup click
+fetches.
+Run from the repo root:  python -m benchmarks.bench_popup_sidecar [points ...]
+"""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import folium
+
+from benchmarks.bench_popups import synthetic_boreholes
+from boreholes.details import dataset_dir, write_details
+from boreholes.layers import build_dataset_layer
+from boreholes.metrics import path_bytes
+from boreholes.popups import popup_columns
+
+ATTRIBUTES = 50
+NAME = "Sample data"
+
+
+def render(df, out_dir, sidecar):
+    """Build and save a one-layer map; returns (seconds, HTML bytes, sidecar bytes)"""
+    start = time.perf_counter()
+    path = Path(out_dir) / ("sidecar.html" if sidecar else "inline.html")
+    popups = path.with_name(path.stem + "_popups")
+    m = folium.Map(location=[51.0, 10.8], zoom_start=8, tiles='OpenStreetMap')
+    extra_cols = popup_columns(df, ['X', 'Y', 'latitude', 'longitude', 'bohr_id'])
+    details = None
+    if sidecar:
+        meta = write_details(df, extra_cols, popups, NAME)
+        details = {'url': f"{popups.name}/{dataset_dir(NAME)}/", 'shard_rows': meta['shard_rows']}
+    build_dataset_layer(
+        df, NAME, "blue", "0066CC",
+        columns=extra_cols,
+        header='<b style="font-size: 14px; color: #0066CC;">Sample data</b><br>',
+        mode="data",
+        details=details
+    ).add_to(m)
+    m.save(str(path))
+    return time.perf_counter() - start, os.path.getsize(path), path_bytes([popups])
+
+
+if __name__ == '__main__':
+    sizes = [int(a) for a in sys.argv[1:]] or [10000, 100000]
+
+    print("\n" + "="*70)
+    print(f"⏱️  Popup attributes: inline vs. sidecar shards ({ATTRIBUTES} columns)")
+    print("="*70 + "\n")
+    print(f"  {'points':>8}  {'popups':>8}  {'seconds':>8}  {'HTML MB':>8}  {'sidecar MB':>10}  {'KB/click':>9}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            df = synthetic_boreholes(n, n_attrs=ATTRIBUTES)
+            for sidecar in (False, True):
+                seconds, html, side = render(df, tmp, sidecar)
+                # A click loads one shard (the first shard stands in for all)
+                click = (Path(tmp) / "sidecar_popups" / dataset_dir(NAME) / "0.js").stat().st_size if sidecar else 0
+                print(f"  {n:>8,}  {'sidecar' if sidecar else 'inline':>8}  {seconds:>8.2f}  {html / 1024**2:>8.2f}  "
+                      f"{side / 1024**2:>10.2f}  {click / 1024:>9.1f}")
+    print()
@@ -0,0 +1,97 @@
+"""Benchmark: per-row iterrows popups vs. batched build_popups
+
+Run from the repo root:  python -m benchmarks.bench_popups [rows ...]
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from boreholes.popups import build_popups, build_tooltips, popup_columns
+
+
+def synthetic_boreholes(n, n_attrs=8, seed=0):
+    """Random GK zone 4 boreholes with a few sparse attribute columns"""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'bohr_id': [f"Bohrung_{i}_{1950 + i % 70}" for i in range(n)],
+        'X': rng.uniform(4350000, 4500000, n),
+        'Y': rng.uniform(5550000, 5720000, n),
+    })
+    df['latitude'] = rng.uniform(50.2, 51.6, n)
+    df['longitude'] = rng.uniform(9.9, 12.0, n)
+    for j in range(n_attrs):
+        values = rng.uniform(0, 1000, n).round(1)
+        values[rng.random(n) < 0.3] = np.nan
+        df[f"attr_{j}"] = values
+    return df
+
+
+def legacy_popups(df, name):
+    """The original overlay_4.py loop (popup + tooltip strings only)"""
+    out = []
+    for idx, row in df.iterrows():
+        bohr_id = row.get('bohr_id', 'N/A')
+        popup_text = f"""
+        <b style="font-size: 14px; color: #0066CC;">{name}</b><br>
+        <hr style="margin: 5px 0;">
+        <table style="border-collapse: collapse; font-size: 12px;">
+        <tr><td><b>Bohr ID:</b></td><td><b style="color: #333;">{bohr_id}</b></td></tr>
+        <tr><td><b>Latitude:</b></td><td>{row['latitude']:.6f}°</td></tr>
+        <tr><td><b>Longitude:</b></td><td>{row['longitude']:.6f}°</td></tr>
+        <tr><td><b>GK X (m):</b></td><td>{row['X']:.0f}</td></tr>
+        <tr><td><b>GK Y (m):</b></td><td>{row['Y']:.0f}</td></tr>
+        """
+        for col in df.columns:
+            if col not in ['X', 'Y', 'latitude', 'longitude', 'bohr_id']:
+                try:
+                    val = row[col]
+                    if pd.notna(val):
+                        popup_text += f"<tr><td><b>{col}:</b></td><td>{val}</td></tr>"
+                except:
+                    pass
+        popup_text += "</table>"
+        out.append((popup_text, f"<b>{bohr_id}</b> • {name}"))
+    return out
+
+
+def batched_popups(df, name):
+    popups = build_popups(
+        df,
+        header=f'<b style="font-size: 14px; color: #0066CC;">{name}</b><br><hr style="margin: 5px 0;">',
+        fields=[
+            ('Bohr ID', 'bohr_id', '<b style="color: #333;">{}</b>'),
+            ('Latitude', 'latitude', '{:.6f}°'),
+            ('Longitude', 'longitude', '{:.6f}°'),
+            ('GK X (m)', 'X', '{:.0f}'),
+            ('GK Y (m)', 'Y', '{:.0f}'),
+        ],
+        columns=popup_columns(df, ['X', 'Y', 'latitude', 'longitude', 'bohr_id']),
+        skip_na=True,
+    )
+    tooltips = build_tooltips(df, "<b>{bohr_id}</b> • " + name, bohr_id='bohr_id')
+    return popups, tooltips
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    sizes = [int(a) for a in sys.argv[1:]] or [1000, 10000, 100000]
+
+    print("\n" + "="*70)
+    print("⏱️  Popup generation: iterrows vs. batched")
+    print("="*70 + "\n")
+    print(f"  {'rows':>8}  {'iterrows rows/s':>16}  {'batched rows/s':>15}  {'speedup':>8}")
+
+    for n in sizes:
+        df = synthetic_boreholes(n)
+        t_old = timed(legacy_popups, df, "All Points")
+        t_new = timed(batched_popups, df, "All Points")
+        print(f"  {n:>8,}  {n / t_old:>16,.0f}  {n / t_new:>15,.0f}  {t_old / t_new:>7.1f}x")
+
+    print()
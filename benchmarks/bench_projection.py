@@ -0,0 +1,65 @@
+"""Benchmark: per-point zone detection and cold vs. warm transformers
+
+Run from the repo root:  python -m benchmarks.bench_projection [points]
+"""
+import sys
+import time
+
+import numpy as np
+import pyproj
+
+from boreholes.projection import clear_transformer_cache, gk_to_wgs84, warm_up
+
+
+def single_zone(x, y, epsg_code=31468):
+    """The old path: one EPSG code for the whole dataset"""
+    transformer = pyproj.Transformer.from_crs(
+        pyproj.CRS.from_epsg(epsg_code), pyproj.CRS.from_epsg(4326), always_xy=True
+    )
+    return transformer.transform(x, y)
+
+
+def best_of(func, *args, repeats=3):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def many_small_sheets(sheets, x, y, cold):
+    """Project `sheets` small batches; cold rebuilds the transformer each time"""
+    for _ in range(sheets):
+        if cold:
+            clear_transformer_cache()
+        gk_to_wgs84(x, y)
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    rng = np.random.default_rng(0)
+    y = rng.uniform(5550000, 5720000, n)
+    zone4 = rng.uniform(4350000, 4500000, n)
+    mixed = np.where(rng.random(n) < 0.5, zone4, zone4 - 1000000 + 300000)  # zones 3 and 4
+
+    print("\n" + "="*70)
+    print(f"⏱️  Projection of {n:,} points")
+    print("="*70 + "\n")
+
+    t_old = best_of(single_zone, zone4, y)
+    t_one = best_of(gk_to_wgs84, zone4, y)
+    t_mix = best_of(gk_to_wgs84, mixed, y)
+    print(f"  single EPSG per dataset (old)   {t_old:6.3f} s  {n / t_old:>12,.0f} pts/s")
+    print(f"  per-point zones, one zone       {t_one:6.3f} s  {n / t_one:>12,.0f} pts/s")
+    print(f"  per-point zones, zones 3 + 4    {t_mix:6.3f} s  {n / t_mix:>12,.0f} pts/s")
+
+    sheets, rows = 300, 200
+    x_small, y_small = zone4[:rows], y[:rows]
+    t_cold = best_of(many_small_sheets, sheets, x_small, y_small, True, repeats=1)
+    warm_up()
+    t_warm = best_of(many_small_sheets, sheets, x_small, y_small, False, repeats=1)
+    print(f"\n  {sheets} sheets x {rows} points, transformer cache:")
+    print(f"  cold (built per sheet)          {t_cold:6.3f} s  {sheets * rows / t_cold:>12,.0f} pts/s")
+    print(f"  warm (cached, warmed up)        {t_warm:6.3f} s  {sheets * rows / t_warm:>12,.0f} pts/s")
+    print()
@@ -0,0 +1,48 @@
+"""Benchmark: HTML size and build/save time of each render mode
+
+Run from the repo root:  python -m benchmarks.bench_render_modes [points ...]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import folium
+
+from benchmarks.bench_popups import synthetic_boreholes
+from boreholes.layers import RENDER_MODES, build_dataset_layer
+from boreholes.popups import popup_columns
+
+
+def render(df, mode, path):
+    """Build and save a one-layer map; returns (seconds, bytes)"""
+    start = time.perf_counter()
+    m = folium.Map(location=[51.0, 10.8], zoom_start=8, tiles='OpenStreetMap')
+    extra_cols = popup_columns(df, ['X', 'Y', 'latitude', 'longitude', 'bohr_id'])
+    build_dataset_layer(
+        df, "All Points", "blue", "0066CC",
+        columns=extra_cols,
+        header='<b style="font-size: 14px; color: #0066CC;">All Points</b><br>',
+        mode=mode
+    ).add_to(m)
+    folium.LayerControl(position='topright', collapsed=False).add_to(m)
+    m.save(path)
+    return time.perf_counter() - start, os.path.getsize(path)
+
+
+if __name__ == '__main__':
+    sizes = [int(a) for a in sys.argv[1:]] or [1000, 10000]
+
+    print("\n" + "="*70)
+    print("⏱️  Render modes: build + save time and HTML size")
+    print("="*70 + "\n")
+    print(f"  {'points':>8}  {'mode':>8}  {'seconds':>8}  {'HTML MB':>8}  {'bytes/pt':>9}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            df = synthetic_boreholes(n)
+            for mode in RENDER_MODES:
+                seconds, size = render(df, mode, os.path.join(tmp, f"{mode}_{n}.html"))
+                print(f"  {n:>8,}  {mode:>8}  {seconds:>8.2f}  {size / 1024**2:>8.2f}  {size / n:>9,.0f}")
+
+    print()
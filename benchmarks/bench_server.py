@@ -0,0 +1,105 @@
+"""Load generator for the map server: viewport request latency and hot reload
+
+Writes two synthetic registry workbooks (GK zone 4, see bench_streaming_reader),
+serves them with boreholes.server on a free local port and fires random
+viewport requests (zooms 7-14) from concurrent clients. Then one workbook is
+rewritten and the time until reload_changed() has swapped it in is measured.
+Run from the repo root:  python -m benchmarks.bench_server [rows] [clients] [requests]
+"""
+import json
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from urllib.parse import quote
+from urllib.request import urlopen
+
+import numpy as np
+
+from benchmarks.bench_streaming_reader import write_registry
+from boreholes.config import validate_config
+from boreholes.server import MapServer
+
+# Extent of the synthetic registries
+SOUTH, WEST, NORTH, EAST = 50.1, 9.9, 51.6, 12.0
+
+
+def quiet(*args, **kwargs):
+    pass
+
+
+def viewport(rng):
+    """A random 1024 x 768 px view: (zoom, south, west, north, east)"""
+    zoom = int(rng.integers(7, 15))
+    width = 1024 * 360 / (256 * 2 ** zoom)
+    height = width * 768 / 1024 * 0.63  # ~cos(51°)
+    lat = rng.uniform(SOUTH, NORTH)
+    lon = rng.uniform(WEST, EAST)
+    return zoom, lat - height / 2, lon - width / 2, lat + height / 2, lon + width / 2
+
+
+def client(base_url, names, requests, seed, latencies, points):
+    rng = np.random.default_rng(seed)
+    for _ in range(requests):
+        zoom, south, west, north, east = viewport(rng)
+        name = names[int(rng.integers(len(names)))]
+        url = f"{base_url}/points?dataset={quote(name)}&bbox={south:.5f},{west:.5f},{north:.5f},{east:.5f}&zoom={zoom}"
+        start = time.perf_counter()
+        with urlopen(url) as response:
+            payload = json.loads(response.read())
+        latencies.append(time.perf_counter() - start)
+        points.append(payload['returned'])
+
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    clients = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    requests = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+
+    print("\n" + "="*70)
+    print(f"⏱️  Map server: {rows:,} rows per workbook, {clients} clients x {requests} requests")
+    print("="*70 + "\n")
+
+    with tempfile.TemporaryDirectory() as directory:
+        datasets = []
+        for i, name in enumerate(("Registry A", "Registry B")):
+            path = Path(directory) / f"registry_{i}.xlsx"
+            write_registry(path, rows, seed=i)
+            datasets.append({"file": str(path), "sheet": "Bohrungen", "bohr_id_col": "B",
+                             "x_col": "C", "y_col": "D", "name": name})
+        config = validate_config({"cache": False, "dedup_mode": "off", "datasets": datasets})
+
+        server = MapServer(config, watch_interval=0, log=quiet)
+        start = time.perf_counter()
+        server.load()
+        print(f"  Loaded in {time.perf_counter() - start:.2f} s")
+        httpd = server.start("127.0.0.1", 0)
+        base_url = f"http://127.0.0.1:{httpd.server_address[1]}"
+        try:
+            latencies, points = [], []
+            threads = [threading.Thread(target=client, args=(base_url, [ds['name'] for ds in datasets], requests, seed, latencies, points))
+                       for seed in range(clients)]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            seconds = time.perf_counter() - start
+
+            ms = np.array(latencies) * 1000
+            p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+            print(f"  {len(ms):,} requests in {seconds:.2f} s ({len(ms) / seconds:,.0f}/s), "
+                  f"{np.mean(points):,.0f} points per answer")
+            print(f"  client latency: p50 {p50:.2f} ms, p95 {p95:.2f} ms, p99 {p99:.2f} ms, max {ms.max():.2f} ms")
+            stats = server.stats()['points_requests']
+            print(f"  server query:   p50 {stats['p50_ms']:.2f} ms, p95 {stats['p95_ms']:.2f} ms, p99 {stats['p99_ms']:.2f} ms")
+
+            write_registry(datasets[1]['file'], rows // 2, seed=7)
+            start = time.perf_counter()
+            reloaded = server.reload_changed()
+            print(f"  hot reload of {', '.join(reloaded)}: {time.perf_counter() - start:.2f} s "
+                  f"(now {server.stats()['datasets'][datasets[1]['name']]:,} points)")
+        finally:
+            server.close()
+    print()
@@ -0,0 +1,83 @@
+"""Benchmark: grid index vs. brute-force pandas scan for kNN / radius / bbox
+
+Run from the repo root:  python -m benchmarks.bench_spatial_index [points ...]
+"""
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.bench_popups import synthetic_boreholes
+from boreholes.projection import wgs84_to_utm32
+from boreholes.spatial_index import BoreholeIndex
+
+QUERIES = 200
+
+
+def scan_radius(df, x, y, meters):
+    dist = np.hypot(df['east'] - x, df['north'] - y)
+    hits = dist[dist <= meters].sort_values(kind='stable')
+    return hits.index.to_numpy(), hits.to_numpy()
+
+
+def scan_knn(df, x, y, k):
+    dist = np.hypot(df['east'] - x, df['north'] - y)
+    hits = dist.nsmallest(k)
+    return hits.index.to_numpy(), hits.to_numpy()
+
+
+def scan_bbox(df, south, west, north, east):
+    inside = df['latitude'].between(south, north) & df['longitude'].between(west, east)
+    return df.index[inside].to_numpy()
+
+
+def per_query_ms(func, queries):
+    start = time.perf_counter()
+    results = [func(*q) for q in queries]
+    return (time.perf_counter() - start) / len(queries) * 1000, results
+
+
+if __name__ == '__main__':
+    sizes = [int(a) for a in sys.argv[1:]] or [10000, 100000, 1000000]
+
+    print("\n" + "="*70)
+    print("⏱️  Spatial queries: grid index vs. pandas scan (ms per query)")
+    print("="*70 + "\n")
+    print(f"  {'points':>9}  {'build s':>8}  {'query':>12}  {'scan ms':>9}  {'index ms':>9}  {'speedup':>8}  {'same':>5}")
+
+    rng = np.random.default_rng(1)
+    for n in sizes:
+        df = synthetic_boreholes(n, n_attrs=0)
+        # The scan gets projected coordinates for free; only the lookups are compared
+        df['east'], df['north'] = wgs84_to_utm32(df['latitude'], df['longitude'])
+
+        start = time.perf_counter()
+        index = BoreholeIndex.from_frame(df)
+        build = time.perf_counter() - start
+
+        lats = rng.uniform(50.3, 51.5, QUERIES)
+        lons = rng.uniform(10.0, 11.9, QUERIES)
+        xs, ys = wgs84_to_utm32(lats, lons)
+
+        cases = [
+            ("radius 500m",
+             lambda lat, lon, x, y: scan_radius(df, x, y, 500.0),
+             lambda lat, lon, x, y: index.radius(lat, lon, 500.0)),
+            ("knn k=10",
+             lambda lat, lon, x, y: scan_knn(df, x, y, 10),
+             lambda lat, lon, x, y: index.knn(lat, lon, 10)),
+            ("bbox 0.05°",
+             lambda lat, lon, x, y: scan_bbox(df, lat, lon, lat + 0.05, lon + 0.05),
+             lambda lat, lon, x, y: index.bbox(lat, lon, lat + 0.05, lon + 0.05)),
+        ]
+        queries = list(zip(lats, lons, xs, ys))
+        for label, scan, indexed in cases:
+            scan_ms, expected = per_query_ms(scan, queries)
+            index_ms, found = per_query_ms(indexed, queries)
+            if label.startswith("bbox"):
+                same = all(np.array_equal(a, b) for a, b in zip(expected, found))
+            else:
+                same = all(np.allclose(a[1], b[1]) for a, b in zip(expected, found))
+            print(f"  {n:>9,}  {build:>8.2f}  {label:>12}  {scan_ms:>9.3f}  {index_ms:>9.3f}  "
+                  f"{scan_ms / index_ms:>7.0f}x  {'✓' if same else '✗':>5}")
+    print()
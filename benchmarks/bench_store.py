@@ -0,0 +1,76 @@
+"""Benchmark: the SQLite store of Main_DB_RL5-Jens.xlsx vs. reading the workbook
+
+Imports the Main_DB sheets into a temporary database (full, then the
+incremental no-op run), then times pulling a layer and a bbox out of it
+against pd.read_excel of the same sheet, and a cross-sheet join.
+Run from the repo root:  python -m benchmarks.bench_store [repeats]
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from boreholes.store import BoreholeStore, read_store_sheets
+
+REPO = Path(__file__).resolve().parent.parent
+WORKBOOK = REPO / "Main_DB_RL5-Jens.xlsx"
+
+# Around Mühlhausen / Bad Langensalza
+BBOX = {'south': 51.0, 'west': 10.4, 'north': 51.3, 'east': 10.9}
+
+JOIN = ('SELECT w.well_id, w.latitude, w.longitude, count(*) AS intervals, max(s."Tiefe bis") AS deepest '
+        'FROM svz s JOIN wells_outcrop w USING (well_id) GROUP BY w.well_id')
+
+
+def quiet(*args, **kwargs):
+    pass
+
+
+def best_of(repeats, fn):
+    """(fastest seconds, result of the last run)"""
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best, result
+
+
+if __name__ == '__main__':
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    print("\n" + "="*70)
+    print(f"⏱️  SQLite store vs. workbook ({WORKBOOK.name})")
+    print("="*70 + "\n")
+
+    with tempfile.TemporaryDirectory() as directory:
+        db = Path(directory) / "boreholes.sqlite"
+        with BoreholeStore(db) as store:
+            start = time.perf_counter()
+            imported = store.import_workbook(WORKBOOK, log=quiet)
+            first = time.perf_counter() - start
+            start = time.perf_counter()
+            store.import_workbook(WORKBOOK, log=quiet)
+            again = time.perf_counter() - start
+        print(f"  import of {len(imported)} sheets ({sum(imported.values()):,} rows): {first:.2f} s, "
+              f"unchanged re-import: {again * 1000:.1f} ms")
+        print(f"  database: {db.stat().st_size / (1024*1024):.1f} MB\n")
+
+        excel, _ = best_of(1, lambda: pd.read_excel(WORKBOOK, sheet_name="Wells_Outcrop"))
+        layer, (frames, _) = best_of(repeats, lambda: read_store_sheets(db, {"Wells_Outcrop": None}))
+        with BoreholeStore(db, readonly=True) as store:
+            bbox, (_, rows) = best_of(repeats, lambda: store.query(store.bbox_sql("Wells_Outcrop"), BBOX))
+            scan_sql = ("SELECT * FROM wells_outcrop WHERE latitude BETWEEN :south AND :north "
+                        "AND longitude BETWEEN :west AND :east")
+            scan, (_, scanned) = best_of(repeats, lambda: store.query(scan_sql, BBOX))
+            join, (_, joined) = best_of(repeats, lambda: store.query(JOIN))
+
+        print(f"  {'Wells_Outcrop layer':<28} read_excel {excel * 1000:>8.1f} ms   store {layer * 1000:>6.1f} ms "
+              f"({len(frames['Wells_Outcrop'][0])} rows, {excel / layer:.0f}x)")
+        print(f"  {'bbox query':<28} R-tree {bbox * 1000:>12.2f} ms   scan  {scan * 1000:>6.2f} ms "
+              f"({len(rows)} rows{'' if len(rows) == len(scanned) else ', MISMATCH'})")
+        print(f"  {'SVZ x Wells_Outcrop join':<28} {join * 1000:>19.2f} ms   ({len(joined)} wells)")
+    print()
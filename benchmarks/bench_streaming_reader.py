@@ -0,0 +1,95 @@
+"""Benchmark: peak memory / time of pd.read_excel vs. the chunked streaming reader
+
+Writes a synthetic registry workbook (GK zone 4 boreholes, 16 attribute
+columns, ~20 % rows without coordinates) and loads it in fresh processes.
+Peak RSS comes from the resource module, so this runs on Linux / macOS.
+Run from the repo root:  python -m benchmarks.bench_streaming_reader [rows ...]
+"""
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+N_ATTRS = 16
+
+
+def write_registry(path, rows, seed=0):
+    """Synthetic registry workbook with one "Bohrungen" sheet"""
+    import openpyxl
+
+    rng = np.random.default_rng(seed)
+    x = rng.uniform(4350000, 4500000, rows).round(1)
+    y = rng.uniform(5550000, 5720000, rows).round(1)
+    missing = rng.random(rows) < 0.2
+    attrs = rng.uniform(0, 1000, (rows, N_ATTRS)).round(2)
+
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Bohrungen")
+    ws.append(["Nr", "Bohrung", "Rechtswert", "Hochwert"] + [f"Attribut {j}" for j in range(N_ATTRS)])
+    for i in range(rows):
+        ws.append([i, f"Bohrung {i}/{1950 + i % 70}",
+                   None if missing[i] else float(x[i]), None if missing[i] else float(y[i])]
+                  + [f"Probe {v:.0f}" if j % 4 == 0 else float(v) for j, v in enumerate(attrs[i])])
+    wb.save(path)
+
+
+def _peak_rss_mb():
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / (1024 if sys.platform == 'darwin' else 1)
+
+
+def _load(method, path, queue):
+    from boreholes.loader import load_datasets, stream_dataset
+
+    ds = {"file": path, "sheet": "Bohrungen", "bohr_id_col": "B", "x_col": "C", "y_col": "D", "name": "Registry"}
+    baseline = _peak_rss_mb()
+    start = time.perf_counter()
+    if method == "read_excel":
+        frames, _ = load_datasets([ds])
+        points = len(frames[0])
+    elif method == "stream, keep frame":
+        frames, _ = load_datasets([ds], chunk_rows=20000)
+        points = len(frames[0])
+    else:
+        # Chunks go straight to a CSV file and are dropped again
+        points = 0
+        with open(os.devnull, 'w') as out:
+            for chunk in stream_dataset(dict(ds, popup_cols=[]), chunk_rows=20000):
+                chunk[['bohr_id', 'X', 'Y', 'latitude', 'longitude']].to_csv(out, header=False, index=False)
+                points += len(chunk)
+    queue.put((time.perf_counter() - start, _peak_rss_mb() - baseline, points))
+
+
+def measure(method, path):
+    """Run one load in a fresh process: (seconds, peak RSS increase in MB, points)"""
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_load, args=(method, path, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+if __name__ == '__main__':
+    sizes = [int(a) for a in sys.argv[1:]] or [20000, 100000]
+    methods = ["read_excel", "stream, keep frame", "stream to CSV, id/x/y"]
+
+    print("\n" + "="*70)
+    print("⏱️  Sheet loading: pd.read_excel vs. chunked streaming reader")
+    print("="*70 + "\n")
+    print(f"  {'rows':>8}  {'xlsx MB':>8}  {'method':<22}  {'seconds':>8}  {'peak MB':>8}  {'points':>8}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in sizes:
+            path = os.path.join(tmp, f"registry_{rows}.xlsx")
+            write_registry(path, rows)
+            size_mb = os.path.getsize(path) / 1024**2
+            for method in methods:
+                seconds, peak, points = measure(method, path)
+                print(f"  {rows:>8,}  {size_mb:>8.1f}  {method:<22}  {seconds:>8.2f}  {peak:>8.1f}  {points:>8,}")
+    print()
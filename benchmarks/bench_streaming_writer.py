@@ -0,0 +1,105 @@
+"""Benchmark: peak memory / time of the output stage, in-memory vs. streamed
+
+"in memory" is the old overlay_4.py output: every layer stays in the folium
+tree, the combined CSV is one pd.concat of all datasets, then m.save().
+"streamed" appends each dataset's CSV rows and layer script to the output
+files as soon as it is built and drops the frame (boreholes.output).
+
+The points are split over four canvas layers and generated before the
+measurement starts, so the peak is the output stage's own working memory.
+Peak RSS comes from the resource module, so this runs on Linux / macOS.
+Run from the repo root:  python -m benchmarks.bench_streaming_writer [points ...]
+"""
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+DATASETS = ["All Points", "SVZ", "Log", "Bohrkern"]
+
+
+def _peak_rss_mb():
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / (1024 if sys.platform == 'darwin' else 1)
+
+
+def _write(method, n, tmp, queue):
+    import folium
+    import pandas as pd
+
+    from benchmarks.bench_popups import synthetic_boreholes
+    from boreholes.build_manifest import LAYER_PLACEHOLDER
+    from boreholes.layers import build_dataset_layer
+    from boreholes.marker_layer import layer_fragment
+    from boreholes.output import AtomicFile, LayerSpool
+    from boreholes.popups import popup_columns
+
+    per_dataset = n // len(DATASETS)
+    frames = {name: synthetic_boreholes(per_dataset, seed=i) for i, name in enumerate(DATASETS)}
+    html_path = os.path.join(tmp, f"{method}_{n}.html")
+    csv_path = os.path.join(tmp, f"{method}_{n}.csv")
+
+    baseline = _peak_rss_mb()
+    start = time.perf_counter()
+    m = folium.Map(location=[51.0, 10.8], zoom_start=8, tiles='OpenStreetMap')
+
+    def layer(df, name):
+        return build_dataset_layer(
+            df, name, "blue", "0066CC",
+            columns=popup_columns(df, ['X', 'Y', 'latitude', 'longitude', 'bohr_id']),
+            header=f'<b style="font-size: 14px; color: #0066CC;">{name}</b><br>',
+            mode="canvas"
+        )
+
+    if method == "in memory":
+        for name, df in frames.items():
+            layer(df, name).add_to(m)
+        df_export = pd.concat([df[['bohr_id', 'X', 'Y', 'latitude', 'longitude']].assign(dataset=name)
+                               for name, df in frames.items()], ignore_index=True)
+        folium.LayerControl(position='topright', collapsed=False).add_to(m)
+        m.save(html_path)
+        df_export.to_csv(csv_path, index=False)
+    else:
+        with LayerSpool(dir=tmp) as spool, AtomicFile(csv_path, newline='') as csv_out:
+            csv_out.write("bohr_id,X,Y,latitude,longitude,dataset\n")
+            for name in DATASETS:
+                df = frames.pop(name)
+                fg = layer(df, name)
+                spool.add(layer_fragment(fg, LAYER_PLACEHOLDER), LAYER_PLACEHOLDER, name=fg.layer_name).add_to(m)
+                csv_out.write(df[['bohr_id', 'X', 'Y', 'latitude', 'longitude']].assign(dataset=name)
+                              .to_csv(index=False, header=False, lineterminator='\n'))
+                del df, fg
+            folium.LayerControl(position='topright', collapsed=False).add_to(m)
+            spool.write_map(m, html_path)
+    seconds = time.perf_counter() - start
+    queue.put((seconds, _peak_rss_mb() - baseline, os.path.getsize(html_path) + os.path.getsize(csv_path)))
+
+
+def measure(method, n, tmp):
+    """Run one output stage in a fresh process: (seconds, peak RSS increase in MB, bytes written)"""
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_write, args=(method, n, tmp, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+if __name__ == '__main__':
+    sizes = [int(a) for a in sys.argv[1:]] or [10000, 100000, 1000000]
+    methods = ["in memory", "streamed"]
+
+    print("\n" + "="*70)
+    print("⏱️  Output stage: in-memory folium tree + concat vs. streamed writers")
+    print("="*70 + "\n")
+    print(f"  {'points':>9}  {'method':<10}  {'seconds':>8}  {'peak MB':>8}  {'output MB':>9}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            for method in methods:
+                seconds, peak, size = measure(method, n, tmp)
+                print(f"  {n:>9,}  {method:<10}  {seconds:>8.2f}  {peak:>8.1f}  {size / 1024**2:>9.1f}")
+    print()
@@ -0,0 +1,81 @@
+"""Benchmark: one pd.read_excel per dataset vs. one open per workbook
+
+Uses the workbooks shipped in the repo with the overlay_4.py dataset specs.
+Run from the repo root:  python -m benchmarks.bench_workbook_reader [repeats]
+"""
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from boreholes.loader import CountingReader, read_workbook_sheets, spec_columns
+
+REPO = Path(__file__).resolve().parent.parent
+
+DATASETS = [
+    {"file": str(REPO / "25-03-19_Dateiverzeichnis_Bohrungen.xlsx"), "sheet": "Geo_Koordinaten",
+     "bohr_id_col": "B", "x_col": "C", "y_col": "D", "name": "All Points"},
+    {"file": str(REPO / "Bohrungen mit SVZ.xlsx"), "sheet": "SVZ",
+     "bohr_id_col": "B", "x_col": "C", "y_col": "D", "name": "SVZ"},
+    {"file": str(REPO / "Bohrungen mit SVZ.xlsx"), "sheet": "Log",
+     "bohr_id_col": "B", "x_col": "C", "y_col": "D", "name": "Log"},
+    {"file": str(REPO / "Bohrungen mit SVZ.xlsx"), "sheet": "Bohrkern",
+     "bohr_id_col": "B", "x_col": "C", "y_col": "D", "name": "Bohrkern"},
+]
+
+
+def per_dataset_reads(datasets):
+    """The old loop: every dataset opens its workbook again"""
+    total = 0
+    for ds in datasets:
+        with open(ds['file'], 'rb') as fh:
+            reader = CountingReader(fh)
+            pd.read_excel(reader, sheet_name=ds['sheet'])
+            total += reader.bytes_read
+    return total
+
+
+def grouped_reads(datasets):
+    """One open per workbook for all of its sheets (what load_datasets does)"""
+    wanted = {}
+    for ds in datasets:
+        wanted.setdefault(ds['file'], {})[ds['sheet']] = spec_columns(ds)
+    total = 0
+    for excel_file, sheet_columns in wanted.items():
+        _, bytes_read = read_workbook_sheets(excel_file, sheet_columns)
+        total += bytes_read
+    return total
+
+
+def best_of(func, datasets, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        bytes_read = func(datasets)
+        times.append(time.perf_counter() - start)
+    return min(times), bytes_read
+
+
+if __name__ == '__main__':
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    limited = [dict(ds, popup_cols=[]) for ds in DATASETS]
+
+    print("\n" + "="*70)
+    print("⏱️  Workbook reads: per dataset vs. grouped by file")
+    print("="*70 + "\n")
+    print(f"  {'strategy':<32}  {'seconds':>8}  {'MB read':>8}")
+
+    runs = [
+        ("read_excel per dataset", per_dataset_reads, DATASETS),
+        ("grouped, all columns", grouped_reads, DATASETS),
+        ("grouped, only id/x/y columns", grouped_reads, limited),
+    ]
+    baseline = None
+    for label, func, datasets in runs:
+        seconds, bytes_read = best_of(func, datasets, repeats)
+        baseline = baseline or (seconds, bytes_read)
+        print(f"  {label:<32}  {seconds:>8.3f}  {bytes_read / 1024**2:>8.2f}"
+              f"   (saved {baseline[0] - seconds:.3f} s, {(baseline[1] - bytes_read) / 1024**2:.2f} MB)")
+
+    print()
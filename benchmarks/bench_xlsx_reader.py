@@ -0,0 +1,77 @@
+"""Benchmark: pd.read_excel vs. the raw-XML reader on the large Main_DB sheets
+
+Reads the hole ID and the two coordinate columns (A-C) of the
+Reservoirrekonstruktion sheets of Main_DB_RL5-Jens.xlsx with pd.read_excel
+(whole sheet and usecols) and with boreholes.xlsx_xml (regex scanner and
+the expat fallback), and checks that the readers return the same rows and
+values.
+Run from the repo root:  python -m benchmarks.bench_xlsx_reader [repeats]
+"""
+import sys
+import time
+import zipfile
+from pathlib import Path
+
+import pandas as pd
+
+from boreholes.xlsx_xml import SharedStrings, _parse_sheet_rows, column_index, read_workbook_columns, sheet_members
+
+REPO = Path(__file__).resolve().parent.parent
+WORKBOOK = REPO / "Main_DB_RL5-Jens.xlsx"
+SHEETS = ["Reservoirrekonstruktion", "Reservoirrekonstruktion VolP"]
+COLUMNS = ["A", "B", "C"]
+
+
+def best_of(repeats, fn):
+    """(fastest seconds, result of the last run)"""
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best, result
+
+
+def expat_rows(sheet):
+    """The expat reader's rows (what sheets the scanner can't handle get)"""
+    with zipfile.ZipFile(WORKBOOK) as zf:
+        members, shared = sheet_members(zf)
+        return _parse_sheet_rows(zf, members[sheet], SharedStrings(zf, shared), [column_index(c) for c in COLUMNS])[2]
+
+
+def same_values(expected, actual):
+    """Same rows (blank ones included) and values"""
+    if list(expected.columns) != list(actual.columns) or len(expected) != len(actual):
+        return False
+    for col in expected.columns:
+        a, b = expected[col], actual[col]
+        numeric = pd.to_numeric(a, errors='coerce').notna() & pd.to_numeric(b, errors='coerce').notna()
+        if not (pd.to_numeric(a[numeric]) - pd.to_numeric(b[numeric])).abs().le(1e-9).all():
+            return False
+        if not (a[~numeric].isna() & b[~numeric].isna() | (a[~numeric].astype(str) == b[~numeric].astype(str))).all():
+            return False
+    return True
+
+
+if __name__ == '__main__':
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+
+    print("\n" + "="*70)
+    print(f"⏱️  Sheet reading: pd.read_excel vs. raw XML ({WORKBOOK.name}, columns {', '.join(COLUMNS)})")
+    print("="*70 + "\n")
+    print(f"  {'sheet':<30}  {'method':<24}  {'seconds':>8}  {'rows':>6}  {'speedup':>8}")
+
+    for sheet in SHEETS:
+        full, full_df = best_of(repeats, lambda: pd.read_excel(WORKBOOK, sheet_name=sheet))
+        usecols, usecols_df = best_of(repeats, lambda: pd.read_excel(WORKBOOK, sheet_name=sheet, usecols=[0, 1, 2]))
+        xml, frames = best_of(repeats, lambda: read_workbook_columns(WORKBOOK, {sheet: COLUMNS})[0])
+        xml_all, all_frames = best_of(repeats, lambda: read_workbook_columns(WORKBOOK, {sheet: None})[0])
+        expat, expat_list = best_of(repeats, lambda: expat_rows(sheet))
+        xml_df, _ = frames[sheet]
+
+        for method, seconds, rows in [("read_excel", full, len(full_df)), ("read_excel usecols", usecols, len(usecols_df)),
+                                      ("xml, all columns", xml_all, len(all_frames[sheet][0])), ("xml, columns A-C", xml, len(xml_df)),
+                                      ("expat rows, columns A-C", expat, len(expat_list))]:
+            print(f"  {sheet:<30}  {method:<24}  {seconds:>8.3f}  {rows:>6,}  {full / seconds:>7.1f}x")
+        print(f"  {'':<30}  values match read_excel: {'yes' if same_values(usecols_df, xml_df) else 'NO'}\n")
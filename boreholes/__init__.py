@@ -0,0 +1 @@
+"""Shared helpers for the German boreholes map scripts."""
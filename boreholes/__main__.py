@@ -0,0 +1,3 @@
+from boreholes.cli import main
+
+raise SystemExit(main())
@@ -0,0 +1,156 @@
+import multiprocessing
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from boreholes.pipeline import BuildError, build_map, make_cache, load_sources, plan_build, prepare_tables, render_map, tracked_outputs
+
+# Source tables shared with forked render workers (set before the pool starts)
+_SHARED = {}
+
+
+def _quiet(*args, **kwargs):
+    pass
+
+
+def render_from_sources(config, sources, spill_dir, log=_quiet):
+    """Build one map of a batch from already loaded source tables
+
+    sources: {dataset name: BoreholeTable or None} covering the config's
+    datasets. The map draws views of the tables (bbox filtered when the
+    config has a bbox), so the sources stay intact for the next map.
+    Returns build_map()'s result dict plus 'seconds'.
+    """
+    start = time.perf_counter()
+    datasets, _, manifest = plan_build(config, full_rebuild=True)
+    views = {ds['name']: None if sources.get(ds['name']) is None else sources[ds['name']].take() for ds in datasets}
+    loaded = prepare_tables(config, datasets, views, manifest, spill_dir, log=log)
+    if not loaded:
+        raise BuildError("No datasets loaded")
+    result = render_map(config, datasets, loaded, manifest, log=log)
+    result.update(status="built", outputs=tracked_outputs(config), read_stats=None,
+                  seconds=time.perf_counter() - start)
+    return result
+
+
+def _render_job(i):
+    # Runs in a forked worker: the sources were inherited, not pickled
+    return _render_safely(_SHARED['configs'][i], _SHARED['sources'], _SHARED['spill_dir'])
+
+
+def _render_safely(config, sources, spill_dir):
+    try:
+        return render_from_sources(config, sources, spill_dir)
+    except Exception as e:
+        return {'status': "failed", 'error': str(e), 'seconds': 0.0}
+
+
+def _make_pool(workers, executor, log=print):
+    if executor == "process":
+        if "fork" in multiprocessing.get_all_start_methods():
+            return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork"))
+        # Spawned workers would have to reload every source: use threads instead
+        log("  ⚠️  Process workers need fork (Linux/macOS); rendering in threads")
+    return ThreadPoolExecutor(max_workers=workers)
+
+
+def _load_estimate(config, read_stats):
+    """Seconds a separate run of config would spend loading its datasets"""
+    workbooks = {ds['file'] for ds in config['datasets']}
+    return (sum(read_stats['workbook_seconds'].get(f, 0.0) for f in workbooks)
+            + sum(read_stats['dataset_seconds'].get(ds['name'], 0.0) for ds in config['datasets']))
+
+
+def run_batch(base, configs, workers=1, executor="thread", clear_cache=False, log=print):
+    """Load every source dataset once, then build all maps from the shared tables
+
+    base: the batch's shared settings (its datasets are the sources);
+    configs: one validated config per map (see config.validate_batch).
+    With workers > 1 the maps are rendered in a thread or process pool;
+    process workers are forked so they inherit the loaded tables.
+
+    Returns a dict: 'maps' (one result per config, in order; failed maps
+    have status "failed" and an 'error'), 'load_seconds', 'seconds',
+    'read_stats' and 'separate_seconds', the estimated time of one
+    build_map() run per map (each reloading its workbooks).
+    """
+    start = time.perf_counter()
+    needed = {ds['name'] for config in configs for ds in config['datasets']}
+    specs = [ds for ds in base['datasets'] if ds['name'] in needed]
+
+    log(f"\n📚 Loading {len(specs)} datasets once for {len(configs)} maps...\n")
+    cache = make_cache(base, clear=clear_cache, log=log)
+    with tempfile.TemporaryDirectory(prefix="bohr_attrs_") as spill_dir:
+        sources, read_stats = load_sources(base, specs, spill_dir, cache=cache, log=log)
+        load_seconds = time.perf_counter() - start
+        log(f"\n  Loaded in {load_seconds:.2f} s ({read_stats['files_opened']} workbooks opened, {read_stats['cached']} from cache)")
+
+        log(f"\n🗺️  Rendering {len(configs)} maps ({workers} {executor} worker{'s' if workers > 1 else ''})...\n")
+        if workers > 1 and len(configs) > 1:
+            _SHARED.update(configs=configs, sources=sources, spill_dir=spill_dir)
+            try:
+                with _make_pool(workers, executor, log=log) as pool:
+                    if isinstance(pool, ProcessPoolExecutor):
+                        futures = [pool.submit(_render_job, i) for i in range(len(configs))]
+                    else:
+                        futures = [pool.submit(_render_safely, config, sources, spill_dir) for config in configs]
+                    results = []
+                    for config, future in zip(configs, futures):
+                        results.append(future.result())
+                        _log_map(config, results[-1], log)
+            finally:
+                _SHARED.clear()
+        else:
+            results = []
+            for config in configs:
+                results.append(_render_safely(config, sources, spill_dir))
+                _log_map(config, results[-1], log)
+
+        for table in sources.values():
+            if table is not None:
+                table.release()
+
+    separate = sum(_load_estimate(config, read_stats) + result['seconds'] for config, result in zip(configs, results))
+    return {
+        'maps': results,
+        'load_seconds': load_seconds,
+        'seconds': time.perf_counter() - start,
+        'read_stats': read_stats,
+        'separate_seconds': separate,
+    }
+
+
+def _log_map(config, result, log):
+    if result['status'] == "failed":
+        log(f"  ✗ {config['output_map']}: {result['error']}")
+    else:
+        log(f"  ✓ {config['output_map']}: {result['total_points']:,} points, "
+            f"{len(result['datasets'])} layers ({result['seconds']:.2f} s)")
+
+
+def run_separately(configs, clear_cache=False, log=print):
+    """Build every map with its own build_map() run, as separate scripts would
+
+    Returns the total seconds; used to measure what the batch saves.
+    """
+    start = time.perf_counter()
+    for i, config in enumerate(configs):
+        map_start = time.perf_counter()
+        build_map(config, full_rebuild=True, clear_cache=clear_cache and i == 0, log=_quiet)
+        log(f"  {config['output_map']}: {time.perf_counter() - map_start:.2f} s")
+    return time.perf_counter() - start
+
+
+def print_batch_summary(batch, log=print):
+    """Batch totals against running every map on its own"""
+    failed = sum(1 for result in batch['maps'] if result['status'] == "failed")
+    log("\n" + "="*70)
+    log(f"{'✓' if not failed else '⚠️ '} {len(batch['maps']) - failed} of {len(batch['maps'])} maps built")
+    log("="*70)
+    log(f"  Loading (once):       {batch['load_seconds']:.2f} s")
+    log(f"  Rendering:            {batch['seconds'] - batch['load_seconds']:.2f} s")
+    log(f"  Batch total:          {batch['seconds']:.2f} s")
+    log(f"  One run per map:     ~{batch['separate_seconds']:.2f} s (estimated: every map reloads its workbooks)")
+    if 'measured_separate_seconds' in batch:
+        log(f"  One run per map:      {batch['measured_separate_seconds']:.2f} s (measured)")
+    log("="*70 + "\n")
@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+# Bump when the layer fragments or CSV rows change shape
+BUILD_VERSION = 1
+
+LAYER_PLACEHOLDER = "__BOHR_LAYER__"
+
+
+def build_dir(output_map):
+    """Directory holding the manifest and layer fragments of an output map"""
+    output_map = Path(output_map)
+    return output_map.with_name(output_map.stem + "_build")
+
+
+def dataset_hash(ds, settings=None):
+    """Hash of everything a dataset's layer and CSV rows depend on
+
+    The workbook is identified by path, mtime and size (like the sheet
+    cache); the spec and render settings are hashed as given. Returns
+    None when the workbook can't be stat'ed, so the layer counts as dirty.
+    """
+    try:
+        stat = os.stat(ds['file'])
+    except OSError:
+        return None
+    spec = {k: v for k, v in ds.items() if k not in ('data', 'input_hash')}
+    parts = [BUILD_VERSION, str(Path(ds['file']).resolve()), stat.st_mtime_ns, stat.st_size, spec, settings]
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def _file_state(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class BuildManifest:
+    """Per-layer input hashes, rendered fragments and CSV rows of one map
+
+    Lets a rerun rebuild only the layers whose inputs changed and splice
+    the stored fragments of the others back into the page.
+    """
+
+    def __init__(self, output_map):
+        self.dir = build_dir(output_map)
+        self.path = self.dir / "manifest.json"
+        self.data = {'version': BUILD_VERSION, 'layers': {}, 'outputs': {}}
+        # Outputs of the last build this one no longer writes (see record_outputs)
+        self._stale = []
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == BUILD_VERSION:
+                self.data = data
+        except (OSError, ValueError):
+            pass
+
+    def layer(self, name):
+        return self.data['layers'].get(name)
+
+    def is_clean(self, name, input_hash):
+        """True if the stored layer was built from the same inputs"""
+        entry = self.layer(name)
+        if entry is None or input_hash is None or entry['input_hash'] != input_hash:
+            return False
+        files = [entry['fragment'], entry['csv']] + ([entry['density']] if entry.get('density') else [])
+        return all((self.dir / f).exists() for f in files)
+
+    def fragment(self, name):
+        """Stored layer script (layer variable replaced by LAYER_PLACEHOLDER)"""
+        return (self.dir / self.layer(name)['fragment']).read_text(encoding='utf-8')
+
+    def density_fragment(self, name):
+        """Stored density layer script, or None if the layer has none"""
+        entry = self.layer(name)
+        if not entry.get('density'):
+            return None
+        return (self.dir / entry['density']).read_text(encoding='utf-8')
+
+    def csv_rows(self, name):
+        return (self.dir / self.layer(name)['csv']).read_text(encoding='utf-8')
+
+    def store_layer(self, name, input_hash, fragment, csv_rows, density=None, **meta):
+        """Save a freshly rendered layer (and its density layer's script); meta holds counts, sums, links, ..."""
+        self.dir.mkdir(parents=True, exist_ok=True)
+        entry = dict(meta, input_hash=input_hash, fragment=f"{input_hash}.js", csv=f"{input_hash}.csv",
+                     density=f"{input_hash}.density.js" if density is not None else None)
+        (self.dir / entry['fragment']).write_text(fragment, encoding='utf-8')
+        if density is not None:
+            (self.dir / entry['density']).write_text(density, encoding='utf-8')
+        with open(self.dir / entry['csv'], 'w', encoding='utf-8', newline='') as f:
+            f.write(csv_rows)
+        self.data['layers'][name] = entry
+
+    def forget_layer(self, name):
+        self.data['layers'].pop(name, None)
+
+    def outputs_current(self, paths):
+        """True if the same output files were recorded by record_outputs and are unchanged"""
+        recorded = self.data['outputs']
+        paths = [str(p) for p in paths]
+        return set(paths) == set(recorded) and all(_file_state(p) == recorded[p] for p in paths)
+
+    def record_outputs(self, paths, written=None):
+        """Record the output files' states; written: every file or directory the
+        build wrote, whose predecessors no longer in it save() deletes"""
+        self.data['outputs'] = {str(p): _file_state(p) for p in paths}
+        if written is not None:
+            written = [str(p) for p in written]
+            self._stale = [p for p in self.data.get('written', []) if p not in written]
+            self.data['written'] = written
+
+    def save(self, keep_names=None):
+        """Write the manifest; drop layers not in keep_names, orphaned files
+        and the outputs of modes turned off since the last build"""
+        if keep_names is not None:
+            for name in list(self.data['layers']):
+                if name not in keep_names:
+                    del self.data['layers'][name]
+        self.dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, indent=1)
+        os.replace(tmp, self.path)
+
+        used = {self.path.name}
+        for entry in self.data['layers'].values():
+            used.update((entry['fragment'], entry['csv'], entry.get('density')))
+        for path in self.dir.iterdir():
+            if path.name not in used:
+                path.unlink(missing_ok=True)
+
+        for path in map(Path, self._stale):
+            if path.is_dir():
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                path.unlink(missing_ok=True)
+        self._stale = []
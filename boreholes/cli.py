@@ -0,0 +1,321 @@
+import argparse
+import sys
+import time
+from contextlib import nullcontext
+from pathlib import Path
+
+from boreholes.config import (DEDUP_MODES, DEFAULTS, DENSITY_MODES, EXECUTORS, POPUP_DETAILS, READ_ENGINES,
+                              ConfigError, load_batch_config, load_config, read_config_file, validate_batch, validate_config)
+from boreholes.store import DEFAULT_DB
+
+# Only light modules are imported here: --help, validate and the cache
+# commands never load pandas, folium or pyproj
+
+EXAMPLE_CONFIG = '''\
+# German boreholes map: python -m boreholes build boreholes.toml
+# Relative paths are relative to this file.
+output_map = "German_Boreholes_Map.html"
+
+# "markers": one folium.Marker per borehole (the original output);
+# "data", "cluster", "canvas": one JSON layer per dataset, markers built in the browser;
+# "auto": "data" up to auto_mode_threshold points, auto_large_mode above
+render_mode = "markers"
+auto_mode_threshold = 2000
+auto_large_mode = "cluster"
+popup_details = "inline"      # "sidecar": popup attributes in German_Boreholes_Map_popups/, loaded on click
+density = "off"               # "add": a density layer per dataset, "only": density instead of the points
+density_min_zoom = 5
+density_max_zoom = 10
+lod = false                   # draw only one point per 32 px cell below lod_max_zoom
+lod_min_zoom = 5
+lod_max_zoom = 12
+
+load_workers = 4
+load_executor = "thread"      # "process" only on Linux/macOS
+# stream_chunk_rows = 50000   # read huge sheets in chunks
+read_engine = "pandas"        # "xml": raw sheet XML, much faster (dates become serial numbers)
+
+cache_dir = ".bohr_cache"
+cache_max_age_days = 30
+cache_max_size_mb = 500
+
+dedup_mode = "off"            # "report": <map>_duplicates.csv, "collapse": also one marker per location
+dedup_grid_m = 1.0
+merge_datasets = false
+merge_tolerance_m = 25
+export_tiles = false
+build_spatial_index = false   # true: <csv>.index.npz for radius / kNN / bbox queries
+write_metrics = false         # per-stage timings -> German_Boreholes_Map_metrics.json
+
+[[datasets]]
+file = "25-03-19_Dateiverzeichnis_Bohrungen.xlsx"
+sheet = "Geo_Koordinaten"
+bohr_id_col = "B"
+x_col = "C"
+y_col = "D"
+name = "All Points"
+color = "blue"
+# popup_cols = ["E", "F"]     # read only these extra columns
+# crs = "utm32"               # default "gk" (zone detected per point)
+
+[[datasets]]
+file = "Bohrungen mit SVZ.xlsx"
+sheet = "SVZ"
+bohr_id_col = "B"
+x_col = "C"
+y_col = "D"
+name = "SVZ"
+color = "red"
+'''
+
+
+def _quiet(*args, **kwargs):
+    pass
+
+
+def _parser():
+    parser = argparse.ArgumentParser(prog="python -m boreholes", description="German Boreholes - Multi-Layer Overlay Map")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build = commands.add_parser('build', help="build the map described by a config file")
+    build.add_argument('config', nargs='?', help="TOML, YAML or JSON config file")
+    build.add_argument('--no-cache', action='store_true', help="always re-read the Excel sheets (cache is neither read nor written)")
+    build.add_argument('--clear-cache', action='store_true', help="delete all cached sheets before loading")
+    build.add_argument('--cache-dir', default=None, help="cache directory (default: cache_dir)")
+    build.add_argument('--workers', type=int, default=None, help="parallel workbook loaders (default: load_workers)")
+    build.add_argument('--executor', choices=EXECUTORS, default=None, help="pool type (default: load_executor)")
+    build.add_argument('--stream', action='store_true', help="read sheets in chunks (openpyxl read-only) instead of whole (stream_chunk_rows)")
+    build.add_argument('--engine', choices=READ_ENGINES, default=None, help="sheet reader: pd.read_excel or the raw-XML reader (default: read_engine)")
+    build.add_argument('--popup-details', choices=POPUP_DETAILS, default=None, help="popup attributes in the map or in <map>_popups/ loaded on click (default: popup_details)")
+    build.add_argument('--density', choices=DENSITY_MODES, default=None, help="density layer per dataset: off, alongside the points or instead of them (default: density)")
+    build.add_argument('--lod', action='store_true', help="thin the data / canvas layers per zoom, all points from lod_max_zoom on (lod)")
+    build.add_argument('--full-rebuild', action='store_true', help="ignore the build manifest and rebuild every layer")
+    build.add_argument('--tiles', action='store_true', help="write the points as a tile pyramid and load only visible tiles (export_tiles)")
+    build.add_argument('--merge', action='store_true', help="one merged layer with a marker per physical borehole (merge_datasets)")
+    build.add_argument('--dedup', choices=DEDUP_MODES, default=None, help="duplicate handling (default: dedup_mode)")
+    build.add_argument('--verify-tiles', action='store_true', help="check the written tiles against the combined CSV")
+    build.add_argument('--metrics', action='store_true', help="save the per-stage timings as <map>_metrics.json (write_metrics)")
+    build.add_argument('--profile', metavar='PATH', default=None, help="profile the build into PATH: a cProfile dump, or pyinstrument HTML for .html")
+    build.add_argument('-q', '--quiet', action='store_true', help="no progress output")
+
+    batch = commands.add_parser('batch', help="build many maps from one load of the source datasets")
+    batch.add_argument('config', help="TOML, YAML or JSON batch file (shared settings plus [[maps]])")
+    batch.add_argument('--jobs', type=int, default=1, help="maps rendered in parallel (default: 1)")
+    batch.add_argument('--jobs-executor', choices=EXECUTORS, default="thread", help="pool for --jobs; process needs Linux/macOS (default: thread)")
+    batch.add_argument('--clear-cache', action='store_true', help="delete all cached sheets before loading")
+    batch.add_argument('--compare', action='store_true', help="afterwards build every map again on its own and report both times")
+    batch.add_argument('-q', '--quiet', action='store_true', help="only print the summary")
+
+    serve = commands.add_parser('serve', help="serve the map from memory, loading only the points in view")
+    serve.add_argument('config', help="TOML, YAML or JSON config file")
+    serve.add_argument('--host', default="127.0.0.1", help="address to listen on (default: 127.0.0.1)")
+    serve.add_argument('--port', type=int, default=8000, help="port (default: 8000)")
+    serve.add_argument('--watch', type=float, default=2.0, help="seconds between workbook change checks, 0 to disable (default: 2)")
+
+    store = commands.add_parser('import', help="load the Main_DB sheets into an SQLite store (only sheets that changed)")
+    store.add_argument('workbook', help="workbook to import, e.g. Main_DB_RL5-Jens.xlsx")
+    store.add_argument('--db', default=DEFAULT_DB, help=f"SQLite database (default: {DEFAULT_DB})")
+    store.add_argument('--sheet', action='append', default=None, help="import only this sheet (repeatable; default: the Main_DB sheets)")
+    store.add_argument('--force', action='store_true', help="re-import unchanged sheets too")
+
+    validate = commands.add_parser('validate', help="check a config or batch file without loading any data")
+    validate.add_argument('config', help="TOML, YAML or JSON config or batch file")
+
+    cache = commands.add_parser('cache', help="show or clear the sheet cache")
+    cache.add_argument('action', choices=['info', 'clear'])
+    cache.add_argument('--cache-dir', default=None, help=f"cache directory (default: {DEFAULTS['cache_dir']})")
+    cache.add_argument('--config', default=None, help="take the cache directory from this config file")
+
+    init = commands.add_parser('init', help="write an example config file")
+    init.add_argument('path', nargs='?', default="boreholes.toml")
+    return parser
+
+
+def build_overrides(args):
+    """Config settings set by build's command line flags"""
+    overrides = {}
+    if args.no_cache:
+        overrides['cache'] = False
+    if args.cache_dir:
+        overrides['cache_dir'] = args.cache_dir
+    if args.workers:
+        overrides['load_workers'] = args.workers
+    if args.executor:
+        overrides['load_executor'] = args.executor
+    if args.stream:
+        from boreholes.streaming import CHUNK_ROWS
+        overrides['stream_chunk_rows'] = CHUNK_ROWS
+    if args.engine:
+        overrides['read_engine'] = args.engine
+    if args.popup_details:
+        overrides['popup_details'] = args.popup_details
+    if args.density:
+        overrides['density'] = args.density
+    if args.lod:
+        overrides['lod'] = True
+    if args.tiles:
+        overrides['export_tiles'] = True
+    if args.merge:
+        overrides['merge_datasets'] = True
+    if args.dedup:
+        overrides['dedup_mode'] = args.dedup
+    if args.metrics:
+        overrides['write_metrics'] = True
+    return overrides
+
+
+def _print_datasets(config):
+    print("\n📊 DATASETS TO LOAD:\n")
+    for i, ds in enumerate(config['datasets'], 1):
+        print(f"  {i}. {ds['name']}")
+        print(f"     File: {Path(ds['file']).name}")
+        print(f"     Sheet: {ds['sheet']}")
+        print(f"     Bohr ID: Column {ds['bohr_id_col']}, Coordinates: {ds['x_col']}, {ds['y_col']}")
+        print(f"     Color: {ds['color']}\n")
+
+
+def _build(args, settings=None):
+    from boreholes.pipeline import BuildError, build_map, print_summary
+
+    if args.config:
+        config = load_config(args.config)
+    elif settings is not None:
+        config = validate_config(settings)
+    else:
+        raise ConfigError("build needs a config file")
+    config = validate_config(dict(config, **build_overrides(args)))
+
+    log = _quiet if args.quiet else print
+    if not args.quiet:
+        print("\n" + "="*70)
+        print(f"🗺️  {config['title']}")
+        print("="*70)
+        _print_datasets(config)
+    profile = nullcontext()
+    if args.profile:
+        from boreholes.metrics import profiled
+        profile = profiled(args.profile, log=log)
+    try:
+        with profile:
+            result = build_map(config, full_rebuild=args.full_rebuild, verify_tiles=args.verify_tiles,
+                               clear_cache=args.clear_cache, log=log)
+    except BuildError as e:
+        print(f"✗ {e}", file=sys.stderr)
+        return 1
+    if result['status'] == "built":
+        print_summary(config, result, log=log)
+    return 0
+
+
+def _batch(args):
+    from boreholes.batch import print_batch_summary, run_batch, run_separately
+
+    base, configs = load_batch_config(args.config)
+    log = _quiet if args.quiet else print
+    batch = run_batch(base, configs, workers=max(args.jobs, 1), executor=args.jobs_executor,
+                      clear_cache=args.clear_cache, log=log)
+    if args.compare:
+        log(f"\n⏱️  Building the {len(configs)} maps one by one for comparison...\n")
+        batch['measured_separate_seconds'] = run_separately(configs, log=log)
+    print_batch_summary(batch)
+    return 1 if any(result['status'] == "failed" for result in batch['maps']) else 0
+
+
+def _serve(args):
+    from boreholes.pipeline import BuildError
+    from boreholes.server import serve
+
+    try:
+        serve(load_config(args.config), host=args.host, port=args.port, watch_interval=args.watch)
+    except BuildError as e:
+        print(f"✗ {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def _validate(args):
+    start = time.perf_counter()
+    settings = read_config_file(args.config)
+    if isinstance(settings, dict) and 'maps' in settings:
+        config, maps = validate_batch(settings, base_dir=Path(args.config).resolve().parent)
+        outputs = f"{len(maps)} maps"
+    else:
+        config = load_config(args.config)
+        maps, outputs = [], config['output_map']
+    missing = [ds['file'] for ds in config['datasets'] if not Path(ds['file']).exists()]
+    print(f"✓ {args.config}: {len(config['datasets'])} datasets -> {outputs} "
+          f"({(time.perf_counter() - start) * 1000:.0f} ms)")
+    for ds in config['datasets']:
+        print(f"  {ds['name']}: {Path(ds['file']).name} [{ds['sheet']}] {ds['x_col']}/{ds['y_col']}")
+    for map_config in maps:
+        bbox = f" in {map_config['bbox']}" if map_config['bbox'] is not None else ""
+        print(f"  -> {Path(map_config['output_map']).name}: {', '.join(ds['name'] for ds in map_config['datasets'])}{bbox}")
+    for path in dict.fromkeys(missing):
+        print(f"  ⚠️  Workbook not found: {path}")
+    return 1 if missing else 0
+
+
+def _import(args):
+    from boreholes.store import BoreholeStore
+
+    start = time.perf_counter()
+    print(f"📥 {args.workbook} -> {args.db}")
+    try:
+        with BoreholeStore(args.db) as store:
+            results = store.import_workbook(args.workbook, sheets=args.sheet, force=args.force)
+    except (OSError, ValueError) as e:
+        print(f"✗ {e}", file=sys.stderr)
+        return 1
+    imported = [sheet for sheet, rows in results.items() if rows is not None]
+    print(f"✓ {len(imported)} of {len(results)} sheets imported ({time.perf_counter() - start:.2f} s)")
+    return 0
+
+
+def _cache(args):
+    from boreholes.excel_cache import ExcelCache
+
+    cache_dir = args.cache_dir or (load_config(args.config)['cache_dir'] if args.config else DEFAULTS['cache_dir'])
+    cache = ExcelCache(cache_dir)
+    if args.action == 'clear':
+        cache.clear()
+        print(f"🗑️  Cleared cache: {cache_dir}")
+    else:
+        entries, size = cache.info()
+        print(f"{cache_dir}: {entries} cached sheets, {size / (1024*1024):.2f} MB")
+    return 0
+
+
+def _init(args):
+    path = Path(args.path)
+    if path.exists():
+        print(f"✗ {path} already exists", file=sys.stderr)
+        return 1
+    path.write_text(EXAMPLE_CONFIG, encoding='utf-8')
+    print(f"✓ Wrote {path}")
+    return 0
+
+
+def main(argv=None, settings=None):
+    """Run the command line; returns the exit code
+
+    settings: a config dict used by "build" when no config file is given
+    (how the overlay scripts pass their built-in settings).
+    """
+    args = _parser().parse_args(argv)
+    try:
+        if args.command == 'build':
+            return _build(args, settings)
+        if args.command == 'batch':
+            return _batch(args)
+        if args.command == 'serve':
+            return _serve(args)
+        if args.command == 'import':
+            return _import(args)
+        if args.command == 'validate':
+            return _validate(args)
+        if args.command == 'cache':
+            return _cache(args)
+        return _init(args)
+    except ConfigError as e:
+        print(f"✗ {e}", file=sys.stderr)
+        return 2
@@ -0,0 +1,254 @@
+from pathlib import Path
+
+from boreholes.excel_cache import DEFAULT_CACHE_DIR
+
+RENDER_MODES = ("auto", "data", "cluster", "canvas", "markers")
+DEDUP_MODES = ("off", "report", "collapse")
+EXECUTORS = ("thread", "process")
+READ_ENGINES = ("pandas", "xml")
+POPUP_DETAILS = ("inline", "sidecar")
+DENSITY_MODES = ("off", "add", "only")
+CRS_NAMES = ("gk", "utm32")
+
+# Settings of one map build; a config file only needs "datasets". The
+# defaults write what the original scripts wrote (folium markers, map + CSV);
+# the faster layers, duplicate report and spatial index are opt-in
+DEFAULTS = {
+    'output_map': "German_Boreholes_Map.html",
+    'title': "German Boreholes Map",
+    'subtitle': "Bohrungen Koordinaten Übersicht",
+    'render_mode': "markers",
+    'auto_mode_threshold': 2000,
+    'auto_large_mode': "cluster",
+    'load_workers': 4,
+    'load_executor': "thread",
+    'stream_chunk_rows': None,
+    'read_engine': "pandas",
+    'cache': True,
+    'cache_dir': DEFAULT_CACHE_DIR,
+    'cache_max_age_days': 30,
+    'cache_max_size_mb': 500,
+    'export_tiles': False,
+    'tile_min_zoom': 5,
+    'tile_max_zoom': 12,
+    'dedup_mode': "off",
+    'dedup_grid_m': 1.0,
+    'merge_datasets': False,
+    'merge_tolerance_m': 25,
+    'build_spatial_index': False,
+    'popup_details': "inline",
+    'density': "off",
+    'density_min_zoom': 5,
+    'density_max_zoom': 10,
+    'lod': False,
+    'lod_min_zoom': 5,
+    'lod_max_zoom': 12,
+    'write_metrics': False,
+    'colors_hex': ['0066CC', 'FF0000', '00AA00', '9933FF'],
+    'bbox': None,
+    'datasets': [],
+}
+
+# Settings of a batch file's [[maps]] entries that only the top level may set:
+# the sources are loaded once, with these settings, for every map
+BATCH_SHARED = ('cache', 'cache_dir', 'cache_max_age_days', 'cache_max_size_mb',
+                'load_workers', 'load_executor', 'stream_chunk_rows', 'read_engine')
+
+DATASET_REQUIRED = ('file', 'sheet', 'x_col', 'y_col', 'name')
+DATASET_OPTIONAL = ('bohr_id_col', 'color', 'popup_cols', 'crs', 'render_mode', 'density')
+
+_NUMBERS = {
+    'auto_mode_threshold': 0, 'load_workers': 1, 'stream_chunk_rows': 1,
+    'cache_max_age_days': 0, 'cache_max_size_mb': 0, 'tile_min_zoom': 0, 'tile_max_zoom': 0,
+    'dedup_grid_m': 0, 'merge_tolerance_m': 0, 'density_min_zoom': 0, 'density_max_zoom': 0,
+    'lod_min_zoom': 0, 'lod_max_zoom': 0,
+}
+_CHOICES = {
+    'render_mode': RENDER_MODES, 'auto_large_mode': ("cluster", "canvas", "data"),
+    'load_executor': EXECUTORS, 'read_engine': READ_ENGINES, 'dedup_mode': DEDUP_MODES,
+    'popup_details': POPUP_DETAILS, 'density': DENSITY_MODES,
+}
+_FLAGS = ('cache', 'export_tiles', 'merge_datasets', 'build_spatial_index', 'write_metrics', 'lod')
+
+
+class ConfigError(ValueError):
+    """A map config that can't be built: unknown keys, bad values, missing datasets"""
+
+
+def read_config_file(path):
+    """Raw settings dict from a .toml, .yaml/.yml or .json file"""
+    path = Path(path)
+    suffix = path.suffix.lower()
+    try:
+        if suffix == '.toml':
+            try:
+                import tomllib
+            except ImportError:  # Python < 3.11
+                import tomli as tomllib
+            with open(path, 'rb') as f:
+                return tomllib.load(f)
+        if suffix in ('.yaml', '.yml'):
+            import yaml
+            with open(path, encoding='utf-8') as f:
+                return yaml.safe_load(f) or {}
+        if suffix == '.json':
+            import json
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+    except OSError as e:
+        raise ConfigError(f"Can't read {path}: {e}") from e
+    except ImportError as e:
+        raise ConfigError(f"Reading {suffix} configs needs {e.name} (pip install {'pyyaml' if e.name == 'yaml' else e.name})") from e
+    except ValueError as e:
+        # tomllib.TOMLDecodeError and json.JSONDecodeError are ValueErrors
+        raise ConfigError(f"{path}: {e}") from e
+    except Exception as e:
+        if type(e).__module__.startswith('yaml'):
+            raise ConfigError(f"{path}: {e}") from e
+        raise
+    raise ConfigError(f"Unknown config format {suffix!r}, expected .toml, .yaml, .yml or .json")
+
+
+def _validate_dataset(ds, i, base_dir):
+    where = f"datasets[{i}]"
+    if not isinstance(ds, dict):
+        raise ConfigError(f"{where} must be a table of settings")
+    unknown = set(ds) - set(DATASET_REQUIRED) - set(DATASET_OPTIONAL)
+    if unknown:
+        raise ConfigError(f"{where}: unknown setting(s) {', '.join(sorted(unknown))}")
+    missing = [k for k in DATASET_REQUIRED if k not in ds]
+    if missing:
+        raise ConfigError(f"{where}: missing {', '.join(missing)}")
+    if ds.get('crs', 'gk') not in CRS_NAMES:
+        raise ConfigError(f"{where}: crs must be one of {CRS_NAMES}, not {ds['crs']!r}")
+    if ds.get('render_mode', 'auto') not in RENDER_MODES:
+        raise ConfigError(f"{where}: render_mode must be one of {RENDER_MODES}, not {ds['render_mode']!r}")
+    if ds.get('density', 'off') not in DENSITY_MODES:
+        raise ConfigError(f"{where}: density must be one of {DENSITY_MODES}, not {ds['density']!r}")
+    if 'popup_cols' in ds and ds['popup_cols'] is not None and not isinstance(ds['popup_cols'], list):
+        raise ConfigError(f"{where}: popup_cols must be a list of columns")
+
+    ds = dict(ds)
+    # Relative workbook paths are relative to the config file
+    if base_dir is not None and not Path(ds['file']).is_absolute():
+        ds['file'] = str(Path(base_dir) / ds['file'])
+    ds.setdefault('bohr_id_col', None)
+    ds.setdefault('color', "blue")
+    return ds
+
+
+def validate_config(settings, base_dir=None):
+    """Check a settings dict and fill in the defaults
+
+    Returns a new config dict; raises ConfigError naming the first problem.
+    base_dir: directory relative dataset paths are resolved against.
+    """
+    if not isinstance(settings, dict):
+        raise ConfigError("A config must be a table of settings")
+    unknown = set(settings) - set(DEFAULTS)
+    if unknown:
+        raise ConfigError(f"Unknown setting(s): {', '.join(sorted(unknown))}")
+    config = dict(DEFAULTS, **settings)
+
+    for key, minimum in _NUMBERS.items():
+        value = config[key]
+        if value is None and key == 'stream_chunk_rows':
+            continue
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value < minimum:
+            raise ConfigError(f"{key} must be a number >= {minimum}, not {value!r}")
+    for key, choices in _CHOICES.items():
+        if config[key] not in choices:
+            raise ConfigError(f"{key} must be one of {choices}, not {config[key]!r}")
+    for key in _FLAGS:
+        if not isinstance(config[key], bool):
+            raise ConfigError(f"{key} must be true or false, not {config[key]!r}")
+    if config['tile_min_zoom'] > config['tile_max_zoom']:
+        raise ConfigError("tile_min_zoom must not be above tile_max_zoom")
+    if config['density_min_zoom'] > config['density_max_zoom']:
+        raise ConfigError("density_min_zoom must not be above density_max_zoom")
+    if config['lod_min_zoom'] > config['lod_max_zoom']:
+        raise ConfigError("lod_min_zoom must not be above lod_max_zoom")
+    if config['export_tiles'] and config['merge_datasets']:
+        raise ConfigError("Tiled output and merged layers can't be combined; set export_tiles or merge_datasets")
+    if not str(config['output_map']).endswith('.html'):
+        raise ConfigError(f"output_map must be an .html file, not {config['output_map']!r}")
+    if not config['colors_hex']:
+        raise ConfigError("colors_hex needs at least one color")
+    bbox = config['bbox']
+    if bbox is not None:
+        if (not isinstance(bbox, list) or len(bbox) != 4
+                or not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in bbox)):
+            raise ConfigError(f"bbox must be [south, west, north, east] in degrees, not {bbox!r}")
+        if bbox[0] >= bbox[2] or bbox[1] >= bbox[3]:
+            raise ConfigError(f"bbox must have south < north and west < east, not {bbox!r}")
+
+    if not isinstance(config['datasets'], list) or not config['datasets']:
+        raise ConfigError("No datasets configured")
+    config['datasets'] = [_validate_dataset(ds, i, base_dir) for i, ds in enumerate(config['datasets'])]
+    names = [ds['name'] for ds in config['datasets']]
+    duplicates = sorted({n for n in names if names.count(n) > 1})
+    if duplicates:
+        raise ConfigError(f"Dataset names must be unique: {', '.join(map(str, duplicates))}")
+
+    if base_dir is not None and not Path(config['output_map']).is_absolute():
+        config['output_map'] = str(Path(base_dir) / config['output_map'])
+    return config
+
+
+def load_config(path):
+    """Read and validate a config file; relative paths are relative to it"""
+    return validate_config(read_config_file(path), base_dir=Path(path).resolve().parent)
+
+
+def validate_batch(settings, base_dir=None):
+    """Check a batch settings dict: shared settings plus a list of maps
+
+    The top level is a map config whose datasets are the sources; every
+    [[maps]] entry needs an output_map, may pick sources by name with
+    `datasets = ["All Points", ...]` (all by default) and may override any
+    other setting except the BATCH_SHARED ones.
+
+    Returns (base config, [map configs]); raises ConfigError.
+    """
+    if not isinstance(settings, dict):
+        raise ConfigError("A batch config must be a table of settings")
+    settings = dict(settings)
+    maps = settings.pop('maps', None)
+    base = validate_config(settings, base_dir)
+    if not isinstance(maps, list) or not maps:
+        raise ConfigError("No maps configured (add [[maps]] entries)")
+
+    sources = {ds['name']: ds for ds in base['datasets']}
+    configs = []
+    for i, entry in enumerate(maps):
+        where = f"maps[{i}]"
+        if not isinstance(entry, dict):
+            raise ConfigError(f"{where} must be a table of settings")
+        if 'output_map' not in entry:
+            raise ConfigError(f"{where}: missing output_map")
+        shared = [k for k in BATCH_SHARED if k in entry]
+        if shared:
+            raise ConfigError(f"{where}: {', '.join(shared)} can only be set for the whole batch")
+        names = entry.get('datasets', list(sources))
+        if not isinstance(names, list) or not all(isinstance(n, str) for n in names):
+            raise ConfigError(f"{where}: datasets must be a list of dataset names")
+        unknown = [n for n in names if n not in sources]
+        if unknown:
+            raise ConfigError(f"{where}: unknown dataset(s) {', '.join(unknown)}")
+        map_settings = {k: v for k, v in settings.items() if k != 'datasets'}
+        map_settings.update(entry, datasets=[sources[n] for n in names])
+        try:
+            configs.append(validate_config(map_settings, base_dir))
+        except ConfigError as e:
+            raise ConfigError(f"{where}: {e}") from e
+
+    outputs = [str(Path(c['output_map']).resolve()) for c in configs]
+    duplicates = sorted({o for o in outputs if outputs.count(o) > 1})
+    if duplicates:
+        raise ConfigError(f"Maps must write different files: {', '.join(duplicates)}")
+    return base, configs
+
+
+def load_batch_config(path):
+    """Read and validate a batch file; relative paths are relative to it"""
+    return validate_batch(read_config_file(path), base_dir=Path(path).resolve().parent)
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+
+# Boreholes whose GK X/Y fall into the same cell of this grid are duplicates
+DEDUP_GRID_M = 1.0
+
+DEDUP_MODES = ("off", "report", "collapse")
+
+REPORT_COLUMNS = ['dataset', 'bohr_id', 'count', 'kind', 'bohr_ids', 'X', 'Y', 'latitude', 'longitude']
+
+# Columns added to collapsed frames (shown in the popups)
+COUNT_COLUMN = "Duplicates"
+IDS_COLUMN = "Duplicate IDs"
+
+
+def duplicate_groups(df, grid_m=DEDUP_GRID_M, x_col='X', y_col='Y'):
+    """Group code per row: rows snapped to the same grid cell share a code
+
+    One hash pass over the snapped (X, Y) pairs, O(n). Points just either
+    side of a cell border are not grouped; use a coarser grid for those.
+    """
+    gx = np.floor(df[x_col].to_numpy(dtype=float) / grid_m)
+    gy = np.floor(df[y_col].to_numpy(dtype=float) / grid_m)
+    return pd.DataFrame({'gx': gx, 'gy': gy}).groupby(['gx', 'gy'], sort=False, dropna=False).ngroup().to_numpy()
+
+
+def duplicated_rows(groups):
+    """Positions of the rows whose group has more than one row"""
+    return np.flatnonzero(np.bincount(groups)[groups] > 1)
+
+
+def _joined_ids(df, groups, mask):
+    """" / "-joined distinct bohr_ids per group, for the rows in mask"""
+    pairs = pd.DataFrame({'group': groups[mask], 'id': df['bohr_id'].astype(str).to_numpy()[mask]})
+    pairs = pairs.drop_duplicates().sort_values('group', kind='stable')
+    if pairs.empty:
+        return pd.Series([], dtype=object)
+    group = pairs['group'].to_numpy()
+    ids = pairs['id'].to_numpy(dtype=object)
+    starts = np.flatnonzero(np.r_[True, group[1:] != group[:-1]])
+    ends = np.r_[starts[1:], len(group)]
+    return pd.Series([" / ".join(ids[a:b]) for a, b in zip(starts, ends)], index=group[starts], dtype=object)
+
+
+def duplicate_report(df, name, groups):
+    """One row per duplicated location: count, all IDs and whether the rows are identical
+
+    Rows of single boreholes can be left out of df and groups (see
+    duplicated_rows()): only the duplicated rows' attributes are compared.
+    """
+    counts = np.bincount(groups)
+    dup = counts[groups] > 1
+    if not dup.any():
+        return pd.DataFrame(columns=REPORT_COLUMNS)
+
+    rows = df[dup]
+    # "exact": every row of the group is the same record; "location": same spot, different records
+    row_hashes = pd.util.hash_pandas_object(rows.astype(str), index=False).to_numpy()
+    by_group = rows.groupby(groups[dup], sort=False)
+    report = by_group[['bohr_id', 'X', 'Y', 'latitude', 'longitude']].first()
+    report['count'] = by_group.size()
+    distinct = pd.Series(row_hashes).groupby(groups[dup], sort=False).nunique()
+    report['kind'] = np.where(distinct.reindex(report.index).to_numpy() == 1, "exact", "location")
+    report['bohr_ids'] = _joined_ids(df, groups, dup).reindex(report.index)
+    report['dataset'] = name
+    return report.reset_index(drop=True)[REPORT_COLUMNS]
+
+
+def collapsed_rows(df, groups):
+    """The first row per group and the columns collapse_duplicates() adds to it
+
+    df only needs bohr_id (a BoreholeTable's core will do). Returns (row
+    positions, frame of COUNT_COLUMN and IDS_COLUMN for those rows).
+    """
+    counts = np.bincount(groups)
+    first = np.flatnonzero(~pd.Series(groups).duplicated().to_numpy())
+    kept_groups = groups[first]
+    kept_counts = counts[kept_groups]
+    ids = _joined_ids(df, groups, counts[groups] > 1)
+    added = pd.DataFrame({
+        COUNT_COLUMN: np.where(kept_counts > 1, kept_counts, np.nan),
+        IDS_COLUMN: ids.reindex(kept_groups).to_numpy(),
+    })
+    return first, added
+
+
+def collapse_duplicates(df, groups):
+    """Keep the first row per group; add the group's row count and IDs
+
+    COUNT_COLUMN / IDS_COLUMN are only filled for rows that stand for
+    more than one record, so popups of single boreholes don't change.
+    """
+    first, added = collapsed_rows(df, groups)
+    collapsed = df.iloc[first].reset_index(drop=True)
+    collapsed[COUNT_COLUMN] = added[COUNT_COLUMN].to_numpy()
+    collapsed[IDS_COLUMN] = added[IDS_COLUMN].to_numpy()
+    return collapsed
@@ -0,0 +1,59 @@
+"""Borehole counts per grid cell, for density layers at country scale
+
+The points are binned on the Web-Mercator pixel grid of each zoom (cells
+of DENSITY_CELL_PX pixels), so a cell is the same size on screen at every
+zoom and the layer can be drawn tile by tile. Only the non-empty cells and
+their counts go into the map, not the points.
+"""
+import numpy as np
+
+from boreholes.tiles import tile_pixels
+
+DENSITY_MIN_ZOOM = 5
+DENSITY_MAX_ZOOM = 10
+
+# Cell edge in screen pixels (8 px ~ 1.2 km at zoom 10 in Germany)
+DENSITY_CELL_PX = 8
+
+
+def density_levels(lat, lon, min_zoom=DENSITY_MIN_ZOOM, max_zoom=DENSITY_MAX_ZOOM, cell_px=DENSITY_CELL_PX):
+    """Non-empty cells and counts per zoom, min_zoom..max_zoom
+
+    Returns [{'z', 'x', 'y', 'n', 'max'}, ...]: cell columns / rows (in
+    cells of cell_px pixels at zoom z) and point counts, ordered by cell.
+    Points are binned once at max_zoom; each coarser zoom merges 2x2 cells
+    of the next finer one, so the cost is one sort of the points.
+    """
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    ok = np.isfinite(lat) & np.isfinite(lon)
+    px, py = tile_pixels(lat[ok], lon[ok], max_zoom)
+    cx = (px // cell_px).astype(np.int64)
+    cy = (py // cell_px).astype(np.int64)
+
+    # Cells per axis at max_zoom is 2**(max_zoom + 8) / cell_px < 2**32 for any tile zoom
+    keys, counts = np.unique((cx << 32) | cy, return_counts=True)
+    levels = []
+    for z in range(max_zoom, min_zoom - 1, -1):
+        cx, cy = keys >> 32, keys & 0xFFFFFFFF
+        levels.append({
+            'z': z,
+            'x': cx.tolist(),
+            'y': cy.tolist(),
+            'n': counts.tolist(),
+            'max': int(counts.max()) if len(counts) else 0,
+        })
+        if z > min_zoom:
+            keys, inverse = np.unique(((cx >> 1) << 32) | (cy >> 1), return_inverse=True)
+            counts = np.bincount(inverse.ravel(), weights=counts, minlength=len(keys)).astype(np.int64)
+    return levels[::-1]
+
+
+def density_payload(df, name, title_hex, min_zoom=DENSITY_MIN_ZOOM, max_zoom=DENSITY_MAX_ZOOM, cell_px=DENSITY_CELL_PX):
+    """Density layer data of one dataset (df needs latitude and longitude)"""
+    return {
+        'name': name,
+        'title_hex': title_hex,
+        'cell': cell_px,
+        'levels': density_levels(df['latitude'], df['longitude'], min_zoom, max_zoom, cell_px),
+    }
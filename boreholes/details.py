@@ -0,0 +1,102 @@
+"""Popup attributes kept next to the map instead of inside it
+
+With popup_details = "sidecar" the data layers carry only each borehole's
+ID and coordinates; the attribute columns are written to
+<map>_popups/<dataset>/<n>.js, one shard per SHARD_ROWS markers, and a
+marker's shard is loaded when its popup opens. Shards are script files
+calling DETAIL_CALLBACK (like the tiles), so the map also works from file://.
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+from pathlib import Path
+
+DETAIL_CALLBACK = "bohrDetails"
+
+# Markers per shard: one popup click loads this many rows of attributes
+SHARD_ROWS = 256
+
+# Bump when the shard layout changes
+DETAILS_VERSION = 1
+
+
+def dataset_dir(name):
+    """Directory of one dataset's shards: readable, unique per name"""
+    slug = re.sub(r"[^0-9a-z]+", "_", str(name).lower()).strip("_")[:40]
+    return f"{slug or 'dataset'}-{hashlib.sha1(str(name).encode('utf-8')).hexdigest()[:8]}"
+
+
+def _shard_script(payload):
+    text = json.dumps(payload, separators=(',', ':'), ensure_ascii=False, allow_nan=False)
+    return f"{DETAIL_CALLBACK}({text});\n"
+
+
+def read_shard(path):
+    """Payload of one written shard file"""
+    text = Path(path).read_text(encoding='utf-8').strip()
+    prefix = DETAIL_CALLBACK + "("
+    if not (text.startswith(prefix) and text.endswith(");")):
+        raise ValueError(f"Not a detail shard: {path}")
+    return json.loads(text[len(prefix):-2])
+
+
+def write_details(df, columns, out_dir, name, shard_rows=SHARD_ROWS):
+    """Write the popup columns of one dataset as shards of shard_rows rows
+
+    Row i of df is shard i // shard_rows; a shard holds one array per
+    column, null where the cell is empty. The dataset's directory is
+    replaced as a whole. Returns its metadata (also saved as details.json).
+    """
+    from boreholes.popups import format_column
+
+    out_dir = Path(out_dir)
+    target = out_dir / dataset_dir(name)
+    tmp = target.with_name(target.name + ".tmp")
+    if tmp.exists():
+        shutil.rmtree(tmp)
+    tmp.mkdir(parents=True)
+
+    values = []
+    for col in columns:
+        cells = format_column(df[col])
+        mask = df[col].notna().to_numpy()
+        values.append([c if ok else None for c, ok in zip(cells.tolist(), mask.tolist())])
+
+    shards = 0
+    for start in range(0, len(df), shard_rows):
+        payload = {'start': start, 'values': [v[start:start + shard_rows] for v in values]}
+        (tmp / f"{shards}.js").write_text(_shard_script(payload), encoding='utf-8')
+        shards += 1
+
+    meta = {
+        'version': DETAILS_VERSION,
+        'dataset': name,
+        'rows': len(df),
+        'shard_rows': shard_rows,
+        'shards': shards,
+        'columns': [str(c) for c in columns],
+    }
+    with open(tmp / "details.json", 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=1)
+    if target.exists():
+        shutil.rmtree(target)
+    os.replace(tmp, target)
+    return meta
+
+
+def details_intact(out_dir, name):
+    """True if a dataset's shards were written completely"""
+    return (Path(out_dir) / dataset_dir(name) / "details.json").exists()
+
+
+def prune_details(out_dir, keep_names):
+    """Remove the shard directories of datasets not in keep_names"""
+    out_dir = Path(out_dir)
+    if not out_dir.is_dir():
+        return
+    keep = {dataset_dir(name) for name in keep_names}
+    for path in out_dir.iterdir():
+        if path.is_dir() and path.name not in keep:
+            shutil.rmtree(path)
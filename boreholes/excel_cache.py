@@ -0,0 +1,115 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+# Bump when the cleaned frame layout changes so old entries are ignored
+CACHE_VERSION = 1
+
+DEFAULT_CACHE_DIR = ".bohr_cache"
+
+
+def cache_key(excel_file, sheet_name, *columns):
+    """Key for one sheet: file path, mtime, size, sheet and the spec columns"""
+    stat = os.stat(excel_file)
+    parts = [CACHE_VERSION, str(Path(excel_file).resolve()), stat.st_mtime_ns, stat.st_size, str(sheet_name)]
+    parts += [str(c) for c in columns]
+    return hashlib.sha1(json.dumps(parts).encode('utf-8')).hexdigest()
+
+
+class ExcelCache:
+    """Cleaned sheets stored as Parquet (pickle if pyarrow can't write them)
+
+    Entries are evicted when older than max_age_days or, oldest first,
+    when the cache grows beyond max_size_mb.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_age_days=30, max_size_mb=500):
+        self.cache_dir = Path(cache_dir)
+        self.max_age_days = max_age_days
+        self.max_size_mb = max_size_mb
+
+    def _entries(self):
+        if not self.cache_dir.is_dir():
+            return []
+        return [p for p in self.cache_dir.iterdir() if p.suffix in ('.parquet', '.pkl')]
+
+    def get(self, key):
+        """Cached frame for key, or None"""
+        import pandas as pd  # lazily, so importing the cache module stays cheap
+
+        for suffix, reader in (('.parquet', pd.read_parquet), ('.pkl', pd.read_pickle)):
+            path = self.cache_dir / f"{key}{suffix}"
+            if path.exists():
+                try:
+                    df = reader(path)
+                except Exception:
+                    path.unlink(missing_ok=True)
+                    return None
+                os.utime(path)  # keep recently used entries on eviction
+                return df
+        return None
+
+    def put(self, key, df):
+        """Store df under key; returns the written path (None on failure)"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self.cache_dir / f"{key}.parquet"
+        tmp = path.with_suffix('.tmp')
+        try:
+            # Parquet stores column names as strings, so non-str headers
+            # (e.g. years or numbers in the Excel header row) would not roundtrip
+            if not all(isinstance(c, str) for c in df.columns):
+                raise TypeError("non-string column names")
+            df.to_parquet(tmp)
+        except Exception:
+            # Mixed-type object columns or missing pyarrow: fall back to pickle
+            path = self.cache_dir / f"{key}.pkl"
+            try:
+                df.to_pickle(tmp)
+            except Exception:
+                tmp.unlink(missing_ok=True)
+                return None
+        os.replace(tmp, path)
+        self.evict()
+        return path
+
+    def evict(self):
+        """Drop entries past max_age_days, then oldest entries above max_size_mb"""
+        now = time.time()
+        entries = []
+        for path in self._entries():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue  # removed by a concurrent writer
+            if self.max_age_days is not None and now - stat.st_mtime > self.max_age_days * 86400:
+                path.unlink(missing_ok=True)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        if self.max_size_mb is None:
+            return
+        total = sum(size for _, size, _ in entries)
+        limit = self.max_size_mb * 1024 * 1024
+        for _, size, path in sorted(entries):
+            if total <= limit:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def info(self):
+        """(number of entries, total bytes) currently in the cache"""
+        sizes = []
+        for path in self._entries():
+            try:
+                sizes.append(path.stat().st_size)
+            except OSError:
+                continue
+        return len(sizes), sum(sizes)
+
+    def clear(self):
+        """Remove the whole cache directory"""
+        if self.cache_dir.exists():
+            shutil.rmtree(self.cache_dir)
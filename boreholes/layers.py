@@ -0,0 +1,97 @@
+import folium
+import numpy as np
+from folium.plugins import BeautifyIcon
+
+from boreholes.density import DENSITY_MAX_ZOOM, DENSITY_MIN_ZOOM, density_payload
+from boreholes.lod import point_zooms
+from boreholes.marker_layer import DataMarkerLayer, DensityLayer, dataset_payload
+from boreholes.popups import build_popups, build_tooltips
+
+RENDER_MODES = ("data", "cluster", "canvas", "markers")
+
+# Data-driven modes and the marker style DataMarkerLayer draws them with
+_DATA_STYLES = {"data": "icon", "cluster": "cluster", "canvas": "canvas"}
+
+
+def choose_render_mode(n_points, mode="auto", threshold=2000, large_mode="cluster"):
+    """Resolve "auto" to a concrete mode from the dataset's point count
+
+    Small datasets keep the icon markers ("data"); above `threshold` points
+    the layer switches to `large_mode` ("cluster" or "canvas").
+    """
+    if mode != "auto":
+        return mode
+    return large_mode if n_points > threshold else "data"
+
+
+def build_dataset_layer(df, name, color, title_hex, columns=(), header="", footer="", mode="data", max_width=350, count_col=None,
+                        details=None, lod=None):
+    """Build the map layer of one loaded dataset
+
+    mode "data":    dataset embedded once as JSON, icon markers built in the browser
+    mode "cluster": same JSON layer, markers grouped with Leaflet.markercluster
+    mode "canvas":  same JSON layer, circle markers drawn on a canvas
+    mode "markers": one folium.Marker + Popup per borehole
+
+    Rows whose count_col value is > 1 (collapsed duplicates) get a count badge.
+    details: {'url', 'shard_rows'} of the popup shards written by
+    boreholes.details; the data modes then leave the attributes out of the
+    page ("markers" always inlines them).
+    lod: (min zoom, max zoom) to draw the "data" and "canvas" layers with
+    a level of detail per zoom (boreholes.lod); clusters already thin
+    themselves.
+    """
+    if mode not in RENDER_MODES:
+        raise ValueError(f"Unknown render mode {mode!r}, expected one of {RENDER_MODES}")
+
+    layer_name = f"{name} ({len(df)} pts)"
+
+    if mode in _DATA_STYLES:
+        levels = None
+        if lod is not None and mode != "cluster":
+            levels = (lod[0], lod[1], point_zooms(df['latitude'], df['longitude'], lod[0], lod[1]))
+        payload = dataset_payload(df, name, color, title_hex, columns=columns, header=header, footer=footer,
+                                  count_col=count_col, details=details, lod=levels)
+        return DataMarkerLayer(payload, name=layer_name, show=True, max_width=max_width, style=_DATA_STYLES[mode])
+
+    fg = folium.FeatureGroup(name=layer_name, show=True)
+
+    # Build all popups / tooltips for this dataset in one batched pass
+    popups = build_popups(
+        df,
+        header=header,
+        fields=[
+            ('Bohr ID', 'bohr_id', '<b style="color: #333;">{}</b>'),
+            ('Latitude', 'latitude', '{:.6f}°'),
+            ('Longitude', 'longitude', '{:.6f}°'),
+            ('GK X (m)', 'X', '{:.0f}'),
+            ('GK Y (m)', 'Y', '{:.0f}'),
+        ],
+        columns=columns,
+        skip_na=True,
+        footer=footer
+    )
+    tooltips = build_tooltips(df, "<b>{bohr_id}</b> • " + name, bohr_id='bohr_id')
+
+    counts = df[count_col].fillna(0).to_numpy() if count_col is not None else np.zeros(len(df))
+
+    for lat, lon, popup_text, tooltip, count in zip(df['latitude'].values, df['longitude'].values, popups.values, tooltips.values, counts):
+        if count > 1:
+            icon = BeautifyIcon(icon_shape='marker', number=int(count), border_color=f'#{title_hex}', text_color=f'#{title_hex}')
+        else:
+            icon = folium.Icon(color=color, icon='info-sign')
+        folium.Marker(
+            location=[lat, lon],
+            popup=folium.Popup(popup_text, max_width=max_width),
+            icon=icon,
+            tooltip=tooltip
+        ).add_to(fg)
+
+    return fg
+
+
+def build_density_layer(df, name, title_hex, min_zoom=DENSITY_MIN_ZOOM, max_zoom=DENSITY_MAX_ZOOM):
+    """Build the density layer of one loaded dataset: counts per cell, no points"""
+    payload = density_payload(df, name, title_hex, min_zoom=min_zoom, max_zoom=max_zoom)
+    cells = len(payload['levels'][-1]['n'])
+    return DensityLayer(payload, name=f"{name} density ({cells:,} cells)", show=True)
@@ -0,0 +1,436 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pandas as pd
+
+from boreholes.excel_cache import cache_key
+from boreholes.projection import to_wgs84, warm_up
+from boreholes.store import is_store, read_store_sheets
+from boreholes.streaming import CHUNK_ROWS, iter_sheet_chunks, read_header
+from boreholes.table import BoreholeTable
+from boreholes.xlsx_xml import read_workbook_columns
+
+
+def resolve_column(df, col, header=None):
+    """Column name for a spec entry: an existing name or an Excel letter (A, B, ...)
+
+    header: the sheet's full header, when df only holds a subset of columns
+    """
+    columns = df.columns if header is None else header
+    if col in columns:
+        return col
+    return columns[int(ord(col) - ord('A'))]
+
+
+def column_position(header, col):
+    """0-based position of a spec column (name or Excel letter) in a sheet header"""
+    if col in header:
+        return header.get_loc(col)
+    return int(ord(col) - ord('A'))
+
+
+def clean_coordinates(df, bohr_id_col, x_col, y_col, header=None):
+    """Add bohr_id / numeric X, Y columns and drop rows without coordinates"""
+    try:
+        df['bohr_id'] = df[resolve_column(df, bohr_id_col, header)].astype(str)
+    except Exception:
+        df['bohr_id'] = 'N/A'
+
+    df['X'] = pd.to_numeric(df[resolve_column(df, x_col, header)], errors='coerce')
+    df['Y'] = pd.to_numeric(df[resolve_column(df, y_col, header)], errors='coerce')
+
+    return df.dropna(subset=['X', 'Y'])
+
+
+def project_to_wgs84(df_clean, crs="gk"):
+    """Add latitude / longitude (and source_epsg) columns converted from X, Y
+
+    crs "gk": Gauß-Krüger, zone detected per row from the leading digit of X
+    crs "utm32": ETRS89 / UTM zone 32N (EPSG:25832)
+    """
+    lons, lats, epsg = to_wgs84(df_clean['X'].values, df_clean['Y'].values, crs)
+
+    df_clean['latitude'] = lats
+    df_clean['longitude'] = lons
+    df_clean['source_epsg'] = epsg
+    return df_clean
+
+
+class CountingReader:
+    """Wrap a binary file and count the bytes actually read from it"""
+
+    def __init__(self, fh):
+        self._fh = fh
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        data = self._fh.read(size)
+        self.bytes_read += len(data)
+        return data
+
+    def __getattr__(self, name):
+        return getattr(self._fh, name)
+
+
+def spec_columns(ds, stream=False):
+    """Columns a dataset spec needs, or None to read every column
+
+    Specs with an explicit "popup_cols" list are read column-limited.
+    Without one the popup shows the whole sheet as before, except when
+    streaming (stream=True): then only the ID and X/Y columns are read.
+    """
+    core = [c for c in (ds.get('bohr_id_col'), ds['x_col'], ds['y_col']) if c is not None]
+    if ds.get('popup_cols') is None:
+        return core if stream else None
+    return core + list(ds['popup_cols'])
+
+
+def read_workbook_sheets(excel_file, sheet_columns):
+    """Open a workbook once and read several sheets from it
+
+    sheet_columns: {sheet: columns (names or letters) or None for all}
+    Returns ({sheet: (df, header) or the Exception}, bytes read from disk).
+    """
+    frames = {}
+    with open(excel_file, 'rb') as fh:
+        reader = CountingReader(fh)
+        with pd.ExcelFile(reader) as xls:
+            for sheet, columns in sheet_columns.items():
+                try:
+                    if columns is None:
+                        df = xls.parse(sheet)
+                        frames[sheet] = (df, df.columns)
+                        continue
+                    header = xls.parse(sheet, nrows=0).columns
+                    positions = sorted({column_position(header, c) for c in columns})
+                    frames[sheet] = (xls.parse(sheet, usecols=positions), header)
+                except Exception as e:
+                    frames[sheet] = e
+    return frames, reader.bytes_read
+
+
+def iter_dataset_chunks(ws, ds, chunk_rows=CHUNK_ROWS, timings=None):
+    """Stream one dataset's sheet; every chunk is cleaned and projected on its own
+
+    Only the spec's columns are read (ID and X/Y without "popup_cols"),
+    and rows without coordinates are dropped chunk by chunk, so a chunk
+    never holds more than chunk_rows rows of those columns.
+    timings: dict whose 'clean' and 'project' seconds are increased.
+    """
+    timings = {'clean': 0.0, 'project': 0.0} if timings is None else timings
+    header = read_header(ws)
+    columns = spec_columns(ds, stream=True)
+    positions = None if columns is None else sorted({column_position(header, c) for c in columns})
+    for chunk in iter_sheet_chunks(ws, positions, chunk_rows):
+        start = time.perf_counter()
+        chunk = clean_coordinates(chunk, ds['bohr_id_col'], ds['x_col'], ds['y_col'], header)
+        timings['clean'] += time.perf_counter() - start
+        if len(chunk):
+            start = time.perf_counter()
+            chunk = project_to_wgs84(chunk.reset_index(drop=True), ds.get('crs', 'gk'))
+            timings['project'] += time.perf_counter() - start
+            yield chunk
+
+
+def stream_dataset(ds, chunk_rows=CHUNK_ROWS):
+    """Open a dataset's workbook read-only and yield its cleaned, projected chunks"""
+    import openpyxl
+
+    wb = openpyxl.load_workbook(ds['file'], read_only=True, data_only=True)
+    try:
+        yield from iter_dataset_chunks(wb[ds['sheet']], ds, chunk_rows)
+    finally:
+        wb.close()
+
+
+def stream_workbook_datasets(excel_file, specs, chunk_rows=CHUNK_ROWS, timings=None):
+    """Streaming counterpart of read_workbook_sheets for several specs of one workbook
+
+    The workbook is opened once (openpyxl read-only); each spec's sheet is
+    read in chunks of chunk_rows rows and the cleaned chunks are joined.
+    The joined frame holds every kept row of the needed columns: only the
+    reading is bounded by chunk_rows, not the loaded dataset.
+    timings: optional list of one dict per spec for iter_dataset_chunks().
+    Returns ({spec index: (df, seconds) or the Exception}, bytes read from disk).
+    """
+    import openpyxl
+
+    results = {}
+    with open(excel_file, 'rb') as fh:
+        reader = CountingReader(fh)
+        wb = openpyxl.load_workbook(reader, read_only=True, data_only=True)
+        try:
+            for i, ds in enumerate(specs):
+                start = time.perf_counter()
+                try:
+                    chunks = list(iter_dataset_chunks(wb[ds['sheet']], ds, chunk_rows, None if timings is None else timings[i]))
+                    if chunks:
+                        df = pd.concat(chunks, ignore_index=True)
+                    else:
+                        df = pd.DataFrame(columns=['bohr_id', 'X', 'Y', 'latitude', 'longitude', 'source_epsg'])
+                    results[i] = (df, time.perf_counter() - start)
+                except Exception as e:
+                    results[i] = e
+        finally:
+            wb.close()
+    return results, reader.bytes_read
+
+
+def _load_workbook_group(excel_file, specs, cache=None, chunk_rows=None, compact=False, spill_dir=None, engine="pandas"):
+    """Load every dataset spec that reads from one workbook; see _read_workbook_group
+
+    With compact the frames are turned into BoreholeTables still inside
+    the worker, so only the compact tables travel back to the caller.
+    """
+    group = _read_workbook_group(excel_file, specs, cache, chunk_rows, engine)
+    if compact:
+        results = group['results']
+        for i, (df, error, seconds, from_cache) in enumerate(results):
+            if df is not None:
+                start = time.perf_counter()
+                results[i] = (BoreholeTable.from_frame(df, specs[i]['name'], spill_dir), error, seconds, from_cache)
+                group['timings'][i]['compact'] = time.perf_counter() - start
+    return group
+
+
+def _read_workbook_group(excel_file, specs, cache=None, chunk_rows=None, engine="pandas"):
+    """Read and clean every dataset spec that reads from one workbook
+
+    Runs in a pool worker: cache lookups first, then a single open of the
+    workbook for all sheets that were not cached.
+    With chunk_rows the sheets are streamed in chunks instead of parsed
+    whole with pd.read_excel; engine "xml" reads them with the raw-XML
+    reader instead (chunk_rows is then ignored).
+    A boreholes.store database in place of the workbook is queried
+    instead (no sheet cache, no chunks: its tables are already compact).
+    Returns a dict with one (df or None, error, seconds, from_cache) tuple
+    per spec plus the workbook's read stats; 'timings' holds each spec's
+    cache / clean / project seconds.
+    """
+    store = is_store(excel_file)
+    if store:
+        cache, chunk_rows = None, None
+    stream = bool(chunk_rows) and engine != "xml"
+    keys, results = [], []
+    timings = [{'cache': 0.0, 'clean': 0.0, 'project': 0.0} for _ in specs]
+    for ds, timing in zip(specs, timings):
+        start = time.perf_counter()
+        key, df = None, None
+        if cache is not None:
+            try:
+                columns = [ds['bohr_id_col'], ds['x_col'], ds['y_col'], spec_columns(ds, stream)]
+                if engine == "xml":
+                    # Its date cells are serial numbers: keep its frames apart
+                    columns.append(engine)
+                key = cache_key(ds['file'], ds['sheet'], *columns)
+                df = cache.get(key)
+            except OSError:
+                key = None
+        timing['cache'] = time.perf_counter() - start
+        error = None
+        if df is not None:
+            project_start = time.perf_counter()
+            try:
+                df = project_to_wgs84(df, ds.get('crs', 'gk'))
+            except Exception as e:
+                df, error = None, str(e)
+            timing['project'] = time.perf_counter() - project_start
+        keys.append(key)
+        results.append((df, error, time.perf_counter() - start, df is not None))
+
+    # Sheets (and the union of their columns) still needed from the workbook
+    wanted = {}
+    for ds, (df, error, _, _) in zip(specs, results):
+        if df is not None or error is not None:
+            continue
+        columns = spec_columns(ds, stream)
+        if ds['sheet'] in wanted:
+            previous = wanted[ds['sheet']]
+            columns = None if previous is None or columns is None else previous + columns
+        wanted[ds['sheet']] = columns
+
+    group = {'results': results, 'opened': False, 'bytes_read': 0, 'read_seconds': 0.0, 'timings': timings}
+    if not wanted:
+        return group
+
+    if stream:
+        todo = [i for i, (df, error, _, _) in enumerate(results) if df is None and error is None]
+        start = time.perf_counter()
+        try:
+            streamed, group['bytes_read'] = stream_workbook_datasets(excel_file, [specs[i] for i in todo], chunk_rows,
+                                                                     [timings[i] for i in todo])
+            group['opened'] = True
+        except Exception as e:
+            streamed = {j: e for j in range(len(todo))}
+        # Streamed sheets are read, cleaned and projected chunk by chunk:
+        # only the reading counts as read time
+        group['read_seconds'] = time.perf_counter() - start - sum(timings[i]['clean'] + timings[i]['project'] for i in todo)
+
+        for j, i in enumerate(todo):
+            if isinstance(streamed[j], Exception):
+                results[i] = (None, str(streamed[j]), 0.0, False)
+                continue
+            df, seconds = streamed[j]
+            if keys[i] is not None:
+                cache.put(keys[i], df)
+            results[i] = (df, None, seconds, False)
+        return group
+
+    start = time.perf_counter()
+    try:
+        if store:
+            read = read_store_sheets
+        else:
+            read = read_workbook_columns if engine == "xml" else read_workbook_sheets
+        sheets, group['bytes_read'] = read(excel_file, wanted)
+        group['opened'] = True
+    except Exception as e:
+        sheets = e
+    group['read_seconds'] = time.perf_counter() - start
+
+    for i, (ds, key) in enumerate(zip(specs, keys)):
+        if results[i][0] is not None or results[i][1] is not None:
+            continue
+        start = time.perf_counter()
+        raw = sheets if isinstance(sheets, Exception) else sheets[ds['sheet']]
+        if isinstance(raw, Exception):
+            results[i] = (None, str(raw), 0.0, False)
+            continue
+        df, header = raw
+        try:
+            df_clean = clean_coordinates(df.copy(), ds['bohr_id_col'], ds['x_col'], ds['y_col'], header)
+            timings[i]['clean'] = time.perf_counter() - start
+            if key is not None:
+                cache.put(key, df_clean)
+            project_start = time.perf_counter()
+            df_clean = project_to_wgs84(df_clean, ds.get('crs', 'gk'))
+            timings[i]['project'] = time.perf_counter() - project_start
+        except Exception as e:
+            results[i] = (None, str(e), time.perf_counter() - start, False)
+            continue
+        results[i] = (df_clean, None, time.perf_counter() - start, False)
+
+    return group
+
+
+def _make_executor(workers, executor):
+    if executor == "process":
+        # Each worker process builds its transformers once, up front
+        return ProcessPoolExecutor(max_workers=workers, initializer=warm_up)
+    if executor == "thread":
+        return ThreadPoolExecutor(max_workers=workers)
+    raise ValueError(f"Unknown executor {executor!r}, expected 'thread' or 'process'")
+
+
+def load_datasets(datasets, cache=None, workers=1, executor="thread", chunk_rows=None, compact=False, spill_dir=None,
+                  engine="pandas", log=print):
+    """Load every dataset spec, opening each workbook only once
+
+    Specs that share a file are grouped: the workbook is opened once and
+    all their sheets are read in that pass. With workers > 1 the groups
+    are loaded in a thread or process pool; results (and the progress
+    lines) still come back in spec order.
+
+    chunk_rows: stream each sheet in chunks of this many rows (openpyxl
+    read-only, needed columns only; ID and X/Y without "popup_cols").
+    This bounds the memory of reading a sheet; the loaded dataset still
+    holds all its kept rows.
+
+    engine: "pandas" (pd.read_excel) or "xml" (boreholes.xlsx_xml, which
+    streams only the needed columns out of the sheet XML; much faster on
+    large sheets, but date cells come back as Excel serial numbers).
+
+    compact: return BoreholeTables (categorical IDs, typed coordinates)
+    instead of the full frames; with spill_dir their popup attributes are
+    kept in files there and only read back when a layer needs them.
+
+    log: receives the per-dataset progress lines (print by default).
+
+    Process pools re-import the calling script on Windows, so only use
+    executor="process" from code behind an `if __name__ == '__main__':`
+    guard.
+
+    Returns (frames or tables in spec order, None for failures; read stats dict).
+    The stats' 'stage_seconds' sum the cache, read, clean, project and
+    compact time of all workbooks (CPU time across workers, not wall time);
+    'rows' counts the loaded rows.
+    """
+    start = time.perf_counter()
+    stats = {
+        'files_opened': 0, 'bytes_read': 0, 'bytes_per_dataset_reads': 0, 'cached': 0, 'rows': 0,
+        'workbook_seconds': {}, 'dataset_seconds': {},
+        'stage_seconds': {'cache': 0.0, 'read': 0.0, 'clean': 0.0, 'project': 0.0, 'compact': 0.0},
+    }
+
+    groups = {}
+    for i, ds in enumerate(datasets):
+        groups.setdefault(ds['file'], []).append(i)
+
+    pool = _make_executor(workers, executor) if workers > 1 and len(groups) > 1 else None
+    pending = {}
+    if pool is not None:
+        for excel_file, indices in groups.items():
+            pending[excel_file] = pool.submit(_load_workbook_group, excel_file, [datasets[i] for i in indices], cache, chunk_rows, compact, spill_dir, engine)
+
+    done = {}
+    results = []
+    try:
+        for i, ds in enumerate(datasets):
+            excel_file = ds['file']
+            if excel_file not in done:
+                try:
+                    if pool is not None:
+                        group = pending[excel_file].result()
+                    else:
+                        group = _load_workbook_group(excel_file, [datasets[j] for j in groups[excel_file]], cache, chunk_rows, compact, spill_dir, engine)
+                except Exception as e:
+                    # A crashed worker fails its datasets, not the whole load
+                    group = {'results': [(None, str(e), 0.0, False)] * len(groups[excel_file]),
+                             'opened': False, 'bytes_read': 0, 'read_seconds': 0.0, 'timings': []}
+                done[excel_file] = group
+                stats['files_opened'] += int(group['opened'])
+                stats['bytes_read'] += group['bytes_read']
+                stats['stage_seconds']['read'] += group['read_seconds']
+                for timing in group['timings']:
+                    for stage, seconds in timing.items():
+                        stats['stage_seconds'][stage] += seconds
+                if group['opened']:
+                    stats['workbook_seconds'][excel_file] = group['read_seconds']
+            group = done[excel_file]
+
+            df, error, seconds, from_cache = group['results'][groups[excel_file].index(i)]
+            stats['dataset_seconds'][ds['name']] = seconds
+            stats['rows'] += 0 if df is None else len(df)
+            if from_cache:
+                stats['cached'] += 1
+            else:
+                # What opening the workbook again for this dataset would have read
+                stats['bytes_per_dataset_reads'] += group['bytes_read']
+
+            if df is None:
+                log(f"📁 {ds['name']}... ✗ {error[:40]}")
+            else:
+                log(f"📁 {ds['name']}... ✓ {len(df)} points ({'cached, ' if from_cache else ''}{seconds:.2f} s)")
+            results.append(df)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    stats['seconds'] = time.perf_counter() - start
+    return results, stats
+
+
+def process_excel_file(excel_file, sheet_name, bohr_id_col, x_col, y_col, dataset_name, cache=None, popup_cols=None, crs="gk",
+                       engine="pandas"):
+    """Read Excel and convert Gauß-Krüger (or UTM32) to WGS84
+
+    With an ExcelCache the cleaned sheet is reused as long as the
+    workbook's path, mtime and size are unchanged.
+    """
+    ds = {
+        'file': excel_file, 'sheet': sheet_name, 'name': dataset_name,
+        'bohr_id_col': bohr_id_col, 'x_col': x_col, 'y_col': y_col,
+        'popup_cols': popup_cols, 'crs': crs,
+    }
+    frames, _ = load_datasets([ds], cache=cache, engine=engine)
+    return frames[0]
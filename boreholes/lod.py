@@ -0,0 +1,53 @@
+"""Level of detail for the embedded point layers
+
+Every point gets the lowest zoom it is drawn at: at zoom z a layer shows
+the first point (in row order) of every LOD_CELL_PX cell of that zoom's
+pixel grid, and from max_zoom on every point. The kept sets are nested,
+so zooming in only ever adds points, and a view never holds more than one
+point per cell however many boreholes the dataset has.
+"""
+import numpy as np
+
+from boreholes.tiles import tile_pixels
+
+LOD_MIN_ZOOM = 5
+LOD_MAX_ZOOM = 12
+
+# Cell edge in screen pixels: about one marker icon
+LOD_CELL_PX = 32
+
+
+def point_zooms(lat, lon, min_zoom=LOD_MIN_ZOOM, max_zoom=LOD_MAX_ZOOM, cell_px=LOD_CELL_PX):
+    """Lowest zoom (min_zoom..max_zoom) each point is drawn at, as an int8 array
+
+    The points are binned once, at max_zoom - 1. The first point of a cell
+    at a coarser zoom is the first of the kept points of its 2x2 child
+    cells, so each coarser zoom only looks at the points kept by the
+    previous one.
+    """
+    lat = np.asarray(lat, dtype=float)
+    zooms = np.full(len(lat), max_zoom, dtype=np.int8)
+    if max_zoom <= min_zoom or not len(lat):
+        return zooms
+
+    px, py = tile_pixels(lat, lon, max_zoom - 1)
+    cx = (px // cell_px).astype(np.int64)
+    cy = (py // cell_px).astype(np.int64)
+    _, first = np.unique((cx << 32) | cy, return_index=True)
+    # Kept points in row order, so np.unique's first index is the first row
+    kept = np.sort(first)
+    cx, cy = cx[kept], cy[kept]
+    for z in range(max_zoom - 1, min_zoom - 1, -1):
+        zooms[kept] = z
+        if z > min_zoom:
+            cx, cy = cx >> 1, cy >> 1
+            _, first = np.unique((cx << 32) | cy, return_index=True)
+            first = np.sort(first)
+            kept, cx, cy = kept[first], cx[first], cy[first]
+    return zooms
+
+
+def points_per_zoom(zooms, min_zoom=LOD_MIN_ZOOM, max_zoom=LOD_MAX_ZOOM):
+    """{zoom: points drawn at that zoom} for point_zooms() output"""
+    counts = np.bincount(np.asarray(zooms, dtype=np.int64) - min_zoom, minlength=max_zoom - min_zoom + 1)
+    return {min_zoom + i: int(n) for i, n in enumerate(np.cumsum(counts))}
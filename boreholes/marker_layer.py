@@ -0,0 +1,525 @@
+import json
+
+import numpy as np
+from folium.elements import JSCSSMixin
+from folium.map import FeatureGroup, Layer
+from folium.plugins import MarkerCluster
+from folium.template import Template
+
+from boreholes.details import DETAIL_CALLBACK
+from boreholes.popups import format_column
+from boreholes.tiles import TILE_CALLBACK
+
+
+def _floats(values, decimals):
+    """Rounded floats as a JSON-ready list (NaN/inf -> null)"""
+    values = np.round(np.asarray(values, dtype=float), decimals)
+    finite = np.isfinite(values)
+    return [v if ok else None for v, ok in zip(values.tolist(), finite.tolist())]
+
+
+def _texts(series):
+    """Cell values as strings, null where the cell is NaN"""
+    cells = format_column(series)
+    mask = series.notna().to_numpy()
+    return [c if ok else None for c, ok in zip(cells.tolist(), mask.tolist())]
+
+
+def dataset_payload(df, name, color, title_hex, columns=(), header="", footer="", count_col=None, details=None,
+                    lod=None):
+    """Serialize one dataset as a columnar dict (one array per column)
+
+    df needs bohr_id, X, Y, latitude and longitude; `columns` are the
+    extra attributes shown in the popup. Rows with a count_col value > 1
+    get a count badge on their marker. With details = {'url', 'shard_rows'}
+    the attribute values are left out: they were written as shards by
+    boreholes.details and are loaded when a popup opens. lod = (min zoom,
+    max zoom, per-row zooms from boreholes.lod.point_zooms) adds the level
+    of detail.
+    """
+    payload = {
+        'name': name,
+        'color': color,
+        'title_hex': title_hex,
+        'header': header,
+        'footer': footer,
+        'id': _texts(df['bohr_id']),
+        'lat': _floats(df['latitude'], 6),
+        'lon': _floats(df['longitude'], 6),
+        'x': _floats(df['X'], 1),
+        'y': _floats(df['Y'], 1),
+        'columns': [str(c) for c in columns],
+    }
+    if details is None:
+        payload['values'] = [_texts(df[c]) for c in columns]
+    else:
+        payload['details'] = details
+    if lod is not None:
+        payload['lod_zooms'] = [lod[0], lod[1]]
+        payload['lod'] = np.asarray(lod[2]).tolist()
+    if count_col is not None:
+        counts = df[count_col].to_numpy(dtype=float)
+        payload['count'] = [int(c) if c > 1 else None for c in np.nan_to_num(counts).tolist()]
+    return payload
+
+
+def payload_json(payload):
+    """Compact JSON that is safe to inline in a <script> block"""
+    text = json.dumps(payload, separators=(',', ':'), ensure_ascii=False, allow_nan=False)
+    return text.replace('</', '<\\/')
+
+
+# Shared by the point layers' scripts (included inside each layer's own
+# function): popup rows, the circle marker style and the <script> loader of
+# tiles and attribute shards (boreholes.details), so file:// works too
+POINT_JS = """
+                function row(label, value) {
+                    return '<tr><td><b>' + label + ':</b></td><td>' + value + '</td></tr>';
+                }
+                function pointRows(d, i) {
+                    return row('Bohr ID', '<b style="color: #333;">' + d.id[i] + '</b>')
+                        + row('Latitude', d.lat[i].toFixed(6) + '°')
+                        + row('Longitude', d.lon[i].toFixed(6) + '°')
+                        + row('GK X (m)', d.x[i].toFixed(0))
+                        + row('GK Y (m)', d.y[i].toFixed(0));
+                }
+                function attributeRows(columns, values, i) {
+                    var html = '';
+                    for (var c = 0; c < columns.length; c++) {
+                        var v = values[c][i];
+                        if (v !== null) { html += row(columns[c], v); }
+                    }
+                    return html;
+                }
+                function popupTable(header, rows, footer) {
+                    return header + '<table style="border-collapse: collapse; font-size: 12px;">' + rows + '</table>' + footer;
+                }
+                function circleMarker(lat, lon, renderer, hex) {
+                    return L.circleMarker([lat, lon], {
+                        renderer: renderer, radius: 5, weight: 1, color: '#333',
+                        fillColor: '#' + hex, fillOpacity: 0.85
+                    });
+                }
+                // A loaded script calls back with its payload, stored in cache under
+                // the URL in its attr attribute; cached null means it failed to load
+                function scriptCallback(cache, waiting, attr) {
+                    return function(payload) {
+                        var url = document.currentScript.getAttribute(attr);
+                        cache[url] = payload;
+                        (waiting[url] || []).forEach(function(cb) { cb(payload); });
+                        delete waiting[url];
+                    };
+                }
+                function loadScript(url, cache, waiting, attr, cb) {
+                    if (url in cache) { cb(cache[url]); return; }
+                    if (waiting[url]) { waiting[url].push(cb); return; }
+                    waiting[url] = [cb];
+                    var s = document.createElement('script');
+                    s.src = url;
+                    s.setAttribute(attr, url);
+                    s.onerror = function() {
+                        cache[url] = null;
+                        (waiting[url] || []).forEach(function(cb) { cb(null); });
+                        delete waiting[url];
+                    };
+                    document.head.appendChild(s);
+                }
+                var shards = window.bohrDetailCache = window.bohrDetailCache || {};
+                var shardsWaiting = window.bohrDetailWaiting = window.bohrDetailWaiting || {};
+                window.%(detail_callback)s = window.%(detail_callback)s || scriptCallback(shards, shardsWaiting, 'data-details');
+                function shardUrl(details, i) {
+                    return details.url + Math.floor(i / details.shard_rows) + '.js';
+                }
+                // Attribute rows of dataset row i from its shard
+                function detailRows(details, columns, i) {
+                    var url = shardUrl(details, i), shard = shards[url];
+                    if (shard === undefined) { return '<tr><td colspan="2"><i>Loading details...</i></td></tr>'; }
+                    if (shard === null) { return '<tr><td colspan="2"><i>Details not found (' + url + ')</i></td></tr>'; }
+                    return attributeRows(columns, shard.values, i - shard.start);
+                }
+                // html(marker) builds the popup; with details the shard of dataset
+                // row i is loaded when the popup first opens
+                function bindPointPopup(marker, html, details, i, maxWidth) {
+                    marker.bindPopup(html, {maxWidth: maxWidth});
+                    if (!details) { return; }
+                    marker.on('popupopen', function(e) {
+                        var m = e.target, url = shardUrl(details, i);
+                        if (shards[url] !== undefined) { return; }
+                        loadScript(url, shards, shardsWaiting, 'data-details', function() {
+                            if (m.isPopupOpen()) { m.setPopupContent(html(m)); }
+                        });
+                    });
+                }
+""" % {'detail_callback': DETAIL_CALLBACK}
+
+
+class DataMarkerLayer(JSCSSMixin, FeatureGroup):
+    """One dataset as a single JSON array; markers are created in the browser.
+
+    Unlike one folium.Marker per borehole, the page only carries the data
+    once and a shared script builds each popup's HTML when it is opened.
+
+    style "icon":    one DOM icon marker per borehole
+    style "cluster": icon markers grouped with Leaflet.markercluster
+    style "canvas":  circle markers drawn on a single <canvas>
+
+    A payload with 'lod' (boreholes.lod) only draws the points of the
+    current zoom's level of detail.
+    """
+
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            {%- if this.style == "cluster" %}
+            var {{ this.get_name() }} = L.markerClusterGroup(
+                {chunkedLoading: true, spiderfyOnMaxZoom: true}
+            );
+            {%- else %}
+            var {{ this.get_name() }} = L.featureGroup(
+                {{ this.options|tojavascript }}
+            );
+            {%- endif %}
+            (function(layer, d) {
+                function badge(n) {
+                    return '<span style="position: absolute; left: 22px; top: -6px; min-width: 10px; padding: 0 3px; '
+                        + 'border: 1px solid #333; border-radius: 8px; background: #fff; color: #333; '
+                        + 'font: bold 11px/15px sans-serif; text-align: center;">' + n + '</span>';
+                }
+                {%- if this.style == "canvas" %}
+                var renderer = L.canvas({padding: 0.5});
+                var badges = {};
+                {%- else %}
+                var icon = L.AwesomeMarkers.icon({
+                    icon: 'info-sign', prefix: 'glyphicon',
+                    markerColor: d.color, iconColor: 'white'
+                });
+                function countIcon(n) {
+                    return L.divIcon({
+                        className: '', iconSize: [35, 45], iconAnchor: [17, 42],
+                        popupAnchor: [1, -32], tooltipAnchor: [16, -28],
+                        html: '<div class="awesome-marker-icon-' + d.color + ' awesome-marker">'
+                            + '<i class="glyphicon glyphicon-info-sign icon-white"></i></div>' + badge(n)
+                    });
+                }
+                {%- endif %}
+                {{ this.point_js }}
+                function popupHtml(i) {
+                    return popupTable(d.header, pointRows(d, i)
+                        + (d.details ? detailRows(d.details, d.columns, i) : attributeRows(d.columns, d.values, i)),
+                        d.footer);
+                }
+                var markers = new Array(d.lat.length);
+                function makeMarker(i) {
+                    {%- if this.style == "canvas" %}
+                    var marker = circleMarker(d.lat[i], d.lon[i], renderer, d.title_hex);
+                    if (d.count && d.count[i]) {
+                        badges[i] = L.marker([d.lat[i], d.lon[i]], {
+                            icon: L.divIcon({className: '', iconSize: [0, 0], iconAnchor: [18, 14], html: badge(d.count[i])}),
+                            interactive: false, keyboard: false
+                        });
+                    }
+                    {%- else %}
+                    var marker = L.marker([d.lat[i], d.lon[i]],
+                                          {icon: d.count && d.count[i] ? countIcon(d.count[i]) : icon});
+                    {%- endif %}
+                    marker._bohrIndex = i;
+                    marker.bindTooltip('<b>' + d.id[i] + '</b> • ' + d.name);
+                    bindPointPopup(marker, function(m) { return popupHtml(m._bohrIndex); },
+                                   d.details, i, {{ this.max_width }});
+                    return markers[i] = marker;
+                }
+                {%- if this.lod %}
+                // Level of detail (boreholes.lod): point i is drawn from zoom d.lod[i] on,
+                // its marker is created the first time it is shown
+                var lo = d.lod_zooms[0], hi = d.lod_zooms[1], shown = lo - 1, byLevel = [];
+                for (var z = lo; z <= hi; z++) { byLevel.push([]); }
+                for (var i = 0; i < d.lod.length; i++) { byLevel[d.lod[i] - lo].push(i); }
+                function showLevel(z, on) {
+                    byLevel[z - lo].forEach(function(i) {
+                        var marker = markers[i] || makeMarker(i);
+                        if (on) { layer.addLayer(marker); } else { layer.removeLayer(marker); }
+                        {%- if this.style == "canvas" %}
+                        if (badges[i]) {
+                            if (on) { layer.addLayer(badges[i]); } else { layer.removeLayer(badges[i]); }
+                        }
+                        {%- endif %}
+                    });
+                }
+                function update() {
+                    var target = Math.min(Math.max(Math.floor(layer._map.getZoom()), lo), hi);
+                    while (shown < target) { showLevel(++shown, true); }
+                    while (shown > target) { showLevel(shown--, false); }
+                }
+                layer.on('add', function() { layer._map.on('zoomend', update); update(); });
+                layer.on('remove', function() { layer._map.off('zoomend', update); });
+                {%- else %}
+                for (var i = 0; i < d.lat.length; i++) { makeMarker(i); }
+                {%- if this.style == "cluster" %}
+                layer.addLayers(markers);
+                {%- else %}
+                markers.forEach(function(marker) { layer.addLayer(marker); });
+                {%- endif %}
+                {%- if this.style == "canvas" %}
+                Object.keys(badges).forEach(function(i) { layer.addLayer(badges[i]); });
+                {%- endif %}
+                {%- endif %}
+            })({{ this.get_name() }}, {{ this.data_json }});
+        {% endmacro %}
+        """)
+
+    def __init__(self, payload, name=None, show=True, max_width=350, style="icon"):
+        super().__init__(name=name, show=show)
+        self._name = "DataMarkerLayer"
+        self.data_json = payload_json(payload)
+        self.lod = 'lod' in payload
+        self.point_js = POINT_JS
+        self.max_width = max_width
+        self.style = style
+        self.default_js = list(MarkerCluster.default_js) if style == "cluster" else []
+        self.default_css = list(MarkerCluster.default_css) if style == "cluster" else []
+
+
+def layer_fragment(layer, placeholder):
+    """Render a layer's script with its JS variable replaced by placeholder
+
+    Used to store a layer for incremental rebuilds; FragmentLayer puts the
+    stored script back into a later map under a new variable name.
+    """
+    script = layer._template.module.script(layer, {})
+    return script.replace(layer.get_name(), placeholder)
+
+
+class FragmentLayer(JSCSSMixin, Layer):
+    """A previously rendered layer script spliced back into the map"""
+
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            {{ this.script }}
+        {% endmacro %}
+        """)
+
+    def __init__(self, fragment, placeholder, name=None, show=True, default_js=(), default_css=()):
+        super().__init__(name=name, overlay=True, show=show)
+        self._name = "FragmentLayer"
+        self.script = fragment.replace(placeholder, self.get_name())
+        self.default_js = [tuple(link) for link in default_js]
+        self.default_css = [tuple(link) for link in default_css]
+
+
+class TiledPointLayer(Layer):
+    """One dataset drawn from a tile pyramid written by boreholes.tiles
+
+    Only the tiles in view are loaded (as <script> tags, so the page also
+    works from file://); points are circle markers on a shared canvas.
+    Tiles only carry IDs and coordinates: with details = {'url',
+    'shard_rows'} a popup loads its point's attribute columns from the
+    dataset's boreholes.details shards (tiles give each point's dataset row).
+    """
+
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = (function(o) {
+                {{ this.point_js }}
+                var cache = window.bohrTileCache = window.bohrTileCache || {};
+                var waiting = window.bohrTileWaiting = window.bohrTileWaiting || {};
+                window.{{ this.callback }} = window.{{ this.callback }} || scriptCallback(cache, waiting, 'data-tile');
+                function addPoint(group, d, i) {
+                    var marker = circleMarker(d.lat[i], d.lon[i], renderer, o.title_hex);
+                    marker.bindTooltip('<b>' + d.id[i] + '</b> • ' + o.dataset);
+                    bindPointPopup(marker, function() {
+                        return popupTable(o.header, pointRows(d, i)
+                            + (o.details ? detailRows(o.details, o.columns, d.row[i]) : ''), o.footer);
+                    }, o.details, d.row[i], o.max_width);
+                    group.addLayer(marker);
+                }
+                var renderer = L.canvas({padding: 0.5});
+                var points = L.featureGroup();
+                var groups = {};
+                var Tiled = L.GridLayer.extend({
+                    createTile: function(coords, done) {
+                        var layer = this, key = this._tileCoordsToKey(coords);
+                        var tile = document.createElement('div');
+                        var url = o.url + coords.z + '/' + coords.x + '/' + coords.y + '.js';
+                        loadScript(url, cache, waiting, 'data-tile', function(d) {
+                            // GridLayer wants done() after createTile returned, also for cached tiles
+                            setTimeout(function() {
+                                var ds = d ? d.datasets.indexOf(o.dataset) : -1;
+                                if (ds >= 0 && layer._tiles[key] && !groups[key]) {
+                                    var group = groups[key] = L.layerGroup();
+                                    for (var i = 0; i < d.ds.length; i++) {
+                                        if (d.ds[i] === ds) { addPoint(group, d, i); }
+                                    }
+                                    points.addLayer(group);
+                                }
+                                done(null, tile);
+                            }, 0);
+                        });
+                        return tile;
+                    }
+                });
+                var layer = new Tiled({
+                    minNativeZoom: o.min_zoom, maxNativeZoom: o.max_zoom,
+                    tileSize: 256, updateWhenZooming: false
+                });
+                layer.on('tileunload', function(e) {
+                    var key = layer._tileCoordsToKey(e.coords);
+                    if (groups[key]) { points.removeLayer(groups[key]); delete groups[key]; }
+                });
+                layer.on('add', function() { points.addTo(layer._map); });
+                layer.on('remove', function() { points.remove(); points.clearLayers(); groups = {}; });
+                return layer;
+            })({{ this.options_json }});
+        {% endmacro %}
+        """)
+
+    def __init__(self, tile_url, dataset, title_hex, min_zoom, max_zoom, header="", footer="", name=None, show=True,
+                 max_width=350, columns=(), details=None):
+        super().__init__(name=name, overlay=True, show=show)
+        self._name = "TiledPointLayer"
+        self.callback = TILE_CALLBACK
+        self.point_js = POINT_JS
+        self.options_json = payload_json({
+            'url': tile_url.rstrip('/') + '/',
+            'dataset': dataset,
+            'title_hex': title_hex,
+            'min_zoom': min_zoom,
+            'max_zoom': max_zoom,
+            'header': header,
+            'footer': footer,
+            'max_width': max_width,
+            'columns': [str(c) for c in columns],
+            'details': details,
+        })
+
+
+class ServerPointLayer(Layer):
+    """One dataset fetched from a boreholes.server map server per viewport
+
+    After every pan / zoom the layer asks the server for the points inside
+    the visible bounds (thinned below the server's full-detail zoom) and
+    redraws them as circle markers on a shared canvas. Answers to
+    superseded requests are dropped. Popups load their attribute columns
+    from the shards the server names in each answer (boreholes.details).
+    """
+
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = (function(o) {
+                {{ this.point_js }}
+                function addPoint(d, i) {
+                    var marker = circleMarker(d.lat[i], d.lon[i], renderer, o.title_hex);
+                    marker.bindTooltip('<b>' + d.id[i] + '</b> • ' + o.dataset);
+                    bindPointPopup(marker, function() {
+                        return popupTable(o.header, pointRows(d, i)
+                            + (d.details ? detailRows(d.details, d.columns, d.row[i]) : ''), o.footer);
+                    }, d.details, d.row && d.row[i], o.max_width);
+                    points.addLayer(marker);
+                }
+                var renderer = L.canvas({padding: 0.5});
+                var points = L.featureGroup();
+                var layer = L.layerGroup();
+                var map = null, seq = 0;
+                function refresh() {
+                    if (!map) { return; }
+                    var b = map.getBounds(), mine = ++seq;
+                    var bbox = [b.getSouth(), b.getWest(), b.getNorth(), b.getEast()].map(function(v) { return v.toFixed(5); });
+                    fetch(o.url + '?dataset=' + encodeURIComponent(o.dataset) + '&bbox=' + bbox.join(',') + '&zoom=' + map.getZoom())
+                        .then(function(r) { return r.json(); })
+                        .then(function(d) {
+                            if (mine !== seq || !map || d.error) { return; }
+                            points.clearLayers();
+                            for (var i = 0; i < d.id.length; i++) { addPoint(d, i); }
+                        });
+                }
+                layer.on('add', function() {
+                    map = layer._map;
+                    points.addTo(map);
+                    map.on('moveend', refresh);
+                    refresh();
+                });
+                layer.on('remove', function() {
+                    map.off('moveend', refresh);
+                    points.remove();
+                    points.clearLayers();
+                    map = null;
+                });
+                return layer;
+            })({{ this.options_json }});
+        {% endmacro %}
+        """)
+
+    def __init__(self, url, dataset, title_hex, header="", footer="", name=None, show=True, max_width=350):
+        super().__init__(name=name, overlay=True, show=show)
+        self._name = "ServerPointLayer"
+        self.point_js = POINT_JS
+        self.options_json = payload_json({
+            'url': url,
+            'dataset': dataset,
+            'title_hex': title_hex,
+            'header': header,
+            'footer': footer,
+            'max_width': max_width,
+        })
+
+
+class DensityLayer(Layer):
+    """One dataset's borehole counts per cell (boreholes.density), drawn on canvas tiles
+
+    Each zoom draws the cells binned for it (the nearest binned zoom
+    outside that range), shaded by the log of its count relative to the
+    fullest cell of that zoom.
+    """
+
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = (function(d) {
+                var first = d.levels[0].z, last = d.levels[d.levels.length - 1].z;
+                var per = 256 / d.cell, byTile = {};
+                function levelFor(z) {
+                    return d.levels[Math.min(Math.max(z, first), last) - first];
+                }
+                // Cells of a level grouped by the 256 px tile they lie in, built on first use
+                function cellsByTile(level) {
+                    if (!byTile[level.z]) {
+                        var tiles = byTile[level.z] = {};
+                        for (var i = 0; i < level.n.length; i++) {
+                            var key = Math.floor(level.x[i] / per) + ',' + Math.floor(level.y[i] / per);
+                            (tiles[key] = tiles[key] || []).push(i);
+                        }
+                    }
+                    return byTile[level.z];
+                }
+                var Density = L.GridLayer.extend({
+                    createTile: function(coords) {
+                        var tile = document.createElement('canvas');
+                        tile.width = tile.height = 256;
+                        var level = levelFor(coords.z), tiles = cellsByTile(level);
+                        var scale = Math.pow(2, coords.z - level.z), size = d.cell * scale;
+                        var logMax = Math.log(level.max + 1);
+                        var ctx = tile.getContext('2d');
+                        ctx.fillStyle = '#' + d.title_hex;
+                        // This tile's extent in pixels of the level's zoom
+                        var x0 = coords.x * 256 / scale, y0 = coords.y * 256 / scale, span = 256 / scale;
+                        for (var tx = Math.floor(x0 / 256); tx * 256 < x0 + span; tx++) {
+                            for (var ty = Math.floor(y0 / 256); ty * 256 < y0 + span; ty++) {
+                                var cells = tiles[tx + ',' + ty] || [];
+                                for (var j = 0; j < cells.length; j++) {
+                                    var i = cells[j];
+                                    ctx.globalAlpha = 0.15 + 0.7 * Math.log(level.n[i] + 1) / logMax;
+                                    ctx.fillRect(level.x[i] * size - coords.x * 256, level.y[i] * size - coords.y * 256,
+                                                 Math.max(size, 1), Math.max(size, 1));
+                                }
+                            }
+                        }
+                        return tile;
+                    }
+                });
+                var layer = new Density({tileSize: 256, opacity: 0.8, updateWhenZooming: false});
+                return layer;
+            })({{ this.data_json }});
+        {% endmacro %}
+        """)
+
+    def __init__(self, payload, name=None, show=True):
+        super().__init__(name=name, overlay=True, show=show)
+        self._name = "DensityLayer"
+        self.data_json = payload_json(payload)
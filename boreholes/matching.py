@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+
+from boreholes.projection import wgs84_to_utm32
+from boreholes.spatial_index import BoreholeIndex
+
+# Records with the same normalized ID are only linked when this close
+ID_TOLERANCE_M = 1000.0
+
+# Records without an ID partner are linked to the nearest record of another
+# dataset within this distance
+PROXIMITY_TOLERANCE_M = 25.0
+
+
+_UMLAUTS = str.maketrans({'ä': 'ae', 'ö': 'oe', 'ü': 'ue', 'ß': 'ss'})
+
+
+def normalize_ids(ids):
+    """Comparable borehole IDs: "Kirchheilingen 002/1960" -> "kirchheilingen_2_1960"
+
+    Lower-cased, umlauts spelled out (ü -> ue, ß -> ss), any run of
+    separators (space, /, -, _, ...) becomes one "_" and leading zeros of
+    numbers are dropped. Empty IDs become missing.
+    """
+    keys = (
+        pd.Series(ids, dtype=object).astype(str).str.strip().str.lower()
+        .str.translate(_UMLAUTS)
+        .str.replace(r'[\W_]+', '_', regex=True)
+        .str.replace(r'(?<![0-9])0+(?=[0-9])', '', regex=True)
+        .str.strip('_')
+    )
+    invalid = pd.isna(pd.Series(ids, dtype=object)).to_numpy() | keys.isin(['', 'nan', 'none']).to_numpy()
+    return keys.where(~invalid, None)
+
+
+def _resolve(parent, labels):
+    """Follow parent pointers until every label is a root (vectorized)"""
+    while True:
+        nxt = parent[labels]
+        if np.array_equal(nxt, labels):
+            return labels
+        labels = nxt
+
+
+def _find(parent, label):
+    while parent[label] != label:
+        parent[label] = parent[parent[label]]
+        label = parent[label]
+    return label
+
+
+def match_datasets(frames, names, columns=None, tolerance_m=PROXIMITY_TOLERANCE_M, id_tolerance_m=ID_TOLERANCE_M):
+    """Merge the records of several datasets into one row per physical borehole
+
+    frames: loaded datasets (bohr_id, X, Y, latitude, longitude, ...), in
+    priority order; names: their dataset names; columns: {name: [attribute
+    columns]} copied into the merged rows as "<name>: <column>".
+
+    Records are first hash-joined on normalize_ids(bohr_id); of several
+    records of one dataset with the same ID only the first joins. Records
+    left without a partner in another dataset are then linked to the
+    nearest record of another dataset within tolerance_m (grid index, no
+    pairwise scan). A merged borehole never gets two records of the same
+    dataset, so every record's attributes end up in a merged row.
+    Returns (merged frame, group code per input record).
+    """
+    columns = columns or {}
+    records = pd.concat(
+        [df[['bohr_id', 'X', 'Y', 'latitude', 'longitude']].assign(ds=i, src=np.arange(len(df)))
+         for i, df in enumerate(frames)],
+        ignore_index=True
+    )
+    n = len(records)
+    ds = records['ds'].to_numpy()
+    east, north = wgs84_to_utm32(records['latitude'].to_numpy(dtype=float), records['longitude'].to_numpy(dtype=float))
+    positions = np.arange(n)
+
+    # 1. Hash join on the normalized ID: link each record to the first one with its key
+    codes, _ = pd.factorize(normalize_ids(records['bohr_id']), use_na_sentinel=True)
+    first = np.full(codes.max() + 1 if n else 0, -1, dtype=np.int64)
+    valid = codes >= 0
+    first_pos = pd.Series(positions[valid]).groupby(codes[valid]).min()
+    first[first_pos.index.to_numpy()] = first_pos.to_numpy()
+    anchor = np.where(valid, first[np.maximum(codes, 0)], positions)
+    near = np.hypot(east - east[anchor], north - north[anchor]) <= id_tolerance_m
+    # Only the first record of each dataset joins a key's group (the anchor is
+    # the first of its own); other records of that dataset with the same ID
+    # (registry duplicates) are left to the proximity step
+    joins = valid & near
+    joins[joins] = ~pd.DataFrame({'code': codes[joins], 'ds': ds[joins]}).duplicated().to_numpy()
+    parent = np.where(joins, anchor, positions)
+
+    masks = np.zeros(n, dtype=np.int64)
+    np.bitwise_or.at(masks, parent, np.left_shift(1, ds.astype(np.int64)))
+    # More than one dataset bit set (portable: np.bitwise_count needs NumPy 2)
+    group_masks = masks[parent]
+    id_matched = (group_masks & (group_masks - 1)) != 0
+
+    # 2. Proximity fallback for records without an ID partner in another dataset
+    linked = np.zeros(n, dtype=bool)
+    if tolerance_m > 0 and n:
+        index = BoreholeIndex(records['latitude'], records['longitude'], cell_size=max(tolerance_m, 1.0))
+        for i in np.flatnonzero(~id_matched):
+            li = _find(parent, i)
+            rows, _ = index.radius_xy(float(east[i]), float(north[i]), tolerance_m)
+            for r in rows:
+                lr = _find(parent, r)
+                if lr == li or masks[lr] & masks[li]:
+                    continue
+                parent[lr] = li
+                masks[li] |= masks[lr]
+                linked[i] = linked[r] = True
+                break
+
+    labels = _resolve(parent, parent[positions])
+    group, _ = pd.factorize(labels)
+    records['group'] = group
+
+    # One row per group from its first record (highest-priority dataset)
+    first_rows = records.drop_duplicates('group')
+    merged = first_rows[['bohr_id', 'X', 'Y', 'latitude', 'longitude']].reset_index(drop=True)
+
+    by_group = records.groupby('group', sort=True)
+    merged['n_records'] = by_group.size().to_numpy()
+    merged['datasets'] = by_group['ds'].agg(lambda s: ", ".join(names[d] for d in sorted(set(s)))).to_numpy()
+    merged['bohr_ids'] = by_group['bohr_id'].agg(lambda s: " / ".join(dict.fromkeys(map(str, s)))).to_numpy()
+    has_id = pd.Series(id_matched).groupby(group).any().to_numpy()
+    has_link = pd.Series(linked).groupby(group).any().to_numpy()
+    merged['match'] = np.select(
+        [has_id & has_link, has_id, has_link], ["id+proximity", "id", "proximity"], default="single"
+    )
+
+    for i, (name, df) in enumerate(zip(names, frames)):
+        sub = records[records['ds'] == i].drop_duplicates('group')
+        merged[f"in_{name}"] = False
+        merged.loc[sub['group'].to_numpy(), f"in_{name}"] = True
+        for col in columns.get(name, ()):
+            values = pd.Series(pd.NA, index=merged.index, dtype=object)
+            values.iloc[sub['group'].to_numpy()] = df[col].to_numpy(dtype=object)[sub['src'].to_numpy()]
+            merged[f"{name}: {col}"] = values
+
+    return merged, group
@@ -0,0 +1,142 @@
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# Bump when the metrics file layout changes
+METRICS_VERSION = 1
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process so far in MB, or None if unknown"""
+    try:
+        import resource
+    except ImportError:  # Windows
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KB on Linux, in bytes on macOS
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def path_bytes(paths):
+    """Total size of files and directory trees (missing paths count as 0)"""
+    total = 0
+    for path in paths:
+        path = Path(path)
+        if path.is_dir():
+            total += sum(p.stat().st_size for p in path.rglob('*') if p.is_file())
+        elif path.exists():
+            total += path.stat().st_size
+    return total
+
+
+class BuildMetrics:
+    """Per-stage wall time, rows, rows/sec, peak memory and output bytes of a build
+
+    Stages are timed with `with metrics.stage("render", rows=n) as stage:`;
+    set stage['outputs'] to the files the stage wrote to have their size
+    recorded. Times measured elsewhere (e.g. inside loader workers) are
+    added with add(). Peak memory is the process' peak RSS when the stage
+    ended, so it only grows from stage to stage.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self._start = time.perf_counter()
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        stage = {'stage': name, 'rows': rows, 'outputs': []}
+        start = time.perf_counter()
+        try:
+            yield stage
+        finally:
+            self.add(stage['stage'], time.perf_counter() - start, rows=stage['rows'],
+                     output_bytes=path_bytes(stage['outputs']) if stage['outputs'] else None)
+
+    def add(self, name, seconds, rows=None, output_bytes=None, **extra):
+        """Record a stage timed by the caller"""
+        record = {'stage': name, 'seconds': round(seconds, 4), 'rows': rows,
+                  'rows_per_sec': round(rows / seconds) if rows and seconds > 0 else None,
+                  'peak_rss_mb': None, 'output_bytes': output_bytes}
+        rss = peak_rss_mb()
+        if rss is not None:
+            record['peak_rss_mb'] = round(rss, 1)
+        record.update(extra)
+        self.stages.append(record)
+        return record
+
+    def as_dict(self):
+        rss = peak_rss_mb()
+        return {
+            'version': METRICS_VERSION,
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+            'seconds': round(time.perf_counter() - self._start, 4),
+            'peak_rss_mb': round(rss, 1) if rss is not None else None,
+            'stages': self.stages,
+        }
+
+    def write(self, path):
+        """Save as JSON (written to .tmp first, then renamed)"""
+        path = Path(path)
+        tmp = path.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.as_dict(), f, indent=2)
+            f.write("\n")
+        os.replace(tmp, path)
+        return path
+
+    def lines(self):
+        """The stage table as text lines"""
+        lines = [f"  {'stage':<16} {'seconds':>8} {'rows':>10} {'rows/s':>10} {'peak MB':>8} {'output MB':>10}"]
+        for s in self.stages:
+            blank = {k: '' if v is None else v for k, v in s.items()}
+            output_mb = '' if s['output_bytes'] is None else f"{s['output_bytes'] / (1024*1024):.2f}"
+            lines.append(
+                f"  {s['stage']:<16} {s['seconds']:>8.2f} {blank['rows']:>10} {blank['rows_per_sec']:>10} "
+                f"{blank['peak_rss_mb']:>8} {output_mb:>10}"
+            )
+        return lines
+
+
+@contextmanager
+def profiled(path, log=print):
+    """Profile the block into path: pyinstrument HTML for .html, else a cProfile dump
+
+    Read a cProfile dump with `python -m pstats PATH` or snakeviz.
+    """
+    path = Path(path)
+    if path.suffix.lower() == '.html':
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            log("  ⚠️  pyinstrument isn't installed (pip install pyinstrument); writing a cProfile dump instead")
+            path = path.with_suffix('.prof')
+        else:
+            profiler = Profiler()
+            profiler.start()
+            try:
+                yield
+            finally:
+                profiler.stop()
+                path.write_text(profiler.output_html(), encoding='utf-8')
+                log(f"  ✓ Profile: {path}")
+            return
+
+    import cProfile
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+        log(f"  ✓ Profile: {path} (python -m pstats {path})")
@@ -0,0 +1,99 @@
+import os
+import re
+import tempfile
+
+from boreholes.marker_layer import FragmentLayer
+
+_TOKEN = re.compile(r"/\*__BOHR_SPOOL_(\d+)__\*/")
+
+
+class AtomicFile:
+    """Text file written to <path>.tmp and moved over path on commit()
+
+    Lets the outputs be appended to dataset by dataset while the previous
+    version stays intact until the run has finished. Used as a context
+    manager it commits on success and discards the partial file on error.
+    """
+
+    def __init__(self, path, newline=None):
+        self.path = str(path)
+        self.tmp = self.path + '.tmp'
+        self._f = open(self.tmp, 'w', encoding='utf-8', newline=newline)
+        self.bytes_written = 0
+
+    def write(self, text):
+        self._f.write(text)
+        self.bytes_written += len(text)
+
+    def commit(self):
+        self._f.close()
+        os.replace(self.tmp, self.path)
+
+    def discard(self):
+        self._f.close()
+        try:
+            os.unlink(self.tmp)
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
+
+
+class LayerSpool:
+    """Rendered layer scripts parked in a temporary file until the map is saved
+
+    add() appends one layer's script (its JS variable replaced by a
+    placeholder, as stored by the build manifest) and returns a stand-in
+    layer for the map. write_map() renders the rest of the page, which is
+    small, and copies the scripts in one at a time, so neither the folium
+    tree nor the page ever holds every layer's data at once.
+    """
+
+    def __init__(self, dir=None):
+        self._file = tempfile.TemporaryFile(dir=dir)
+        self._spans = []
+        self.bytes_spooled = 0
+
+    def add(self, fragment, placeholder, name=None, show=True, default_js=(), default_css=()):
+        data = fragment.encode('utf-8')
+        offset = self._file.seek(0, os.SEEK_END)
+        self._file.write(data)
+        self.bytes_spooled += len(data)
+
+        token = f"/*__BOHR_SPOOL_{len(self._spans)}__*/"
+        layer = FragmentLayer(token, placeholder, name=name, show=show, default_js=default_js, default_css=default_css)
+        self._spans.append((offset, len(data), placeholder, layer.get_name()))
+        return layer
+
+    def script(self, index):
+        """Spooled script of layer `index` under its stand-in's variable name"""
+        offset, size, placeholder, var_name = self._spans[index]
+        self._file.seek(offset)
+        return self._file.read(size).decode('utf-8').replace(placeholder, var_name)
+
+    def write_map(self, m, path):
+        """Save map m to path with every stand-in replaced by its spooled script"""
+        html = m.get_root().render()
+        with AtomicFile(path) as out:
+            pos = 0
+            for match in _TOKEN.finditer(html):
+                out.write(html[pos:match.start()])
+                out.write(self.script(int(match.group(1))))
+                pos = match.end()
+            out.write(html[pos:])
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
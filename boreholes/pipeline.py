@@ -0,0 +1,722 @@
+import tempfile
+import time
+from pathlib import Path
+
+from boreholes.build_manifest import LAYER_PLACEHOLDER, BuildManifest, dataset_hash
+from boreholes.excel_cache import ExcelCache
+
+# Heavy modules (pandas, folium, pyproj) are only imported inside the build
+# functions, so importing this module and validating configs stays fast
+
+
+class BuildError(Exception):
+    """A map build failed: no dataset could be loaded or an output can't be written"""
+
+
+def output_paths(config):
+    """Every file a build of config writes, by role"""
+    output_map = Path(config['output_map'])
+    csv = output_map.with_name(output_map.stem + '_combined.csv')
+    return {
+        'map': output_map,
+        'csv': csv,
+        'tiles': output_map.with_name(output_map.stem + '_tiles'),
+        'duplicates': output_map.with_name(output_map.stem + '_duplicates.csv'),
+        'merged': output_map.with_name(output_map.stem + '_merged.csv'),
+        'index': csv.with_name(csv.stem + '.index.npz'),
+        'metrics': output_map.with_name(output_map.stem + '_metrics.json'),
+        'popups': output_map.with_name(output_map.stem + '_popups'),
+    }
+
+
+def sidecar_popups(config):
+    """Whether the point layers' popup attributes go to <map>_popups/ shards
+
+    Tiled maps always use them (tiles only carry IDs and coordinates);
+    merged maps build their popups differently and keep them inline.
+    """
+    if config['merge_datasets']:
+        return False
+    return config['popup_details'] == "sidecar" or config['export_tiles']
+
+
+def popup_attributes(ds, table):
+    """Attribute columns the popups of a prepared dataset show"""
+    from boreholes.popups import popup_columns
+
+    return popup_columns(table, ['X', 'Y', 'latitude', 'longitude', 'bohr_id', 'source_epsg', ds['x_col'], ds['y_col'], ds['bohr_id_col']])
+
+
+def lod_zooms(config):
+    """(min zoom, max zoom) of the data layers' level of detail, or None"""
+    return (config['lod_min_zoom'], config['lod_max_zoom']) if config['lod'] else None
+
+
+def render_settings(config):
+    """Settings every layer depends on (part of each dataset's input hash)"""
+    settings = {'render_mode': config['render_mode'], 'threshold': config['auto_mode_threshold'], 'large_mode': config['auto_large_mode']}
+    if config['export_tiles']:
+        settings['tiles'] = [output_paths(config)['tiles'].name, config['tile_min_zoom'], config['tile_max_zoom']]
+    if config['merge_datasets']:
+        settings['merge'] = config['merge_tolerance_m']
+    if config['dedup_mode'] != "off":
+        settings['dedup'] = [config['dedup_mode'], config['dedup_grid_m']]
+    if config['bbox'] is not None:
+        settings['bbox'] = config['bbox']
+    if sidecar_popups(config):
+        settings['popup_details'] = output_paths(config)['popups'].name
+    if config['lod']:
+        settings['lod'] = list(lod_zooms(config))
+    if any(ds.get('density', config['density']) != "off" for ds in config['datasets']):
+        settings['density'] = [config['density'], config['density_min_zoom'], config['density_max_zoom']]
+    if config['read_engine'] != "pandas":
+        # Date columns in the popups differ between the engines
+        settings['read_engine'] = config['read_engine']
+    return settings
+
+
+def tracked_outputs(config):
+    """Outputs the build manifest checks before declaring a map up to date"""
+    paths = output_paths(config)
+    outputs = [paths['map'], paths['csv']]
+    if config['export_tiles']:
+        outputs.append(paths['tiles'] / 'tiles.json')
+    if config['dedup_mode'] != "off":
+        outputs.append(paths['duplicates'])
+    if config['merge_datasets']:
+        outputs.append(paths['merged'])
+    if config['build_spatial_index']:
+        outputs.append(paths['index'])
+    return [str(p) for p in outputs]
+
+
+def written_outputs(config):
+    """Every file or directory a build of config writes; the build manifest
+    deletes those of the previous build that are no longer among them"""
+    paths = output_paths(config)
+    written = [paths['map'], paths['csv']]
+    if config['export_tiles']:
+        written.append(paths['tiles'])
+    if sidecar_popups(config):
+        written.append(paths['popups'])
+    if config['dedup_mode'] != "off":
+        written.append(paths['duplicates'])
+    if config['merge_datasets']:
+        written.append(paths['merged'])
+    if config['build_spatial_index']:
+        written.append(paths['index'])
+    if config['write_metrics']:
+        written.append(paths['metrics'])
+    return [str(p) for p in written]
+
+
+def plan_build(config, full_rebuild=False):
+    """Work out which datasets have to be rebuilt
+
+    Returns (datasets, dirty, manifest): copies of the config's dataset
+    specs with their title color and input hash, the specs to reload, and
+    the map's BuildManifest.
+    """
+    manifest = BuildManifest(config['output_map'])
+    settings = render_settings(config)
+    colors = config['colors_hex']
+    datasets = []
+    for i, spec in enumerate(config['datasets']):
+        ds = dict(spec, title_hex=colors[i % len(colors)])
+        ds['input_hash'] = dataset_hash(ds, settings)
+        datasets.append(ds)
+
+    if full_rebuild or config['merge_datasets']:
+        # The merged layer is built from all datasets at once
+        dirty = list(datasets)
+    else:
+        from boreholes.details import details_intact
+
+        # A stored layer is only reusable if its popup shards are still there
+        popups = output_paths(config)['popups'] if sidecar_popups(config) else None
+        # ("only" drops the point layer, except on tiled maps)
+        dirty = [ds for ds in datasets if not manifest.is_clean(ds['name'], ds['input_hash'])
+                 or (popups is not None and (config['export_tiles'] or ds.get('density', config['density']) != "only")
+                     and not details_intact(popups, ds['name']))]
+    return datasets, dirty, manifest
+
+
+def make_cache(config, clear=False, log=print):
+    """The config's ExcelCache, or None with cache = false"""
+    cache = ExcelCache(config['cache_dir'], max_age_days=config['cache_max_age_days'], max_size_mb=config['cache_max_size_mb'])
+    if clear:
+        cache.clear()
+        log(f"🗑️  Cleared cache: {config['cache_dir']}\n")
+    return cache if config['cache'] else None
+
+
+def load_sources(config, specs, spill_dir, cache=None, log=print):
+    """Load and project dataset specs as BoreholeTables
+
+    Returns ({name: table or None}, read stats).
+    """
+    from boreholes.loader import load_datasets
+    from boreholes.projection import warm_up
+
+    # Build the Gauß-Krüger / UTM32 -> WGS84 transformers once for the whole run
+    warm_up()
+
+    # Workbooks shared by several datasets are opened once for all their sheets
+    tables, read_stats = load_datasets(
+        specs,
+        cache=cache,
+        workers=config['load_workers'],
+        executor=config['load_executor'],
+        chunk_rows=config['stream_chunk_rows'],
+        compact=True,
+        engine=config['read_engine'],
+        spill_dir=spill_dir,
+        log=log
+    )
+    return {ds['name']: table for ds, table in zip(specs, tables)}, read_stats
+
+
+def prepare_tables(config, datasets, tables_by_name, manifest, spill_dir, log=print):
+    """Apply the bbox filter and duplicate check to freshly loaded tables
+
+    Datasets not in tables_by_name are unchanged since the last build and
+    get their counts from the manifest. Returns the dataset dicts to draw;
+    a freshly loaded dict holds its table under 'data'.
+    """
+    from boreholes.dedup import collapsed_rows, duplicate_groups, duplicate_report, duplicated_rows
+
+    tables_by_name = dict(tables_by_name)
+    dedup_mode = config['dedup_mode']
+    grid_m = config['dedup_grid_m']
+
+    loaded = []
+    for ds in datasets:
+        if ds['name'] in tables_by_name:
+            table = tables_by_name.pop(ds['name'])
+            if table is not None and config['bbox'] is not None:
+                table = table.within(config['bbox'])
+                if len(table) == 0:
+                    log(f"  ⚠️  {ds['name']}: no points inside bbox {config['bbox']}")
+                    table = None
+            if table is None:
+                log(f"  ⚠️  Skipping {ds['name']}")
+                manifest.forget_layer(ds['name'])
+                continue
+            ds['duplicates'] = ""
+            if dedup_mode != "off":
+                # Grouping and collapsing only need the core; attributes are
+                # read for the duplicated rows alone (exact copy or not)
+                groups = duplicate_groups(table.core, grid_m)
+                dup = duplicated_rows(groups)
+                if len(dup):
+                    report = duplicate_report(table.take(dup).frame(), ds['name'], groups[dup])
+                    ds['duplicates'] = report.to_csv(index=False, header=False, lineterminator='\n')
+                    log(f"  ⚠️  {ds['name']}: {int(report['count'].sum()) - len(report)} duplicate records "
+                        f"at {len(report)} locations ({grid_m:g} m grid)")
+                if dedup_mode == "collapse":
+                    first, added = collapsed_rows(table.core, groups)
+                    table = table.take(first).with_columns(added)
+            ds['data'] = table
+            ds['points'] = len(table)
+            ds['lat_sum'] = float(table.core['latitude'].sum())
+            ds['lon_sum'] = float(table.core['longitude'].sum())
+        else:
+            entry = manifest.layer(ds['name'])
+            log(f"📁 {ds['name']}... ✓ {entry['points']} points (unchanged)")
+            ds['points'] = entry['points']
+            ds['lat_sum'] = entry['lat_sum']
+            ds['lon_sum'] = entry['lon_sum']
+            ds['duplicates'] = entry.get('duplicates', "")
+        loaded.append(ds)
+    return loaded
+
+
+def base_map(center_lat, center_lon):
+    """OpenStreetMap base map with the Esri satellite layer"""
+    import folium
+
+    m = folium.Map(
+        location=[center_lat, center_lon],
+        zoom_start=8,
+        tiles='OpenStreetMap'
+    )
+    folium.TileLayer(
+        'https://server.arcgisonline.com/ArcGIS/rest/services/World_Imagery/MapServer/tile/{z}/{y}/{x}',
+        attr='Esri',
+        name='Satellite',
+        overlay=False
+    ).add_to(m)
+    return m
+
+
+def title_html(config, loaded, total_points, center_lat, center_lon, merged_points=None):
+    title_content = ""
+    for ds in loaded:
+        title_content += f"<b style=\"color: #{ds['title_hex']}\">● {ds['name']}</b> ({ds['points']} boreholes)<br>"
+
+    return f'''
+<div style="position: fixed; top: 10px; left: 50px; width: 450px;
+            background-color: white; border:3px solid #333; z-index:9999;
+            font-size:12px; padding: 12px; border-radius: 4px; box-shadow: 0 0 8px rgba(0,0,0,0.2);">
+<b style="font-size: 15px;">⛏️ {config['title']}</b><br>
+<b>{config['subtitle']}</b><br>
+<hr style="margin: 5px 0;">
+{title_content}
+<hr style="margin: 5px 0;">
+<b>Total Boreholes:</b> {total_points:,}<br>
+{f"<b>Merged:</b> {merged_points:,} boreholes<br>" if merged_points is not None else ""}
+<b>Datasets:</b> {len(loaded)}<br>
+<b>Region:</b> {center_lat:.4f}°N, {center_lon:.4f}°E<br>
+<i style="color: #666; font-size: 11px;">Use layer control (→) to toggle datasets</i>
+</div>
+'''
+
+
+def legend_html(loaded, merged=False):
+    legend_entries = ""
+    for ds in loaded:
+        legend_entries += f'<i style="background: #{ds["title_hex"]}; border-radius: 50%; display: inline-block; height: 12px; width: 12px; margin-right: 8px;"></i> {ds["name"]}<br>'
+    if merged:
+        legend_entries = '<i style="background: #1F3B73; border-radius: 50%; display: inline-block; height: 12px; width: 12px; margin-right: 8px;"></i> Merged boreholes<br>'
+
+    return f'''
+<div style="position: fixed; bottom: 50px; right: 50px; width: 240px;
+            background-color: white; border:3px solid #333; z-index:9999;
+            font-size:12px; padding: 10px; border-radius: 4px; box-shadow: 0 0 8px rgba(0,0,0,0.2);">
+<b>Legend ({len(loaded)} Datasets)</b><br>
+<hr style="margin: 5px 0;">
+{legend_entries}
+<hr style="margin: 5px 0;">
+<i style="font-size: 11px; color: #666;">• Hover for Bohr ID<br>• Click for details</i>
+</div>
+'''
+
+
+def _render_layers(config, m, loaded, manifest, spool, csv_out, log=print):
+    """Add every dataset's layer to m; CSV rows and layer scripts are streamed out
+
+    Tables are released as soon as their layer is done, except when the
+    datasets are merged afterwards. Returns (render stats, merge columns).
+    """
+    from boreholes.dedup import COUNT_COLUMN
+    from boreholes.details import dataset_dir, write_details
+    from boreholes.layers import build_dataset_layer, build_density_layer, choose_render_mode
+    from boreholes.marker_layer import TiledPointLayer, layer_fragment
+    from boreholes.projection import describe_source
+
+    tile_dir = output_paths(config)['tiles']
+    popups_dir = output_paths(config)['popups'] if sidecar_popups(config) else None
+    render_stats = []
+    merge_columns = {}
+
+    for ds in loaded:
+        log(f"  {ds['name']} ({ds['points']} points, {ds['color']})...", end='', flush=True)
+
+        name = ds['name']
+        title_hex = ds['title_hex']
+        layer_start = time.perf_counter()
+
+        if 'data' not in ds:
+            # Unchanged since the last build: splice the stored layer back in
+            entry = manifest.layer(name)
+            if entry['mode'] != "density":
+                spool.add(
+                    manifest.fragment(name), LAYER_PLACEHOLDER,
+                    name=entry['layer_name'], show=True,
+                    default_js=entry['js_links'], default_css=entry['css_links']
+                ).add_to(m)
+            density = manifest.density_fragment(name)
+            if density is not None:
+                spool.add(density, LAYER_PLACEHOLDER, name=entry['density_name'], show=True).add_to(m)
+            csv_out.write(manifest.csv_rows(name))
+            render_stats.append({'name': name, 'mode': entry['mode'] + ' (reused)', 'points': ds['points'], 'seconds': time.perf_counter() - layer_start})
+            log(" ✓ reused")
+            continue
+
+        table = ds['data']
+        extra_cols = popup_attributes(ds, table)
+        # Only the attributes the popups show are read back
+        df = table.frame(extra_cols)
+        popup_header = f'<b style="font-size: 14px; color: #{title_hex};">{name}</b><br><hr style="margin: 5px 0;">'
+        popup_footer = f'<hr style="margin: 5px 0;"><i style="font-size: 10px; color: #666;">{describe_source(df["source_epsg"])}</i>'
+        # "only" drops the dataset's own point layer; tiled and merged maps keep theirs
+        density = ds.get('density', config['density'])
+
+        if config['merge_datasets']:
+            # Drawn later as part of the merged layer
+            mode = "merged"
+            fg = None
+            merge_columns[name] = extra_cols
+        elif config['export_tiles']:
+            mode = "tiles"
+            # Rows in the shards are the dataset's rows in the combined CSV, as in the tiles
+            meta = write_details(df, extra_cols, popups_dir, name)
+            fg = TiledPointLayer(
+                tile_dir.name, name, title_hex, config['tile_min_zoom'], config['tile_max_zoom'],
+                header=popup_header,
+                footer=popup_footer,
+                name=f"{name} ({len(df)} pts)",
+                columns=extra_cols,
+                details={'url': f"{popups_dir.name}/{dataset_dir(name)}/", 'shard_rows': meta['shard_rows']}
+            )
+        elif density == "only":
+            mode = "density"
+            fg = None
+        else:
+            mode = choose_render_mode(len(df), ds.get('render_mode', config['render_mode']), config['auto_mode_threshold'], config['auto_large_mode'])
+            details = None
+            if popups_dir is not None and mode != "markers":
+                meta = write_details(df, extra_cols, popups_dir, name)
+                details = {'url': f"{popups_dir.name}/{dataset_dir(name)}/", 'shard_rows': meta['shard_rows']}
+            fg = build_dataset_layer(
+                df, name, ds['color'], title_hex,
+                columns=extra_cols,
+                header=popup_header,
+                footer=popup_footer,
+                mode=mode,
+                count_col=COUNT_COLUMN if config['dedup_mode'] == "collapse" else None,
+                details=details,
+                lod=lod_zooms(config)
+            )
+        fragment = ""
+        if mode == "markers":
+            # One folium.Marker per borehole: stays in the folium tree until the save
+            fg.add_to(m)
+        elif fg is not None:
+            fragment = layer_fragment(fg, LAYER_PLACEHOLDER)
+            spool.add(
+                fragment, LAYER_PLACEHOLDER, name=fg.layer_name, show=True,
+                default_js=getattr(fg, 'default_js', []), default_css=getattr(fg, 'default_css', [])
+            ).add_to(m)
+        density_fragment = dg = None
+        if density != "off":
+            dg = build_density_layer(df, name, title_hex, config['density_min_zoom'], config['density_max_zoom'])
+            density_fragment = layer_fragment(dg, LAYER_PLACEHOLDER)
+            spool.add(density_fragment, LAYER_PLACEHOLDER, name=dg.layer_name, show=True).add_to(m)
+
+        csv_rows = df[['bohr_id', 'X', 'Y', 'latitude', 'longitude']].assign(dataset=name).to_csv(index=False, header=False, lineterminator='\n')
+        csv_out.write(csv_rows)
+
+        if mode == "markers" or ds['input_hash'] is None:
+            # Per-marker layers are not stored; they are rebuilt every run
+            manifest.forget_layer(name)
+        else:
+            # Merged runs keep only the hash and CSV rows (the merged layer is always rebuilt)
+            manifest.store_layer(
+                name, ds['input_hash'], fragment, csv_rows, density=density_fragment,
+                density_name=dg.layer_name if dg is not None else None,
+                layer_name=fg.layer_name if fg is not None else name, mode=mode, points=ds['points'],
+                lat_sum=ds['lat_sum'], lon_sum=ds['lon_sum'], duplicates=ds['duplicates'],
+                js_links=getattr(fg, 'default_js', []), css_links=getattr(fg, 'default_css', [])
+            )
+
+        if dg is not None and mode != "density":
+            mode += " + density"
+        render_stats.append({'name': name, 'mode': mode, 'points': len(df), 'seconds': time.perf_counter() - layer_start})
+        log(f" ✓ {mode}")
+
+        if not config['merge_datasets']:
+            del ds['data']
+            table.release()
+        del df, table, fg, fragment, csv_rows, dg, density_fragment
+
+    return render_stats, merge_columns
+
+
+def _render_merged(config, m, loaded, merge_columns, spool, log=print):
+    """Add the merged layer (one marker per physical borehole); returns (merged frame, stats)"""
+    import pandas as pd
+
+    from boreholes.layers import build_dataset_layer, choose_render_mode
+    from boreholes.marker_layer import layer_fragment
+    from boreholes.matching import match_datasets
+    from boreholes.projection import describe_source
+
+    tolerance_m = config['merge_tolerance_m']
+    log(f"\n  Merging datasets (ID, then within {tolerance_m} m)...", end='', flush=True)
+    layer_start = time.perf_counter()
+    merged, _ = match_datasets(
+        [ds['data'].frame(merge_columns[ds['name']]) for ds in loaded],
+        [ds['name'] for ds in loaded],
+        columns=merge_columns,
+        tolerance_m=tolerance_m
+    )
+    merged_popup = merged.rename(columns={'bohr_ids': 'Bohr IDs', 'datasets': 'Datasets', 'match': 'Matched by'})
+    merged_source = describe_source(pd.concat([ds['data'].core['source_epsg'] for ds in loaded]))
+    mode = choose_render_mode(len(merged), config['render_mode'], config['auto_mode_threshold'], config['auto_large_mode'])
+    fg = build_dataset_layer(
+        merged_popup, "Merged boreholes", "darkblue", "1F3B73",
+        columns=['Datasets', 'Bohr IDs', 'Matched by'] + [c for c in merged.columns if ': ' in c],
+        header='<b style="font-size: 14px; color: #1F3B73;">Merged boreholes</b><br><hr style="margin: 5px 0;">',
+        footer=f'<hr style="margin: 5px 0;"><i style="font-size: 10px; color: #666;">{merged_source}</i>',
+        mode=mode,
+        lod=lod_zooms(config)
+    )
+    if mode == "markers":
+        fg.add_to(m)
+    else:
+        spool.add(layer_fragment(fg, LAYER_PLACEHOLDER), LAYER_PLACEHOLDER, name=fg.layer_name, show=True,
+                  default_js=fg.default_js, default_css=fg.default_css).add_to(m)
+    stats = {'name': "Merged boreholes", 'mode': mode, 'points': len(merged), 'seconds': time.perf_counter() - layer_start}
+    log(f" ✓ {len(merged):,} boreholes from {sum(ds['points'] for ds in loaded):,} records ({mode})")
+    for match, count in merged['match'].value_counts().items():
+        log(f"    {match}: {count:,}")
+    for ds in loaded:
+        ds.pop('data').release()
+    return merged, stats
+
+
+def render_map(config, datasets, loaded, manifest, verify_tiles=False, metrics=None, log=print):
+    """Draw the prepared datasets and write the map, CSV, index and tile outputs
+
+    loaded: prepare_tables() output (non-empty). metrics: a BuildMetrics
+    that gets the render, save, export and tiles stages. Returns the build
+    result fields 'datasets', 'total_points' and 'render_stats'; see build_map().
+    """
+    import folium
+
+    from boreholes.dedup import REPORT_COLUMNS
+    from boreholes.metrics import BuildMetrics, path_bytes
+    from boreholes.output import AtomicFile, LayerSpool
+    from boreholes.spatial_index import build_csv_index, index_path
+    from boreholes.tiles import read_points_csv, verify_tiles as check_tiles, write_tile_pyramid
+
+    paths = output_paths(config)
+    paths['map'].parent.mkdir(parents=True, exist_ok=True)
+    metrics = BuildMetrics() if metrics is None else metrics
+
+    # ==================== CREATE MAP ====================
+    log("\n" + "="*70)
+    log("STEP 2: Creating Overlay Map")
+    log("="*70)
+
+    total_points = sum(ds['points'] for ds in loaded)
+    center_lat = sum(ds['lat_sum'] for ds in loaded) / total_points
+    center_lon = sum(ds['lon_sum'] for ds in loaded) / total_points
+
+    log(f"\n  Map center: {center_lat:.4f}°N, {center_lon:.4f}°E")
+    log(f"  Total points: {total_points:,}")
+
+    render_start = time.perf_counter()
+    m = base_map(center_lat, center_lon)
+
+    log("\nAdding datasets to map...\n")
+
+    # Layer scripts go to a spool file and CSV rows straight to the combined
+    # CSV as each dataset is done; the table is released before the next one
+    with LayerSpool(dir=paths['map'].resolve().parent) as spool:
+        csv_out = AtomicFile(paths['csv'], newline='')
+        try:
+            csv_out.write("bohr_id,X,Y,latitude,longitude,dataset\n")
+            render_stats, merge_columns = _render_layers(config, m, loaded, manifest, spool, csv_out, log=log)
+
+            merged = None
+            if config['merge_datasets']:
+                merged, stats = _render_merged(config, m, loaded, merge_columns, spool, log=log)
+                render_stats.append(stats)
+
+            log("\n  Adding layer control...")
+            folium.LayerControl(position='topright', collapsed=False).add_to(m)
+            m.get_root().html.add_child(folium.Element(title_html(
+                config, loaded, total_points, center_lat, center_lon,
+                merged_points=len(merged) if merged is not None else None
+            )))
+            m.get_root().html.add_child(folium.Element(legend_html(loaded, merged=merged is not None)))
+
+            metrics.add("render", time.perf_counter() - render_start, rows=total_points)
+
+            # ==================== SAVE MAP ====================
+            log("\nStep 3: Saving map...")
+            save_start = time.perf_counter()
+            try:
+                spool.write_map(m, paths['map'])
+            except Exception as e:
+                log(f"  ✗ Error saving: {e}")
+                raise BuildError(f"Can't save {paths['map']}: {e}") from e
+            metrics.add("save", time.perf_counter() - save_start, rows=total_points, output_bytes=path_bytes([paths['map']]))
+        except BaseException:
+            csv_out.discard()
+            raise
+
+    file_size = paths['map'].stat().st_size / (1024*1024)
+    log(f"  ✓ Saved: {paths['map']}")
+    log(f"  File size: {file_size:.2f} MB")
+    if sidecar_popups(config):
+        from boreholes.details import prune_details
+
+        prune_details(paths['popups'], [ds['name'] for ds in datasets])
+        log(f"  Popup details: {paths['popups']}/ ({path_bytes([paths['popups']]) / (1024*1024):.2f} MB)")
+    log("\n  Render time per layer:")
+    for stat in render_stats:
+        log(f"    {stat['name']}: {stat['mode']}, {stat['points']} points, {stat['seconds']:.2f} s")
+
+    # ==================== EXPORT COMBINED CSV ====================
+    log("\nStep 4: Saving combined coordinates...")
+    export_start = time.perf_counter()
+    exported = [paths['csv']]
+
+    # Stored rows of unchanged layers + fresh rows of rebuilt ones, in dataset
+    # order, appended while the layers were built
+    csv_out.commit()
+    log(f"  ✓ Saved: {paths['csv']}")
+
+    if config['build_spatial_index']:
+        index_start = time.perf_counter()
+        spatial_index = build_csv_index(paths['csv'])
+        exported.append(index_path(paths['csv']))
+        log(f"  ✓ Saved: {index_path(paths['csv'])} ({spatial_index.size:,} points, "
+            f"{spatial_index.cell_size:.0f} m cells, {time.perf_counter() - index_start:.2f} s)")
+
+    if config['dedup_mode'] != "off":
+        with open(paths['duplicates'], 'w', encoding='utf-8', newline='') as f:
+            f.write(",".join(REPORT_COLUMNS) + "\n")
+            for ds in loaded:
+                f.write(ds['duplicates'])
+        exported.append(paths['duplicates'])
+        log(f"  ✓ Saved: {paths['duplicates']}")
+
+    if merged is not None:
+        merged.drop(columns=[c for c in merged.columns if ': ' in c]).to_csv(paths['merged'], index=False)
+        exported.append(paths['merged'])
+        log(f"  ✓ Saved: {paths['merged']}")
+    metrics.add("export", time.perf_counter() - export_start, rows=total_points, output_bytes=path_bytes(exported))
+
+    # ==================== EXPORT TILES ====================
+    if config['export_tiles']:
+        tile_dir = paths['tiles']
+        log("\nStep 5: Writing tiles...")
+        tile_start = time.perf_counter()
+        tile_meta = write_tile_pyramid(read_points_csv(paths['csv']), tile_dir, config['tile_min_zoom'], config['tile_max_zoom'])
+        log(f"  ✓ Saved: {tile_dir}/ ({time.perf_counter() - tile_start:.2f} s)")
+        metrics.add("tiles", time.perf_counter() - tile_start, rows=total_points, output_bytes=path_bytes([tile_dir]))
+        for z, counts in tile_meta['zooms'].items():
+            log(f"    zoom {z}: {counts['tiles']} tiles, {counts['points']:,} points")
+
+        if verify_tiles:
+            problems = check_tiles(tile_dir, paths['csv'])
+            if problems:
+                log(f"  ✗ Tiles don't match {paths['csv']}:")
+                for problem in problems:
+                    log(f"    {problem}")
+                raise BuildError(f"Tiles don't match {paths['csv']} ({len(problems)} problems)")
+            log(f"  ✓ Tiles match {paths['csv']}")
+
+    # Tiles, popups, reports etc. of modes turned off since the last build are deleted
+    manifest.record_outputs(tracked_outputs(config), written_outputs(config))
+    manifest.save(keep_names={ds['name'] for ds in datasets})
+
+    return {
+        'datasets': {ds['name']: ds['points'] for ds in loaded},
+        'total_points': total_points,
+        'render_stats': render_stats,
+    }
+
+
+def build_map(config, full_rebuild=False, verify_tiles=False, clear_cache=False, log=print):
+    """Build the overlay map (and its CSV / index / tile outputs) for a validated config
+
+    Only datasets whose workbook, spec or render settings changed since the
+    last build are reloaded; if nothing changed and the outputs are intact
+    the build stops right away. log receives the progress lines (print's
+    signature); pass a no-op to build silently.
+
+    Every stage (load, with its read / clean / project parts, prepare,
+    render, save, export, tiles) is timed; with write_metrics the stage
+    table is saved as <map>_metrics.json.
+
+    Returns a dict: 'status' ("built" or "up to date"), 'outputs' (paths),
+    'datasets' ({name: points}), 'total_points', 'render_stats', 'read_stats',
+    'metrics' (the metrics file contents, built maps only).
+    Raises BuildError when nothing could be loaded or an output fails.
+    """
+    from boreholes.metrics import BuildMetrics
+
+    outputs = tracked_outputs(config)
+    datasets, dirty, manifest = plan_build(config, full_rebuild)
+    result = {'status': "up to date", 'outputs': outputs, 'datasets': {}, 'total_points': 0,
+              'render_stats': [], 'read_stats': None}
+
+    if not dirty and manifest.outputs_current(outputs) and not verify_tiles:
+        log("="*70)
+        log(f"✓ Up to date: {', '.join(outputs)}")
+        log("  (no source sheet changed; use --full-rebuild to force)")
+        log("="*70 + "\n")
+        result['datasets'] = {ds['name']: manifest.layer(ds['name'])['points'] for ds in datasets}
+        result['total_points'] = sum(result['datasets'].values())
+        return result
+
+    # ==================== PROCESS ALL FILES ====================
+    log("\n" + "="*70)
+    log("STEP 1: Reading and Converting Datasets")
+    log("="*70 + "\n")
+
+    log(f"  Rebuilding {len(dirty)} of {len(datasets)} datasets "
+        f"({len(datasets) - len(dirty)} unchanged since the last build)\n")
+
+    metrics = BuildMetrics()
+    cache = make_cache(config, clear=clear_cache, log=log)
+
+    # Loaded datasets are kept as compact tables: categorical IDs and typed
+    # coordinates in memory, the popup attributes in this directory until a
+    # layer reads them back
+    with tempfile.TemporaryDirectory(prefix="bohr_attrs_") as attribute_dir:
+        with metrics.stage("load") as stage:
+            tables_by_name, read_stats = load_sources(config, dirty, attribute_dir, cache=cache, log=log)
+            stage['rows'] = read_stats['rows']
+        # Summed over the workbooks: with several load workers they overlap in time
+        for name, seconds in read_stats['stage_seconds'].items():
+            if seconds:
+                metrics.add(f"load: {name}", seconds, rows=read_stats['rows'],
+                            output_bytes=read_stats['bytes_read'] if name == "read" else None)
+        with metrics.stage("prepare") as stage:
+            loaded = prepare_tables(config, datasets, tables_by_name, manifest, attribute_dir, log=log)
+            stage['rows'] = sum(ds['points'] for ds in loaded)
+        result['read_stats'] = read_stats
+
+        if len(loaded) == 0:
+            log("\n✗ No datasets loaded!")
+            raise BuildError("No datasets loaded")
+
+        log(f"\n✓ Successfully loaded {len(loaded)} datasets")
+        log(f"  Workbooks opened: {read_stats['files_opened']} "
+            f"({read_stats['bytes_read'] / (1024*1024):.2f} MB read, "
+            f"{read_stats['bytes_per_dataset_reads'] / (1024*1024):.2f} MB with one read per dataset), "
+            f"{read_stats['cached']} from cache, {read_stats['seconds']:.2f} s")
+        for excel_file, seconds in read_stats['workbook_seconds'].items():
+            log(f"    {Path(excel_file).name}: read in {seconds:.2f} s")
+
+        result.update(render_map(config, datasets, loaded, manifest, verify_tiles=verify_tiles, metrics=metrics, log=log))
+    result['status'] = "built"
+    result['metrics'] = metrics.as_dict()
+
+    log("\n  Stage timings:")
+    for line in metrics.lines():
+        log(line)
+    if config['write_metrics']:
+        log(f"  ✓ Saved: {metrics.write(output_paths(config)['metrics'])}")
+    return result
+
+
+def print_summary(config, result, log=print):
+    """The closing "Outputs created" block of a build"""
+    paths = output_paths(config)
+    log("\n" + "="*70)
+    log("✓ SUCCESS!")
+    log("="*70)
+    log("\nOutputs created:")
+    log(f"  1. {paths['map']}")
+    log(f"  2. {paths['csv']}")
+    if config['export_tiles']:
+        log(f"  3. {paths['tiles']}/ (keep next to {paths['map']})")
+    if sidecar_popups(config):
+        log(f"  {4 if config['export_tiles'] else 3}. {paths['popups']}/ (keep next to {paths['map']})")
+    if config['merge_datasets']:
+        log(f"  3. {paths['merged']}")
+    log("\nBoreholes loaded:")
+    colors = {ds['name']: ds['color'] for ds in config['datasets']}
+    for i, (name, points) in enumerate(result['datasets'].items(), 1):
+        log(f"  {i}. {name}: {points} points ({colors[name]})")
+
+    log(f"\nTotal: {result['total_points']:,} boreholes")
+    log(f"\nOpen {paths['map']} in your browser")
+    log("="*70 + "\n")
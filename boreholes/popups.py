@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+
+ROW_HTML = "<tr><td><b>{label}:</b></td><td>"
+ROW_END = "</td></tr>"
+
+# Numeric columns whose sample has at most this share of distinct values are
+# formatted once per distinct value (depths, years, codes repeat a lot)
+DISTINCT_MAX_SHARE = 0.5
+_SAMPLE_ROWS = 10000
+
+
+def _repetitive(values):
+    sample = values[::max(1, len(values) // _SAMPLE_ROWS)]
+    return len(sample) > 1 and len(pd.unique(sample)) <= DISTINCT_MAX_SHARE * len(sample)
+
+
+def _convert_cells(series, convert):
+    """convert(cell) for every cell as an object array, called as few times as possible
+
+    Categoricals convert their categories once, repetitive numeric columns
+    each distinct value once, and text columns are their own str(). Other
+    columns (mixed types, unique numbers) convert cell by cell in map().
+    """
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        # Code -1 (missing) picks the last label, the NaN one
+        labels = np.array([convert(v) for v in dtype.categories.to_numpy(dtype=object)] + [convert(np.nan)], dtype=object)
+        return labels[series.cat.codes.to_numpy()]
+    if isinstance(dtype, np.dtype) and dtype.kind in "biuf":
+        # tolist(): Python ints / floats, as the cells would be one by one
+        values = series.to_numpy()
+        # (factorize would merge -0.0 into 0.0)
+        if _repetitive(values) and not (dtype.kind == "f" and np.signbit(values[values == 0]).any()):
+            codes, uniques = pd.factorize(values, use_na_sentinel=False)
+            return np.array(list(map(convert, uniques.tolist())), dtype=object)[codes]
+        return np.array(list(map(convert, values.tolist())), dtype=object)
+
+    cells = series.to_numpy(dtype=object)
+    if convert is str and pd.api.types.infer_dtype(cells, skipna=True) in ("string", "empty"):
+        missing = pd.isna(cells)
+        if missing.any():
+            cells = cells.copy()
+            cells[missing] = [str(v) for v in cells[missing]]
+        return cells
+    return np.array(list(map(convert, cells)), dtype=object)
+
+
+def format_column(values, fmt=None):
+    """Format a column to an object array of strings, as str() / fmt.format() per cell would"""
+    series = values if isinstance(values, pd.Series) else pd.Series(values)
+    return _convert_cells(series, str if fmt is None else fmt.format)
+
+
+def _row_cells(df, label, col, fmt=None, skip_na=False):
+    """One "<tr>label: value</tr>" string per record for a single column"""
+    cells = format_column(df[col], fmt)
+    cells = ROW_HTML.format(label=label) + cells + ROW_END
+    if skip_na:
+        cells = np.where(df[col].notna().to_numpy(), cells, "")
+    return cells
+
+
+def _join_rows(parts, n):
+    """Concatenate per-column string arrays into one string per record"""
+    if not parts:
+        return np.full(n, "", dtype=object)
+    return np.array(["".join(row) for row in zip(*parts)], dtype=object)
+
+
+def table_rows(df, columns, skip_na=True):
+    """Render one <tr> per column for every row, working column by column.
+
+    Cells that are NaN are dropped via a mask when skip_na is set, so a
+    row only lists the attributes it actually has.
+    """
+    parts = [_row_cells(df, col, col, skip_na=skip_na) for col in columns]
+    return _join_rows(parts, len(df))
+
+
+def build_popups(df, header="", fields=(), columns=(), skip_na=True, footer=""):
+    """Build the popup HTML of every row in df in one batched pass
+
+    header/footer: HTML placed around the table (same for every row)
+    fields: (label, column, fmt) rows always shown, e.g. ("GK X", "X", "{:.0f}")
+    columns: extra columns shown as-is, NaN cells skipped if skip_na
+
+    Returns a Series of HTML strings aligned with df.index.
+    """
+    parts = [_row_cells(df, label, col, fmt) for label, col, fmt in fields]
+    parts += [_row_cells(df, col, col, skip_na=skip_na) for col in columns]
+    prefix = header + '<table style="border-collapse: collapse; font-size: 12px;">'
+    suffix = "</table>" + footer
+    rows = [prefix + body + suffix for body in _join_rows(parts, len(df))]
+    return pd.Series(rows, index=df.index, dtype=object)
+
+
+def build_tooltips(df, template, **columns):
+    """Build one tooltip per row from a format template
+
+    Keyword arguments map template fields to columns, e.g.
+    build_tooltips(df, "<b>{id}</b> • SVZ", id="bohr_id").
+    """
+    if len(df) == 0:
+        return pd.Series([], index=df.index, dtype=object)
+    values = {key: df[col].to_numpy(dtype=object) for key, col in columns.items()}
+    keys = list(values)
+    tips = [template.format(**dict(zip(keys, row))) for row in zip(*values.values())] if keys else [template] * len(df)
+    return pd.Series(tips, index=df.index, dtype=object)
+
+
+def popup_columns(df, exclude):
+    """Columns of df that are not in exclude (kept in frame order)"""
+    exclude = set(exclude)
+    return [col for col in df.columns if col not in exclude]
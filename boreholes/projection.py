@@ -0,0 +1,139 @@
+import functools
+
+import numpy as np
+import pyproj
+
+WGS84_EPSG = 4326
+
+# Gauß-Krüger zone (leading digit of the Rechtswert) -> EPSG code
+GK_ZONES = {
+    2: 31466,  # 6° meridian
+    3: 31467,  # 9° meridian
+    4: 31468,  # 12° meridian
+    5: 31469,  # 15° meridian
+}
+GK_MERIDIANS = {2: 6, 3: 9, 4: 12, 5: 15}
+DEFAULT_ZONE = 3
+
+UTM32_EPSG = 25832  # ETRS89 / UTM zone 32N
+
+
+def gk_zones(x, default_zone=DEFAULT_ZONE):
+    """Gauß-Krüger zone of every point from the leading digit of X
+
+    Rechtswerte carry the zone number as their millions digit
+    (4 415 490 -> zone 4); anything outside the known zones falls back
+    to default_zone.
+    """
+    x = np.asarray(x, dtype=float)
+    with np.errstate(invalid='ignore'):
+        zones = np.floor(x / 1000000)
+    known = np.isin(zones, list(GK_ZONES))
+    return np.where(known, zones, default_zone).astype(np.int8)
+
+
+@functools.lru_cache(maxsize=32)
+def _cached_transformer(source_epsg, target_epsg, always_xy):
+    return pyproj.Transformer.from_crs(
+        pyproj.CRS.from_epsg(source_epsg),
+        pyproj.CRS.from_epsg(target_epsg),
+        always_xy=always_xy
+    )
+
+
+def get_transformer(source_epsg, target_epsg=WGS84_EPSG, always_xy=True):
+    """Shared Transformer for a CRS pair, built once per process
+
+    LRU-cached on (source EPSG, target EPSG, always_xy). pyproj keeps the
+    underlying PROJ object per thread, so a cached Transformer can be
+    used from several loader threads at once.
+    """
+    return _cached_transformer(int(source_epsg), int(target_epsg), bool(always_xy))
+
+
+def clear_transformer_cache():
+    """Forget all cached transformers (next use builds them again)"""
+    _cached_transformer.cache_clear()
+
+
+def warm_up(epsg_codes=tuple(GK_ZONES.values()) + (UTM32_EPSG,)):
+    """Build the transformers the loaders need before the first dataset arrives"""
+    for epsg_code in epsg_codes:
+        get_transformer(epsg_code).transform(0.0, 0.0)
+
+
+def _transform(epsg_code, x, y):
+    return get_transformer(epsg_code).transform(x, y)
+
+
+def gk_to_wgs84(x, y, default_zone=DEFAULT_ZONE):
+    """Convert Gauß-Krüger X, Y to WGS84, zone detected per point
+
+    Points are grouped by zone and each group goes through one batched
+    transform; results are scattered back into the input order.
+    Returns (lons, lats, epsg codes).
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    zones = gk_zones(x, default_zone)
+    present = np.unique(zones)
+
+    if len(present) == 1:
+        # Common case: the whole dataset lies in one zone, a single call
+        epsg_code = GK_ZONES[int(present[0])]
+        lons, lats = _transform(epsg_code, x, y)
+        return np.asarray(lons), np.asarray(lats), np.full(len(x), epsg_code, dtype=np.int32)
+
+    lons = np.empty(len(x))
+    lats = np.empty(len(x))
+    epsg = np.empty(len(x), dtype=np.int32)
+    for zone in present:
+        mask = zones == zone
+        epsg_code = GK_ZONES[int(zone)]
+        lons[mask], lats[mask] = _transform(epsg_code, x[mask], y[mask])
+        epsg[mask] = epsg_code
+    return lons, lats, epsg
+
+
+def utm32_to_wgs84(x, y):
+    """Convert ETRS89 / UTM32 easting, northing to WGS84
+
+    Eastings written with the zone prefix (32 xxx xxx) are accepted too.
+    Returns (lons, lats, epsg codes).
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    x = np.where(x >= 32000000, x - 32000000, x)
+    lons, lats = _transform(UTM32_EPSG, x, y)
+    return np.asarray(lons), np.asarray(lats), np.full(len(x), UTM32_EPSG, dtype=np.int32)
+
+
+def wgs84_to_utm32(lats, lons):
+    """WGS84 points as ETRS89 / UTM32 (easting, northing) in metres
+
+    One metric grid for all of Germany, unlike the per-zone GK coordinates.
+    """
+    east, north = get_transformer(WGS84_EPSG, UTM32_EPSG).transform(
+        np.asarray(lons, dtype=float), np.asarray(lats, dtype=float)
+    )
+    return np.asarray(east), np.asarray(north)
+
+
+def to_wgs84(x, y, crs="gk"):
+    """Dispatch on the dataset's input CRS: "gk" (default) or "utm32" """
+    if crs in (None, "gk"):
+        return gk_to_wgs84(x, y)
+    if crs in ("utm32", UTM32_EPSG, str(UTM32_EPSG), f"EPSG:{UTM32_EPSG}"):
+        return utm32_to_wgs84(x, y)
+    raise ValueError(f"Unknown input CRS {crs!r}, expected 'gk' or 'utm32'")
+
+
+def describe_source(epsg_codes):
+    """Popup footer text for the source CRSs present in a dataset"""
+    codes = sorted(set(int(c) for c in epsg_codes))
+    if codes == [UTM32_EPSG]:
+        return "ETRS89 / UTM32 → WGS84"
+    zones = [z for z, code in GK_ZONES.items() if code in codes]
+    if len(zones) == 1:
+        return f"Gauß-Krüger Zone {zones[0]} ({GK_MERIDIANS[zones[0]]}° meridian) → WGS84"
+    return "Gauß-Krüger Zones " + ", ".join(str(z) for z in zones) + " → WGS84"
@@ -0,0 +1,343 @@
+"""Local map server: datasets loaded once, visible points served per viewport
+
+Run from the repo root:
+    python -m boreholes serve boreholes.toml --port 8000
+"""
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from boreholes.pipeline import (BuildError, base_map, legend_html, load_sources, make_cache, plan_build, popup_attributes,
+                                prepare_tables, title_html)
+from boreholes.spatial_index import BoreholeIndex
+from boreholes.tiles import THIN_CELLS, thin_points, tile_pixels
+
+# Most points one /points answer holds; the rest is reported as truncated
+MAX_POINTS = 20000
+
+# Latencies kept for /stats percentiles
+LATENCY_WINDOW = 10000
+
+
+def _file_state(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class LatencyStats:
+    """Rolling request latencies with percentiles, safe to share between threads"""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self._seconds = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def record(self, seconds):
+        with self._lock:
+            self._seconds.append(seconds)
+            self.count += 1
+
+    def summary(self):
+        """count plus p50 / p95 / p99 / max in ms over the window"""
+        with self._lock:
+            ms = np.array(self._seconds) * 1000
+            count = self.count
+        if not len(ms):
+            return {'count': count}
+        p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+        return {'count': count, 'p50_ms': round(float(p50), 3), 'p95_ms': round(float(p95), 3),
+                'p99_ms': round(float(p99), 3), 'max_ms': round(float(ms.max()), 3)}
+
+
+def _served_dataset(ds, popups_dir, generation):
+    """What a viewport query needs of a prepared dataset: arrays, a grid index
+    and its popup attributes, written as boreholes.details shards to
+    popups_dir/<generation>/ (a reload writes a new generation, so browsers
+    never mix shards of the old and new rows)
+    """
+    from boreholes.details import dataset_dir, write_details
+
+    table = ds['data']
+    columns = popup_attributes(ds, table)
+    meta = write_details(table.frame(columns), columns, Path(popups_dir) / str(generation), ds['name'])
+    core = table.core
+    lat = core['latitude'].to_numpy(dtype=float)
+    lon = core['longitude'].to_numpy(dtype=float)
+    return {
+        'name': ds['name'],
+        'color': ds['color'],
+        'title_hex': ds['title_hex'],
+        'points': len(core),
+        'lat_sum': ds['lat_sum'],
+        'lon_sum': ds['lon_sum'],
+        'lat': np.round(lat, 6),
+        'lon': np.round(lon, 6),
+        'x': np.round(core['X'].to_numpy(dtype=float), 1),
+        'y': np.round(core['Y'].to_numpy(dtype=float), 1),
+        'id': core['bohr_id'].astype(str).to_numpy(dtype=object),
+        'index': BoreholeIndex(lat, lon),
+        'columns': [str(c) for c in columns],
+        'details': {'url': f"/popups/{generation}/{dataset_dir(ds['name'])}/", 'shard_rows': meta['shard_rows']},
+        'details_dir': Path(popups_dir) / str(generation) / dataset_dir(ds['name']),
+    }
+
+
+class MapServer:
+    """The datasets of one map config, held in memory and queried by viewport
+
+    load() reads every workbook once; reload_changed() re-reads only the
+    workbooks whose modification time or size changed (the watcher thread
+    started by start() calls it every watch_interval seconds). Queries
+    work on an immutable snapshot, so a reload never blocks or tears a
+    running request.
+    """
+
+    def __init__(self, config, watch_interval=2.0, log=print):
+        self.config = config
+        self.watch_interval = watch_interval
+        self.log = log
+        self.latency = LatencyStats()
+        self.reloads = 0
+        self._datasets = {}
+        self._states = {}
+        self._page = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._spill = tempfile.TemporaryDirectory(prefix="bohr_serve_")
+        self.popups_dir = Path(self._spill.name) / "popups"
+        self._generation = 0
+        self._specs, _, self._manifest = plan_build(config, full_rebuild=True)
+        self._cache = make_cache(config, log=log)
+
+    def _load_files(self, files):
+        """(Re)load every dataset of the given workbooks; returns the names loaded"""
+        specs = [dict(ds) for ds in self._specs if ds['file'] in files]
+        states = {f: _file_state(f) for f in files}
+        tables, _ = load_sources(self.config, specs, self._spill.name, cache=self._cache, log=self.log)
+        prepared = prepare_tables(self.config, specs, tables, self._manifest, self._spill.name, log=self.log)
+        self._generation += 1
+        served = {ds['name']: _served_dataset(ds, self.popups_dir, self._generation) for ds in prepared}
+        for ds in prepared:
+            ds.pop('data').release()
+        for table in tables.values():
+            if table is not None:
+                table.release()
+
+        with self._lock:
+            replaced = [self._datasets[name]['details_dir'] for name in served if name in self._datasets]
+            datasets = dict(self._datasets, **served)
+            # Keep the dataset order of the config
+            self._datasets = {ds['name']: datasets[ds['name']] for ds in self._specs if ds['name'] in datasets}
+            # A workbook that failed to load (e.g. caught mid-save) keeps its
+            # previous data and is retried once it changes again
+            self._states.update(states)
+            self._page = None
+        # Popups still open on the old rows show "Details not found"
+        for path in replaced:
+            shutil.rmtree(path, ignore_errors=True)
+        return list(served)
+
+    def load(self):
+        """Load all datasets of the config"""
+        self._load_files({ds['file'] for ds in self._specs})
+        if not self._datasets:
+            raise BuildError("No datasets loaded")
+
+    def reload_changed(self):
+        """Reload the workbooks that changed since they were loaded; returns the dataset names reloaded"""
+        changed = {f for f, state in self._states.items() if _file_state(f) != state}
+        if not changed:
+            return []
+        start = time.perf_counter()
+        names = self._load_files(changed)
+        self.reloads += 1
+        self.log(f"🔄 Reloaded {', '.join(names) or 'nothing'} ({time.perf_counter() - start:.2f} s)")
+        return names
+
+    def _watch(self):
+        while not self._stop.wait(self.watch_interval):
+            try:
+                self.reload_changed()
+            except Exception as e:
+                self.log(f"  ⚠️  Reload failed: {e}")
+
+    def query(self, name, bbox, zoom, limit=MAX_POINTS):
+        """Points of one dataset inside bbox = (south, west, north, east)
+
+        Below tile_max_zoom the points are thinned like the tile pyramid:
+        one point per 4 px cell at that zoom. Returns the JSON payload;
+        'row' are the points' dataset rows in the shards at 'details'.
+        """
+        ds = self._datasets[name]
+        rows = ds['index'].bbox(*bbox)
+        total = len(rows)
+        if zoom < self.config['tile_max_zoom'] and len(rows):
+            px, py = tile_pixels(ds['lat'][rows], ds['lon'][rows], zoom)
+            rows = rows[thin_points(px, py, np.zeros(len(rows), dtype=np.int64), 256 / THIN_CELLS)]
+        truncated = len(rows) > limit
+        rows = rows[:limit]
+        return {
+            'dataset': name,
+            'total': total,
+            'returned': len(rows),
+            'truncated': truncated,
+            'columns': ds['columns'],
+            'details': ds['details'],
+            'row': rows.tolist(),
+            'id': ds['id'][rows].tolist(),
+            'lat': ds['lat'][rows].tolist(),
+            'lon': ds['lon'][rows].tolist(),
+            'x': ds['x'][rows].tolist(),
+            'y': ds['y'][rows].tolist(),
+        }
+
+    def page(self):
+        """The base map page with one server-fed layer per dataset"""
+        import folium
+
+        from boreholes.marker_layer import ServerPointLayer
+
+        page = self._page
+        if page is not None:
+            return page
+        datasets = list(self._datasets.values())
+        total_points = sum(ds['points'] for ds in datasets)
+        center_lat = sum(ds['lat_sum'] for ds in datasets) / total_points
+        center_lon = sum(ds['lon_sum'] for ds in datasets) / total_points
+        m = base_map(center_lat, center_lon)
+        for ds in datasets:
+            ServerPointLayer(
+                "/points", ds['name'], ds['title_hex'],
+                header=f'<b style="font-size: 14px; color: #{ds["title_hex"]};">{ds["name"]}</b><br><hr style="margin: 5px 0;">',
+                name=f"{ds['name']} ({ds['points']} pts)"
+            ).add_to(m)
+        folium.LayerControl(position='topright', collapsed=False).add_to(m)
+        m.get_root().html.add_child(folium.Element(title_html(self.config, datasets, total_points, center_lat, center_lon)))
+        m.get_root().html.add_child(folium.Element(legend_html(datasets)))
+        page = self._page = m.get_root().render()
+        return page
+
+    def stats(self):
+        return {
+            'points_requests': self.latency.summary(),
+            'datasets': {name: ds['points'] for name, ds in self._datasets.items()},
+            'reloads': self.reloads,
+        }
+
+    def start(self, host="127.0.0.1", port=8000):
+        """Serve in background threads; returns the HTTP server (port 0 picks a free one)"""
+        httpd = ThreadingHTTPServer((host, port), _handler(self))
+        httpd.daemon_threads = True
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        if self.watch_interval:
+            threading.Thread(target=self._watch, daemon=True).start()
+        self._httpd = httpd
+        return httpd
+
+    def close(self):
+        self._stop.set()
+        httpd = getattr(self, '_httpd', None)
+        if httpd is not None:
+            httpd.shutdown()
+            httpd.server_close()
+        self._spill.cleanup()
+
+
+def _parse_points_query(params):
+    """(dataset, bbox, zoom, limit) from /points parameters; ValueError if malformed"""
+    name = params['dataset'][0]
+    bbox = [float(v) for v in params['bbox'][0].split(',')]
+    if len(bbox) != 4 or bbox[0] > bbox[2] or bbox[1] > bbox[3]:
+        raise ValueError("bbox must be south,west,north,east")
+    zoom = int(params.get('zoom', ['18'])[0])
+    limit = min(int(params.get('limit', [MAX_POINTS])[0]), MAX_POINTS)
+    return name, bbox, zoom, limit
+
+
+def _handler(server):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, body, content_type, headers=()):
+            data = body.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(data)))
+            for key, value in headers:
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _json(self, status, payload, headers=()):
+            self._send(status, json.dumps(payload, separators=(',', ':'), ensure_ascii=False),
+                       'application/json; charset=utf-8', headers)
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            if url.path == '/':
+                self._send(200, server.page(), 'text/html; charset=utf-8')
+            elif url.path == '/points':
+                start = time.perf_counter()
+                try:
+                    name, bbox, zoom, limit = _parse_points_query(parse_qs(url.query))
+                except (KeyError, ValueError) as e:
+                    self._json(400, {'error': f"Bad query: {e}"})
+                    return
+                if name not in server._datasets:
+                    self._json(404, {'error': f"Unknown dataset {name!r}"})
+                    return
+                payload = server.query(name, bbox, zoom, limit)
+                seconds = time.perf_counter() - start
+                server.latency.record(seconds)
+                # Server-Timing shows up in the browser's network panel
+                self._json(200, payload, [('Server-Timing', f"query;dur={seconds * 1000:.2f}")])
+            elif url.path.startswith('/popups/'):
+                # Popup shards of the loaded datasets (replaced on reload)
+                path = (server.popups_dir / url.path[len('/popups/'):]).resolve()
+                try:
+                    if path.suffix != '.js' or server.popups_dir.resolve() not in path.parents:
+                        raise FileNotFoundError(path)
+                    script = path.read_text(encoding='utf-8')
+                except OSError:
+                    self._json(404, {'error': f"Not found: {url.path}"})
+                    return
+                self._send(200, script, 'text/javascript; charset=utf-8')
+            elif url.path == '/stats':
+                self._json(200, server.stats())
+            else:
+                self._json(404, {'error': f"Not found: {url.path}"})
+
+    return Handler
+
+
+def serve(config, host="127.0.0.1", port=8000, watch_interval=2.0, log=print):
+    """Load the config's datasets and serve the map until Ctrl+C"""
+    server = MapServer(config, watch_interval=watch_interval, log=log)
+    start = time.perf_counter()
+    server.load()
+    log(f"\n✓ Loaded {sum(ds['points'] for ds in server._datasets.values()):,} points "
+        f"in {time.perf_counter() - start:.2f} s")
+    httpd = server.start(host, port)
+    log(f"🗺️  Serving http://{httpd.server_address[0]}:{httpd.server_address[1]}/ "
+        f"(latencies at /stats{f', watching workbooks every {watch_interval:g} s' if watch_interval else ''})")
+    log("  Press Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        log("\nStopping")
+    finally:
+        server.close()
@@ -0,0 +1,211 @@
+"""Grid index over the combined borehole CSV for kNN, radius and bbox queries
+
+Run from the repo root:
+    python -m boreholes.spatial_index German_Boreholes_Map_combined.csv --near 51.21 10.79 --radius 500
+"""
+import argparse
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from boreholes.projection import wgs84_to_utm32
+
+# Bump when the saved arrays change
+INDEX_VERSION = 1
+
+# Aim for this many points per grid cell when picking the cell size
+POINTS_PER_CELL = 8
+
+
+def index_path(csv_path):
+    """Where the index of a combined CSV is saved (next to it)"""
+    csv_path = Path(csv_path)
+    return csv_path.with_name(csv_path.stem + ".index.npz")
+
+
+def _csv_state(csv_path):
+    stat = os.stat(csv_path)
+    return np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+
+class BoreholeIndex:
+    """Uniform grid over ETRS89 / UTM32 metres
+
+    Points are sorted by grid cell, so each row of cells is one contiguous
+    slice found with np.searchsorted. GK X/Y can't be indexed directly:
+    coordinates from different GK zones are ~1000 km apart in X, so all
+    points are projected from WGS84 to one UTM32 grid instead.
+    Queries return row positions in the source frame/CSV.
+    """
+
+    def __init__(self, lats, lons, cell_size=None):
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        east, north = wgs84_to_utm32(lats, lons)
+
+        self.size = len(east)
+        if cell_size is None:
+            area = max(np.ptp(east) * np.ptp(north), 1.0) if self.size else 1.0
+            cell_size = max(np.sqrt(area * POINTS_PER_CELL / max(self.size, 1)), 1.0)
+        self.cell_size = float(cell_size)
+        self.x0 = float(east.min()) if self.size else 0.0
+        self.y0 = float(north.min()) if self.size else 0.0
+        cx, cy = self._cells(east, north)
+        self.ncx = int(cx.max()) + 1 if self.size else 1
+        self.ncy = int(cy.max()) + 1 if self.size else 1
+
+        keys = cy * self.ncx + cx
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order]
+        self.rows = order
+        self.east = east[order]
+        self.north = north[order]
+        self.lats = lats[order]
+        self.lons = lons[order]
+
+    @classmethod
+    def from_frame(cls, df, cell_size=None):
+        return cls(df['latitude'].to_numpy(dtype=float), df['longitude'].to_numpy(dtype=float), cell_size)
+
+    def _cells(self, east, north):
+        cx = np.floor((np.asarray(east) - self.x0) / self.cell_size).astype(np.int64)
+        cy = np.floor((np.asarray(north) - self.y0) / self.cell_size).astype(np.int64)
+        return cx, cy
+
+    def _candidates(self, xmin, ymin, xmax, ymax):
+        """Sorted positions of the points in all cells touching a UTM32 box"""
+        (cx0, cx1), (cy0, cy1) = self._cells([xmin, xmax], [ymin, ymax])
+        cx0, cx1 = max(cx0, 0), min(cx1, self.ncx - 1)
+        cy0, cy1 = max(cy0, 0), min(cy1, self.ncy - 1)
+        if cx0 > cx1 or cy0 > cy1:
+            return np.empty(0, dtype=np.int64)
+        row_keys = np.arange(cy0, cy1 + 1, dtype=np.int64) * self.ncx
+        lo = np.searchsorted(self.keys, row_keys + cx0, 'left')
+        hi = np.searchsorted(self.keys, row_keys + cx1, 'right')
+        if len(lo) == 1:
+            return np.arange(lo[0], hi[0])
+        return np.concatenate([np.arange(a, b) for a, b in zip(lo, hi) if b > a] or [np.empty(0, dtype=np.int64)])
+
+    def _radius_xy(self, x, y, meters):
+        """(sorted positions, distances) within meters of a UTM32 point"""
+        pos = self._candidates(x - meters, y - meters, x + meters, y + meters)
+        dist = np.hypot(self.east[pos] - x, self.north[pos] - y)
+        inside = dist <= meters
+        pos, dist = pos[inside], dist[inside]
+        order = np.argsort(dist, kind='stable')
+        return pos[order], dist[order]
+
+    def radius(self, lat, lon, meters):
+        """(rows, distances in m) of all points within `meters`, nearest first"""
+        x, y = wgs84_to_utm32(lat, lon)
+        return self.radius_xy(float(x), float(y), meters)
+
+    def radius_xy(self, x, y, meters):
+        """Like radius(), for a point already in UTM32 metres"""
+        pos, dist = self._radius_xy(x, y, meters)
+        return self.rows[pos], dist
+
+    def knn(self, lat, lon, k=1):
+        """(rows, distances in m) of the k nearest points"""
+        x, y = wgs84_to_utm32(lat, lon)
+        x, y = float(x), float(y)
+        k = min(k, self.size)
+        # Grow the search radius until it holds k points; all points within
+        # the radius are found, so the k nearest of them are the k nearest
+        meters = self.cell_size
+        span = np.hypot(self.ncx, self.ncy) * self.cell_size + np.hypot(x - self.x0, y - self.y0)
+        while True:
+            pos, dist = self._radius_xy(x, y, meters)
+            if len(pos) >= k or meters > span:
+                return self.rows[pos[:k]], dist[:k]
+            meters *= 2
+
+    def bbox(self, south, west, north, east):
+        """Rows of all points inside a WGS84 bounding box"""
+        xs, ys = wgs84_to_utm32([south, south, north, north], [west, east, west, east])
+        pos = self._candidates(xs.min(), ys.min(), xs.max(), ys.max())
+        lats, lons = self.lats[pos], self.lons[pos]
+        inside = (lats >= south) & (lats <= north) & (lons >= west) & (lons <= east)
+        return np.sort(self.rows[pos[inside]])
+
+    def save(self, path, csv_state=None):
+        """Write the index arrays (and the CSV's size/mtime) to an .npz file"""
+        tmp = Path(path).with_suffix('.tmp.npz')
+        np.savez(
+            tmp,
+            version=INDEX_VERSION,
+            grid=np.array([self.cell_size, self.x0, self.y0, self.ncx, self.ncy]),
+            csv_state=csv_state if csv_state is not None else np.zeros(2, dtype=np.int64),
+            keys=self.keys, rows=self.rows, east=self.east, north=self.north, lats=self.lats, lons=self.lons,
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            if int(data['version']) != INDEX_VERSION:
+                raise ValueError(f"Index {path} has version {int(data['version'])}, expected {INDEX_VERSION}")
+            index = cls.__new__(cls)
+            index.cell_size, index.x0, index.y0, ncx, ncy = data['grid'].tolist()
+            index.ncx, index.ncy = int(ncx), int(ncy)
+            for name in ('keys', 'rows', 'east', 'north', 'lats', 'lons'):
+                setattr(index, name, data[name])
+            index.size = len(index.rows)
+            index.csv_state = data['csv_state']
+        return index
+
+
+def build_csv_index(csv_path, cell_size=None):
+    """Build the index of a combined CSV and save it next to the CSV"""
+    points = pd.read_csv(csv_path, usecols=['latitude', 'longitude'])
+    index = BoreholeIndex.from_frame(points, cell_size)
+    index.save(index_path(csv_path), _csv_state(csv_path))
+    return index
+
+
+def load_csv_index(csv_path):
+    """Saved index of a combined CSV, rebuilt if missing or older than the CSV"""
+    path = index_path(csv_path)
+    try:
+        index = BoreholeIndex.load(path)
+        if np.array_equal(index.csv_state, _csv_state(csv_path)):
+            return index
+    except (OSError, ValueError, KeyError):
+        pass
+    return build_csv_index(csv_path)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Query the boreholes of a combined CSV")
+    parser.add_argument('csv', help="combined CSV written by overlay_4.py")
+    parser.add_argument('--near', nargs=2, type=float, metavar=('LAT', 'LON'), help="query point")
+    parser.add_argument('--radius', type=float, help="all boreholes within this many metres of --near")
+    parser.add_argument('-k', type=int, default=5, help="nearest boreholes to --near (default: 5)")
+    parser.add_argument('--bbox', nargs=4, type=float, metavar=('SOUTH', 'WEST', 'NORTH', 'EAST'))
+    parser.add_argument('--dataset', help="only query boreholes of this dataset")
+    args = parser.parse_args()
+
+    points = pd.read_csv(args.csv, dtype={'bohr_id': str, 'dataset': str})
+    if args.dataset:
+        # Index just this dataset so -k counts only its boreholes
+        points = points[points['dataset'] == args.dataset].reset_index(drop=True)
+        index = BoreholeIndex.from_frame(points)
+    else:
+        index = load_csv_index(args.csv)
+
+    distances = None
+    if args.bbox:
+        rows = index.bbox(*args.bbox)
+    elif args.near and args.radius is not None:
+        rows, distances = index.radius(*args.near, args.radius)
+    elif args.near:
+        rows, distances = index.knn(*args.near, args.k)
+    else:
+        parser.error("give --near LAT LON [--radius M | -k N] or --bbox")
+
+    records = points.iloc[rows].copy()
+    if distances is not None:
+        records['distance_m'] = np.round(distances, 1)
+    print(records.to_string(index=False) if len(records) else "No boreholes found")
@@ -0,0 +1,346 @@
+"""SQLite store of the Main_DB workbook's related sheets
+
+Every imported sheet becomes one table with its columns as in the sheet,
+plus a normalized well_id and, for sheets with coordinates, x / y and the
+WGS84 latitude / longitude. well_id is indexed; the coordinates are in an
+R-tree (a plain index if SQLite was built without the R-tree module), so
+cross-sheet questions and bbox queries are answered without the workbook:
+
+    python -m boreholes import Main_DB_RL5-Jens.xlsx
+    python -m boreholes.store boreholes.sqlite "SELECT * FROM svz JOIN wells_outcrop USING (well_id) LIMIT 5"
+
+Imports are incremental: a sheet is only re-imported when its XML part in
+the workbook changed (CRC and size from the zip directory, nothing is
+decompressed for that), and an import that finds nothing changed leaves
+the database file untouched.
+"""
+import re
+import sqlite3
+import sys
+import time
+import zipfile
+from pathlib import Path
+
+DEFAULT_DB = "boreholes.sqlite"
+
+# Files a dataset spec can name instead of a workbook
+STORE_SUFFIXES = ('.sqlite', '.sqlite3', '.db')
+
+# The related sheets of Main_DB_RL5-Jens.xlsx: well ID column and, where the
+# sheet has them filled in, the Gauß-Krüger coordinate columns
+# (Pumptestauswertung's Easting / Northing are empty: join it on well_id)
+MAIN_DB_SHEETS = {
+    "Wells_Outcrop": {"id": "Hole ID", "x": "E_EPSG31468", "y": "N_EPSG31468", "crs": "gk"},
+    "SVZ": {"id": "Hole ID"},
+    "Stratigraphy": {"id": "Hole ID"},
+    "Sample_data": {"id": "Hole ID", "x": "Easting", "y": "Northing", "crs": "gk"},
+    "Pumptestauswertung": {"id": "Hole_ID"},
+}
+
+# Columns the store adds to a sheet's own columns
+ADDED_COLUMNS = ('well_id', 'x', 'y', 'latitude', 'longitude')
+
+_QUERY = re.compile(r"^\s*(SELECT|WITH)\b", re.IGNORECASE)
+
+
+def is_store(path):
+    return Path(path).suffix.lower() in STORE_SUFFIXES
+
+
+def is_query(sheet):
+    """Whether a dataset's "sheet" is an SQL query rather than a sheet / table name"""
+    return isinstance(sheet, str) and _QUERY.match(sheet) is not None
+
+
+def quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def table_name(sheet):
+    """SQL table of a sheet: "Wells_Outcrop" -> wells_outcrop, "Sample data" -> sample_data"""
+    name = re.sub(r"\W+", "_", str(sheet).strip().lower()).strip("_")
+    return name if name and not name[0].isdigit() else f"sheet_{name}"
+
+
+def _well_id(value):
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    value = str(value).strip()
+    return value or None
+
+
+def _column_type(values):
+    """SQL type from a column's values: INTEGER, REAL or TEXT"""
+    kinds = {type(v) for v in values if v is not None}
+    if not kinds or kinds <= {int, bool}:
+        return "INTEGER"
+    if kinds <= {int, bool, float}:
+        return "REAL"
+    return "TEXT"
+
+
+def _to_float(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    try:
+        return float(str(value).replace(",", "."))
+    except (TypeError, ValueError):
+        return None
+
+
+class BoreholeStore:
+    """An SQLite database of imported sheets; use as a context manager
+
+    readonly opens an existing database without ever writing to it (what
+    map builds use).
+    """
+
+    def __init__(self, path=DEFAULT_DB, readonly=False):
+        self.path = Path(path)
+        if readonly:
+            if not self.path.exists():
+                raise FileNotFoundError(f"No such database: {self.path}")
+            self.conn = sqlite3.connect(self.path.resolve().as_uri() + "?mode=ro", uri=True)
+        else:
+            # Autocommit; every sheet import is one explicit transaction
+            self.conn = sqlite3.connect(self.path, isolation_level=None)
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS _sheets (sheet TEXT PRIMARY KEY, tbl TEXT NOT NULL, workbook TEXT, "
+                "fingerprint TEXT, rows INTEGER, id_col TEXT, x_col TEXT, y_col TEXT, crs TEXT, spatial TEXT, imported TEXT)"
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def sheets(self):
+        """{sheet: its _sheets row as a dict}"""
+        try:
+            cursor = self.conn.execute("SELECT * FROM _sheets ORDER BY sheet")
+        except sqlite3.OperationalError:  # not a store (no _sheets table)
+            return {}
+        names = [d[0] for d in cursor.description]
+        return {row[0]: dict(zip(names, row)) for row in cursor}
+
+    def table(self, sheet):
+        """SQL table of an imported sheet (a table name is accepted as well)"""
+        try:
+            row = self.conn.execute("SELECT tbl FROM _sheets WHERE sheet = ? OR tbl = ?", (sheet, sheet)).fetchone()
+        except sqlite3.OperationalError:  # not a store (no _sheets table)
+            row = None
+        if row is not None:
+            return row[0]
+        if self.conn.execute("SELECT 1 FROM sqlite_master WHERE type IN ('table', 'view') AND name = ?", (sheet,)).fetchone():
+            return sheet
+        raise ValueError(f"No sheet or table named {sheet!r} in {self.path}")
+
+    def import_workbook(self, excel_file, sheets=None, force=False, log=print):
+        """Import the sheets that changed since their last import
+
+        sheets: {sheet: {"id": column, "x": column, "y": column, "crs": ...}}
+        (names or letters; MAIN_DB_SHEETS by default) or a list of sheet
+        names, imported without well ID and coordinates.
+        Returns {sheet: rows imported, or None if it was unchanged}.
+        """
+        from boreholes.xlsx_xml import SharedStrings, sheet_members
+
+        if sheets is None:
+            sheets = MAIN_DB_SHEETS
+        elif not isinstance(sheets, dict):
+            sheets = {sheet: MAIN_DB_SHEETS.get(sheet, {}) for sheet in sheets}
+        workbook = str(Path(excel_file).resolve())
+        previous = self.sheets()
+
+        results = {}
+        with zipfile.ZipFile(excel_file) as zf:
+            members, shared = sheet_members(zf)
+            strings = None
+            for sheet, spec in sheets.items():
+                if sheet not in members:
+                    raise ValueError(f"Worksheet named '{sheet}' not found in {Path(excel_file).name}")
+                info = zf.getinfo(members[sheet])
+                fingerprint = f"{info.CRC:08x}:{info.file_size}:{sorted(spec.items())}"
+                known = previous.get(sheet)
+                if not force and known is not None and known['fingerprint'] == fingerprint and known['workbook'] == workbook:
+                    log(f"  ✓ {sheet}: unchanged ({known['rows']} rows in {known['tbl']})")
+                    results[sheet] = None
+                    continue
+                start = time.perf_counter()
+                if strings is None:
+                    strings = SharedStrings(zf, shared)
+                rows, located, spatial = self._import_sheet(zf, members[sheet], strings, sheet, spec, workbook, fingerprint)
+                log(f"  📥 {sheet}: {rows} rows -> {table_name(sheet)}"
+                    f"{f' ({spatial} on {located} located rows)' if spatial else ''} ({time.perf_counter() - start:.2f} s)")
+                if spatial and not located:
+                    log(f"  ⚠️  {sheet}: no row has usable {spec['x']} / {spec['y']} coordinates; "
+                        f"bbox queries on it will find nothing")
+                results[sheet] = rows
+        return results
+
+    def _import_sheet(self, zf, member, strings, sheet, spec, workbook, fingerprint):
+        """Replace one sheet's table in a single transaction
+
+        Rows are kept as pd.read_excel reads them, blank rows included.
+        Returns (rows, rows with latitude / longitude, spatial index kind).
+        """
+        from boreholes.loader import column_position
+        from boreholes.streaming import sheet_header
+        from boreholes.xlsx_xml import read_sheet_rows
+
+        values, positions, rows = read_sheet_rows(zf, member, strings)
+        header = sheet_header(values + [None] * (len(positions) - len(values)))
+        names = [str(name) for name in header]
+        clashes = [name for name in names if name.lower() in ADDED_COLUMNS]
+        if clashes:
+            raise ValueError(f"{sheet}: column(s) {', '.join(clashes)} clash with the store's own columns")
+
+        table = table_name(sheet)
+        columns = [f"{quote(name)} {_column_type(row[j] for row in rows)}" for j, name in enumerate(names)]
+        added = []
+        if spec.get('id') is not None:
+            j = column_position(header, spec['id'])
+            added.append(('well_id', "TEXT", [_well_id(row[j]) for row in rows]))
+        has_xy = spec.get('x') is not None and spec.get('y') is not None
+        located = 0
+        if has_xy:
+            from boreholes.projection import to_wgs84
+
+            jx, jy = column_position(header, spec['x']), column_position(header, spec['y'])
+            x = [_to_float(row[jx]) for row in rows]
+            y = [_to_float(row[jy]) for row in rows]
+            lat, lon = [None] * len(rows), [None] * len(rows)
+            valid = [i for i in range(len(rows)) if x[i] is not None and y[i] is not None]
+            if valid:
+                lons, lats, _ = to_wgs84([x[i] for i in valid], [y[i] for i in valid], spec.get('crs', 'gk'))
+                for i, lo, la in zip(valid, lons, lats):
+                    # Points pyproj can't place come back as inf
+                    if abs(la) <= 90 and abs(lo) <= 180:
+                        lat[i], lon[i] = float(la), float(lo)
+                        located += 1
+            added += [('x', "REAL", x), ('y', "REAL", y), ('latitude', "REAL", lat), ('longitude', "REAL", lon)]
+        columns += [f"{name} {kind}" for name, kind, _ in added]
+        if added:
+            records = [list(row) + list(more) for row, more in zip(rows, zip(*(data for _, _, data in added)))]
+        else:
+            records = rows
+
+        conn = self.conn
+        conn.execute("BEGIN")
+        try:
+            conn.execute(f"DROP TABLE IF EXISTS {quote(table + '_rtree')}")
+            conn.execute(f"DROP TABLE IF EXISTS {quote(table)}")
+            conn.execute(f"CREATE TABLE {quote(table)} ({', '.join(columns)})")
+            conn.executemany(f"INSERT INTO {quote(table)} VALUES ({', '.join('?' * (len(names) + len(added)))})", records)
+            if spec.get('id') is not None:
+                conn.execute(f"CREATE INDEX {quote(table + '_well_id')} ON {quote(table)} (well_id)")
+            spatial = None
+            if has_xy:
+                spatial = self._index_coordinates(table)
+            conn.execute(
+                "INSERT OR REPLACE INTO _sheets VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (sheet, table, workbook, fingerprint, len(rows), spec.get('id'), spec.get('x'), spec.get('y'),
+                 spec.get('crs', 'gk') if has_xy else None, spatial, time.strftime('%Y-%m-%dT%H:%M:%S'))
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return len(rows), located, spatial
+
+    def _index_coordinates(self, table):
+        """R-tree over latitude / longitude, or a plain index without the R-tree module"""
+        conn = self.conn
+        rtree = quote(table + '_rtree')
+        try:
+            conn.execute(f"CREATE VIRTUAL TABLE {rtree} USING rtree(id, min_lat, max_lat, min_lon, max_lon)")
+        except sqlite3.OperationalError:
+            conn.execute(f"CREATE INDEX {quote(table + '_lat_lon')} ON {quote(table)} (latitude, longitude)")
+            return "index"
+        conn.execute(f"INSERT INTO {rtree} SELECT rowid, latitude, latitude, longitude, longitude "
+                      f"FROM {quote(table)} WHERE latitude IS NOT NULL")
+        return "rtree"
+
+    def query(self, sql, params=()):
+        """(column names, rows) of any SQL statement"""
+        cursor = self.conn.execute(sql, params)
+        return [d[0] for d in cursor.description or ()], cursor.fetchall()
+
+    def frame(self, sql, params=()):
+        """An SQL query's result as a DataFrame"""
+        import pandas as pd
+
+        names, rows = self.query(sql, params)
+        return pd.DataFrame.from_records(rows, columns=names)
+
+    def bbox_sql(self, sheet, columns="t.*"):
+        """SQL selecting the rows of a sheet with coordinates inside
+        :south, :west, :north, :east (named parameters)"""
+        table = self.table(sheet)
+        spatial = self.conn.execute("SELECT spatial FROM _sheets WHERE tbl = ?", (table,)).fetchone()
+        if spatial is None or spatial[0] is None:
+            raise ValueError(f"{sheet} has no coordinates; join it to a sheet that has (e.g. USING (well_id))")
+        inside = "t.latitude BETWEEN :south AND :north AND t.longitude BETWEEN :west AND :east"
+        if spatial[0] == "rtree":
+            # The R-tree holds 32-bit floats: it narrows the rows, the last test is exact
+            return (f"SELECT {columns} FROM {quote(table)} AS t JOIN {quote(table + '_rtree')} AS r ON r.id = t.rowid "
+                    f"WHERE r.min_lat <= :north AND r.max_lat >= :south AND r.min_lon <= :east AND r.max_lon >= :west "
+                    f"AND {inside}")
+        return f"SELECT {columns} FROM {quote(table)} AS t WHERE {inside}"
+
+    def bbox(self, sheet, south, west, north, east, columns="t.*"):
+        """(column names, rows) of a sheet inside a lat/lon box"""
+        return self.query(self.bbox_sql(sheet, columns), {'south': south, 'west': west, 'north': north, 'east': east})
+
+
+def read_store_sheets(db_file, sheet_columns):
+    """Store counterpart of loader.read_workbook_sheets
+
+    sheet_columns: {sheet, table or SQL query: columns (names or letters)
+    or None for all}. Column letters count in the sheet's own column
+    order (the store's added columns come last), or the query's.
+    Returns ({key: (df, header) or the Exception}, bytes read = 0).
+    """
+    import pandas as pd
+
+    from boreholes.loader import column_position
+
+    frames = {}
+    with BoreholeStore(db_file, readonly=True) as store:
+        for key, columns in sheet_columns.items():
+            try:
+                source = f"({key})" if is_query(key) else quote(store.table(key))
+                header = pd.Index(store.query(f"SELECT * FROM {source} LIMIT 0")[0])
+                if columns is None:
+                    names, rows = store.query(f"SELECT * FROM {source}")
+                else:
+                    positions = sorted({column_position(header, c) for c in columns})
+                    names, rows = store.query(f"SELECT {', '.join(quote(header[p]) for p in positions)} FROM {source}")
+                frames[key] = (pd.DataFrame.from_records(rows, columns=names), header)
+            except Exception as e:
+                frames[key] = e
+    return frames, 0
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("usage: python -m boreholes.store DATABASE [SQL]   (without SQL: list the imported sheets)")
+        sys.exit(2)
+    with BoreholeStore(sys.argv[1], readonly=True) as store:
+        if len(sys.argv) < 3:
+            for sheet, row in store.sheets().items():
+                print(f"{sheet:<20} {row['tbl']:<20} {row['rows']:>7} rows  {row['spatial'] or '':<6} {row['imported']}")
+            sys.exit(0)
+        start = time.perf_counter()
+        names, rows = store.query(sys.argv[2])
+        seconds = time.perf_counter() - start
+    print("\t".join(names))
+    for row in rows[:50]:
+        print("\t".join("" if v is None else str(v) for v in row))
+    print(f"... {len(rows)} rows ({seconds * 1000:.1f} ms)")
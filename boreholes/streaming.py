@@ -0,0 +1,57 @@
+import operator
+
+import pandas as pd
+
+# Rows per chunk when a sheet is streamed instead of read whole
+CHUNK_ROWS = 50000
+
+
+def sheet_header(values):
+    """Column names for a sheet's first row, named the way pd.read_excel names them
+
+    Empty cells become "Unnamed: <i>", repeated names get ".1", ".2", ...
+    """
+    names, seen = [], {}
+    for i, value in enumerate(values):
+        name = f"Unnamed: {i}" if value is None else value
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+            while name in seen:
+                seen[name] = 0
+                name = f"{name}.1"
+        seen.setdefault(name, 0)
+        names.append(name)
+    return pd.Index(names)
+
+
+def iter_sheet_chunks(ws, positions=None, chunk_rows=CHUNK_ROWS):
+    """Yield DataFrames of at most chunk_rows rows from a read-only worksheet
+
+    The first sheet row is the header. Only the columns at `positions`
+    (0-based, None for all) are kept, so a chunk never holds more than the
+    needed cells.
+    """
+    rows = ws.iter_rows(values_only=True)
+    header = sheet_header(next(rows, ()))
+    if positions is None:
+        positions = list(range(len(header)))
+    columns = header[positions]
+    width = max(positions) + 1 if positions else 0
+    pick = operator.itemgetter(*positions) if len(positions) > 1 else (lambda row: (row[positions[0]],))
+
+    buffer = []
+    for row in rows:
+        if len(row) < width:
+            row = tuple(row) + (None,) * (width - len(row))
+        buffer.append(pick(row))
+        if len(buffer) >= chunk_rows:
+            yield pd.DataFrame.from_records(buffer, columns=columns)
+            buffer = []
+    if buffer:
+        yield pd.DataFrame.from_records(buffer, columns=columns)
+
+
+def read_header(ws):
+    """Header of a read-only worksheet (first row only)"""
+    return sheet_header(next(ws.iter_rows(max_row=1, values_only=True), ()))
@@ -0,0 +1,218 @@
+import uuid
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Columns every loaded dataset has after cleaning and projection
+CORE_COLUMNS = ['bohr_id', 'X', 'Y', 'latitude', 'longitude', 'source_epsg']
+
+_CORE_DTYPES = {'X': np.float64, 'Y': np.float64, 'latitude': np.float64, 'longitude': np.float64, 'source_epsg': np.int32}
+
+# Text columns with at most this share of distinct values are stored as categoricals
+CATEGORY_MAX_UNIQUE = 0.5
+
+
+def _repetitive(values):
+    return len(values) > 0 and values.nunique(dropna=True) <= CATEGORY_MAX_UNIQUE * len(values)
+
+
+def compact_ids(ids):
+    """Bohr IDs as a categorical if they repeat, else as one Arrow string buffer
+
+    Without pyarrow, mostly distinct IDs stay Python strings.
+    """
+    ids = ids.astype(str).reset_index(drop=True)
+    if _repetitive(ids):
+        return ids.astype('category')
+    try:
+        return ids.astype('string[pyarrow]')
+    except ImportError:
+        return ids
+
+
+def compact_core(df, dataset=None):
+    """The core columns of a loaded frame (those it has) with compact dtypes
+
+    IDs see compact_ids(); the coordinates stay float64: GK eastings need
+    more digits than float32 holds and the popups / CSV show latitude and
+    longitude to 6 decimals.
+    """
+    core = pd.DataFrame(index=pd.RangeIndex(len(df)))
+    if 'bohr_id' in df:
+        core['bohr_id'] = compact_ids(df['bohr_id'])
+    for col, dtype in _CORE_DTYPES.items():
+        if col in df:
+            core[col] = df[col].to_numpy(dtype=dtype)
+    if dataset is not None:
+        core['dataset'] = pd.Categorical([dataset] * len(df)) if len(df) else pd.Categorical([], categories=[dataset])
+    return core
+
+
+def compact_attributes(df):
+    """Attribute columns with repetitive text stored as categoricals
+
+    Numbers are left alone: their str() is what the popups show.
+    """
+    out = df.reset_index(drop=True)
+    for col in out.columns:
+        values = out[col]
+        if values.dtype == object and _repetitive(values):
+            out[col] = values.astype('category')
+    return out
+
+
+class BoreholeTable:
+    """One loaded dataset held compactly: typed core columns, attributes aside
+
+    The core (bohr_id, X, Y, latitude, longitude, source_epsg and the
+    dataset label) lives in memory with compact dtypes. The remaining
+    sheet columns, which the popups need but nothing else does, are
+    either kept as a compacted frame or, with a spill_dir, written to a
+    columnar file and read back column by column when a layer asks for
+    them. `columns` and `len()` behave like the frame's, so helpers such
+    as popup_columns() accept a table directly. Columns computed after
+    loading (with_columns()) are held in memory next to the stored ones.
+    """
+
+    def __init__(self, core, columns, attributes=None, attribute_path=None, rows=None, owner=True, extra=None):
+        self.core = core
+        self.columns = list(columns)
+        self._attributes = attributes
+        self.attribute_path = attribute_path
+        # Row positions into the spill file (None: all of them); only the
+        # owner deletes the file, views from take() share it
+        self.rows = rows
+        self.owner = owner
+        # Attribute columns added by with_columns(), one row per table row
+        self._extra = extra
+
+    @classmethod
+    def from_frame(cls, df, dataset=None, spill_dir=None):
+        """Build a table from a cleaned, projected frame
+
+        spill_dir: write the attribute columns there (Parquet, pickle if
+        pyarrow can't store them) instead of keeping them in memory.
+        """
+        core = compact_core(df, dataset)
+        attributes = compact_attributes(df[[c for c in df.columns if c not in CORE_COLUMNS]])
+        if spill_dir is None or attributes.shape[1] == 0:
+            return cls(core, df.columns, attributes=attributes)
+
+        spill_dir = Path(spill_dir)
+        spill_dir.mkdir(parents=True, exist_ok=True)
+        path = spill_dir / f"{uuid.uuid4().hex}.parquet"
+        try:
+            # Parquet needs string column names (see ExcelCache.put)
+            if not all(isinstance(c, str) for c in attributes.columns):
+                raise TypeError("non-string column names")
+            attributes.to_parquet(path)
+        except Exception:
+            path.unlink(missing_ok=True)
+            path = path.with_suffix('.pkl')
+            attributes.to_pickle(path)
+        return cls(core, df.columns, attribute_path=str(path))
+
+    def __len__(self):
+        return len(self.core)
+
+    @property
+    def attribute_columns(self):
+        return [c for c in self.columns if c not in CORE_COLUMNS]
+
+    def attributes(self, columns=None):
+        """Attribute columns (all when None), read from the spill file if there is one"""
+        columns = self.attribute_columns if columns is None else [c for c in columns if c not in CORE_COLUMNS]
+        if self._extra is None:
+            return self._stored_attributes(columns)
+        added = [c for c in columns if c in self._extra.columns]
+        stored = self._stored_attributes([c for c in columns if c not in added])
+        return pd.concat([stored.set_axis(self._extra.index), self._extra[added]], axis=1)[columns]
+
+    def _stored_attributes(self, columns):
+        if self._attributes is not None:
+            return self._attributes[columns]
+        if not columns:
+            return pd.DataFrame(index=self.core.index)
+        if self.attribute_path.endswith('.parquet'):
+            attributes = pd.read_parquet(self.attribute_path, columns=columns)
+        else:
+            attributes = pd.read_pickle(self.attribute_path)[columns]
+        if self.rows is not None:
+            attributes = attributes.iloc[self.rows].reset_index(drop=True)
+        return attributes
+
+    def frame(self, columns=None):
+        """The dataset as a DataFrame: core columns plus the given attributes
+
+        Columns keep the sheet's order. Without `columns` every attribute
+        is loaded, which is the original loaded frame with compact dtypes.
+        """
+        attributes = self.attributes(columns)
+        core = self.core.drop(columns='dataset', errors='ignore')
+        df = pd.concat([core, attributes.set_axis(core.index)], axis=1)
+        return df[[c for c in self.columns if c in df.columns]]
+
+    def nbytes(self):
+        """Bytes held in memory (attributes in a spill file count as 0)"""
+        total = int(self.core.memory_usage(index=True, deep=True).sum())
+        for frame in (self._attributes, self._extra):
+            if frame is not None:
+                total += int(frame.memory_usage(index=False, deep=True).sum())
+        return total
+
+    def take(self, rows=None):
+        """A table of the given row positions that shares this one's data
+
+        rows=None gives every row without copying the core. The returned
+        table reads its attributes from the same spill file, and its
+        release() leaves that file alone.
+        """
+        if rows is None:
+            return BoreholeTable(self.core, self.columns, attributes=self._attributes,
+                                 attribute_path=self.attribute_path, rows=self.rows, owner=False, extra=self._extra)
+        rows = np.asarray(rows, dtype=np.intp)
+        core = self.core.iloc[rows].reset_index(drop=True)
+        extra = None if self._extra is None else self._extra.iloc[rows].reset_index(drop=True)
+        if self._attributes is not None:
+            return BoreholeTable(core, self.columns, attributes=self._attributes.iloc[rows].reset_index(drop=True),
+                                 owner=False, extra=extra)
+        return BoreholeTable(core, self.columns, attribute_path=self.attribute_path,
+                             rows=rows if self.rows is None else self.rows[rows], owner=False, extra=extra)
+
+    def with_columns(self, columns):
+        """A view of this table (see take()) plus in-memory attribute columns
+
+        columns: a frame with one row per table row. Its columns come after
+        the sheet's and replace stored columns of the same name.
+        """
+        view = self.take()
+        columns = columns.reset_index(drop=True)
+        if view._extra is not None:
+            columns = pd.concat([view._extra.drop(columns=columns.columns, errors='ignore'), columns], axis=1)
+        view._extra = columns
+        view.columns = self.columns + [c for c in columns.columns if c not in self.columns]
+        return view
+
+    def within(self, bbox):
+        """Rows inside bbox = [south, west, north, east] (degrees), as a view from take()"""
+        south, west, north, east = bbox
+        lat = self.core['latitude'].to_numpy()
+        lon = self.core['longitude'].to_numpy()
+        return self.take(np.flatnonzero((lat >= south) & (lat <= north) & (lon >= west) & (lon <= east)))
+
+    def release(self):
+        """Delete the spill file, if any and if this table owns it"""
+        if self.attribute_path is not None and self.owner:
+            Path(self.attribute_path).unlink(missing_ok=True)
+
+
+def concat_tables(tables):
+    """Core columns of several tables as one frame with a categorical dataset label"""
+    from pandas.api.types import union_categoricals
+
+    cores = [t.core for t in tables]
+    combined = pd.concat([c.drop(columns='dataset', errors='ignore') for c in cores], ignore_index=True)
+    if cores and all('dataset' in c for c in cores):
+        combined['dataset'] = union_categoricals([c['dataset'] for c in cores])
+    return combined
@@ -0,0 +1,188 @@
+import json
+import math
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Bump when the tile layout changes
+TILES_VERSION = 2
+
+TILE_MIN_ZOOM = 5
+TILE_MAX_ZOOM = 12
+
+# Below TILE_MAX_ZOOM each tile keeps at most one point per dataset and cell
+# of a THIN_CELLS x THIN_CELLS grid (4 px cells on a 256 px tile)
+THIN_CELLS = 64
+
+# Tiles are JSONP scripts so the map can load them with <script> tags,
+# which (unlike fetch/XHR) also works for a page opened from file://
+TILE_CALLBACK = "bohrTile"
+
+CSV_DTYPES = {'bohr_id': str, 'dataset': str}
+
+
+def tile_pixels(lat, lon, zoom):
+    """Web-Mercator pixel coordinates (256 px tiles) of WGS84 points"""
+    lat = np.clip(np.asarray(lat, dtype=float), -85.05112878, 85.05112878)
+    scale = 256.0 * 2 ** zoom
+    px = (np.asarray(lon, dtype=float) + 180.0) / 360.0 * scale
+    sin = np.sin(np.radians(lat))
+    py = (0.5 - np.log((1 + sin) / (1 - sin)) / (4 * math.pi)) * scale
+    limit = scale - 1e-9
+    return np.clip(px, 0, limit), np.clip(py, 0, limit)
+
+
+def thin_points(px, py, groups, cell_px):
+    """Indices of the first point per (group, cell) of cell_px pixels, in input order"""
+    cx = (px // cell_px).astype(np.int64)
+    cy = (py // cell_px).astype(np.int64)
+    keys = np.stack([groups, cx, cy], axis=1)
+    _, first = np.unique(keys, axis=0, return_index=True)
+    return np.sort(first)
+
+
+def read_points_csv(csv_path):
+    """Combined CSV as written by overlay_4.py, ids kept as text"""
+    return pd.read_csv(csv_path, dtype=CSV_DTYPES, keep_default_na=False, na_values={'X': [''], 'Y': ['']})
+
+
+def dataset_rows(points):
+    """Row of each point within its dataset, in CSV order (popup shards are indexed by it)"""
+    return points.groupby('dataset', sort=False).cumcount().to_numpy()
+
+
+def _tile_payload(points, rows, ds_rows):
+    sub = points.iloc[rows]
+    names, ds = np.unique(sub['dataset'].to_numpy(dtype=str), return_inverse=True)
+    return {
+        'datasets': names.tolist(),
+        'ds': ds.tolist(),
+        'row': ds_rows[rows].tolist(),
+        'id': sub['bohr_id'].tolist(),
+        'lat': np.round(sub['latitude'].to_numpy(dtype=float), 6).tolist(),
+        'lon': np.round(sub['longitude'].to_numpy(dtype=float), 6).tolist(),
+        'x': np.round(sub['X'].to_numpy(dtype=float), 1).tolist(),
+        'y': np.round(sub['Y'].to_numpy(dtype=float), 1).tolist(),
+    }
+
+
+def _tile_script(payload):
+    text = json.dumps(payload, separators=(',', ':'), ensure_ascii=False)
+    return f"{TILE_CALLBACK}({text});\n"
+
+
+def read_tile(path):
+    """Payload of one written tile file"""
+    text = Path(path).read_text(encoding='utf-8').strip()
+    prefix = TILE_CALLBACK + "("
+    if not (text.startswith(prefix) and text.endswith(");")):
+        raise ValueError(f"Not a tile script: {path}")
+    return json.loads(text[len(prefix):-2])
+
+
+def write_tile_pyramid(points, out_dir, min_zoom=TILE_MIN_ZOOM, max_zoom=TILE_MAX_ZOOM, cells=THIN_CELLS):
+    """Write points (bohr_id, X, Y, latitude, longitude, dataset) as {z}/{x}/{y}.js tiles
+
+    max_zoom tiles hold every point; lower zooms are thinned per dataset to
+    one point per grid cell. Each point carries its row within its dataset
+    (dataset_rows). Returns the metadata also saved as tiles.json.
+    """
+    out_dir = Path(out_dir)
+    if out_dir.exists():
+        shutil.rmtree(out_dir)
+    out_dir.mkdir(parents=True)
+
+    points = points.reset_index(drop=True)
+    lat = points['latitude'].to_numpy(dtype=float)
+    lon = points['longitude'].to_numpy(dtype=float)
+    _, groups = np.unique(points['dataset'].to_numpy(dtype=str), return_inverse=True)
+    ds_rows = dataset_rows(points)
+
+    zooms = {}
+    for z in range(min_zoom, max_zoom + 1):
+        px, py = tile_pixels(lat, lon, z)
+        keep = np.arange(len(points)) if z == max_zoom else thin_points(px, py, groups, 256.0 / cells)
+        tx = (px[keep] // 256).astype(np.int64)
+        ty = (py[keep] // 256).astype(np.int64)
+
+        # Group the kept points by tile, keeping input order inside each tile
+        order = np.lexsort((keep, ty, tx))
+        keep, tx, ty = keep[order], tx[order], ty[order]
+        starts = np.flatnonzero(np.r_[True, (tx[1:] != tx[:-1]) | (ty[1:] != ty[:-1])])
+        ends = np.r_[starts[1:], len(keep)]
+
+        for start, end in zip(starts, ends):
+            tile = out_dir / str(z) / str(tx[start]) / f"{ty[start]}.js"
+            tile.parent.mkdir(parents=True, exist_ok=True)
+            tile.write_text(_tile_script(_tile_payload(points, keep[start:end], ds_rows)), encoding='utf-8')
+        zooms[z] = {'tiles': len(starts), 'points': int(len(keep))}
+
+    meta = {
+        'version': TILES_VERSION,
+        'min_zoom': min_zoom,
+        'max_zoom': max_zoom,
+        'cells': cells,
+        'points': int(len(points)),
+        'bounds': [float(lat.min()), float(lon.min()), float(lat.max()), float(lon.max())] if len(points) else None,
+        'datasets': pd.unique(points['dataset']).tolist(),
+        'zooms': zooms,
+    }
+    tmp = out_dir / "tiles.json.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=1)
+    os.replace(tmp, out_dir / "tiles.json")
+    return meta
+
+
+def verify_tiles(tile_dir, csv_path):
+    """Compare a tile pyramid with the combined CSV; returns a list of problems
+
+    Every CSV row must appear exactly once in the max_zoom tiles (same id,
+    dataset, row within the dataset and rounded coordinates), every tile must contain only points
+    inside its bounds, and lower zooms must hold a thinned subset.
+    """
+    tile_dir = Path(tile_dir)
+    problems = []
+    with open(tile_dir / "tiles.json", encoding='utf-8') as f:
+        meta = json.load(f)
+
+    points = read_points_csv(csv_path)
+    expected = sorted(zip(
+        points['dataset'], dataset_rows(points).tolist(), points['bohr_id'],
+        np.round(points['latitude'].to_numpy(dtype=float), 6).tolist(),
+        np.round(points['longitude'].to_numpy(dtype=float), 6).tolist(),
+        np.round(points['X'].to_numpy(dtype=float), 1).tolist(),
+        np.round(points['Y'].to_numpy(dtype=float), 1).tolist(),
+    ), key=repr)
+    expected_set = set(expected)
+
+    for z in range(meta['min_zoom'], meta['max_zoom'] + 1):
+        found = []
+        for path in sorted((tile_dir / str(z)).glob("*/*.js")):
+            tx, ty = int(path.parent.name), int(path.stem)
+            tile = read_tile(path)
+            px, py = tile_pixels(tile['lat'], tile['lon'], z)
+            outside = np.count_nonzero((px // 256 != tx) | (py // 256 != ty))
+            if outside:
+                problems.append(f"{z}/{tx}/{ty}: {outside} points outside the tile")
+            found.extend(zip(
+                [tile['datasets'][i] for i in tile['ds']], tile['row'], tile['id'],
+                tile['lat'], tile['lon'], tile['x'], tile['y'],
+            ))
+
+        if z == meta['max_zoom']:
+            if sorted(found, key=repr) != expected:
+                problems.append(f"zoom {z}: {len(found)} points in tiles, {len(expected)} rows in the CSV "
+                                f"or their values differ")
+        else:
+            extra = [p for p in found if p not in expected_set]
+            if extra:
+                problems.append(f"zoom {z}: {len(extra)} points not in the CSV, e.g. {extra[0]}")
+            if len(found) > len(expected):
+                problems.append(f"zoom {z}: more points ({len(found)}) than the CSV ({len(expected)})")
+        if meta['zooms'][str(z)]['points'] != len(found):
+            problems.append(f"zoom {z}: tiles.json lists {meta['zooms'][str(z)]['points']} points, found {len(found)}")
+    return problems
@@ -0,0 +1,482 @@
+"""Read selected columns of .xlsx sheets straight from the sheet XML
+
+pd.read_excel (openpyxl) builds a cell object with its style for every cell
+of a sheet. This reader inflates the sheet XML window by window and pulls
+only the requested columns' cells out of it with one regular expression
+(formulas and the other columns are skipped at C speed), and resolves
+shared strings lazily. Sheets whose XML doesn't look like Excel's own are
+streamed through expat instead.
+
+Differences from pd.read_excel: cell styles are not read, so date cells
+come back as Excel serial numbers; error cells keep their text ("#N/A").
+Rows are kept like pandas does: a row with values only outside the
+requested columns, or a blank row between data rows, is an all-None row;
+blank rows after the last value are dropped.
+
+Run from the repo root:
+    python -m boreholes.xlsx_xml Main_DB_RL5-Jens.xlsx Reservoirrekonstruktion A B C
+"""
+import html
+import posixpath
+import re
+import sys
+import zipfile
+from xml.etree import ElementTree as ET
+
+_MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+# Tag names as expat reports them with namespace_separator="}"
+_EXPAT_MAIN = _MAIN[1:]
+_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_PKG_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+TEXT, RUN, SI = (_MAIN + t for t in ("t", "r", "si"))
+ROW, CELL, VALUE, INLINE_TEXT = (_EXPAT_MAIN + t for t in ("row", "c", "v", "t"))
+
+_ESCAPE = re.compile(r"_x([0-9A-Fa-f]{4})_")
+_DIGITS = "0123456789"
+
+# Inflated sheet XML the regex scanner works on at a time
+SCAN_WINDOW_BYTES = 8 * 1024 * 1024
+# Shared string tables up to this size are read whole
+STRINGS_SCAN_MAX_BYTES = 16 * 1024 * 1024
+
+# A cell as Excel writes it: <c r="B7" s="1" t="s"><f>..</f><v>12</v></c> or <c r="B7" s="1"/>
+_CELL = rb'<c r="(%s)([0-9]+)"([^>]*?)(?:/>|>(.*?)</c>)'
+_ANY_CELL = re.compile(_CELL % rb"[A-Z]+", re.S)
+_TYPE = re.compile(rb' t="([A-Za-z]+)"')
+_V = re.compile(rb"<v>(.*?)</v>", re.S)
+_T = re.compile(rb"<t(?: [^>]*)?>(.*?)</t>", re.S)
+_SI = re.compile(rb"<si>(.*?)</si>", re.S)
+_PHONETIC = re.compile(rb"<rPh\b.*?</rPh>", re.S)
+_OTHER_CELL = re.compile(rb'<c (?!r=")')
+_ROW_NUM = re.compile(rb'<row\b[^>]*? r="([0-9]+)"')
+
+
+def column_index(letters):
+    """0-based index of an Excel column: A -> 0, Z -> 25, AA -> 26"""
+    index = 0
+    for ch in letters.upper():
+        index = index * 26 + ord(ch) - 64
+    return index - 1
+
+
+def column_letters(index):
+    """Excel column of a 0-based index: 0 -> A, 26 -> AA"""
+    letters = ""
+    index += 1
+    while index:
+        index, rest = divmod(index - 1, 26)
+        letters = chr(65 + rest) + letters
+    return letters
+
+
+def _unescape(text):
+    # Excel writes control characters as _xHHHH_
+    return _ESCAPE.sub(lambda m: chr(int(m.group(1), 16)), text) if "_x" in text else text
+
+
+def _rich_text(elem):
+    """Text of an <si> / <is> element: its <t>, or all runs joined (phonetic runs skipped)"""
+    t = elem.find(TEXT)
+    if t is not None:
+        return _unescape(t.text or "")
+    return _unescape("".join(run.findtext(TEXT) or "" for run in elem.iterfind(RUN)))
+
+
+class SharedStrings:
+    """The workbook's shared string table
+
+    Tables up to STRINGS_SCAN_MAX_BYTES are split with one regular
+    expression; larger ones are parsed only as far as they are indexed.
+    """
+
+    def __init__(self, zf, member):
+        self._strings = []
+        self._events = None
+        if member is None:
+            return
+        if zf.getinfo(member).file_size <= STRINGS_SCAN_MAX_BYTES:
+            data = zf.read(member)
+            if data.count(b"<si>") == data.count(b"<si"):
+                self._strings = [_si_text(si) for si in _SI.findall(data)]
+                return
+        self._events = ET.iterparse(zf.open(member), events=("end",))
+
+    def __getitem__(self, index):
+        while index >= len(self._strings) and self._events is not None:
+            self._advance()
+        return self._strings[index]
+
+    def _advance(self):
+        for _, elem in self._events:
+            if elem.tag == SI:
+                self._strings.append(_rich_text(elem))
+                elem.clear()
+                return
+        self._events = None
+
+
+def sheet_members(zf):
+    """{sheet name: zip member of its XML} and the shared strings member (or None)"""
+    workbook = ET.fromstring(zf.read("xl/workbook.xml"))
+    rels = ET.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+    targets, shared = {}, None
+    for rel in rels.iter(_PKG_REL + "Relationship"):
+        target = rel.get("Target")
+        target = target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join("xl", target))
+        targets[rel.get("Id")] = target
+        if rel.get("Type", "").endswith("/sharedStrings"):
+            shared = target
+    sheets = {sheet.get("name"): targets[sheet.get(_REL + "id")] for sheet in workbook.iter(_MAIN + "sheet")}
+    return sheets, shared
+
+
+def _number(text):
+    # Same rule as openpyxl: integers unless the text has a point or exponent
+    if "." in text or "E" in text or "e" in text:
+        return float(text)
+    return int(text)
+
+
+def _value(t, parts, strings, pending, row_pos, col_pos):
+    """Python value of a cell from its type and text parts; shared strings are
+    queued in pending unless row_pos is None (the header row)"""
+    text = None if parts is None else "".join(parts)
+    if t == "inlineStr":
+        return None if text is None else _unescape(text)
+    if not text:
+        return None
+    if t is None or t == "n":
+        return _number(text)
+    if t == "s":
+        if row_pos is None:
+            return strings[int(text)]
+        pending.append((row_pos, col_pos, int(text)))
+        return None
+    if t == "b":
+        return text == "1"
+    if t == "str":
+        return _unescape(text)
+    return text  # "e" (error) and "d" (ISO date)
+
+
+def _si_text(si):
+    """Text of one <si> element's content"""
+    if si.startswith(b"<t>") and si.find(b"<", 3) == len(si) - 4:
+        text = si[3:-4].decode("utf-8")  # plain <t>text</t>, most strings
+        return _unescape(html.unescape(text) if "&" in text else text)
+    return _unescape((_cell_text("inlineStr", si) or [""])[0])
+
+
+def _cell_text(t, content):
+    """Text parts of a matched cell's content, as _value expects them"""
+    if not content:
+        return None
+    if t == "inlineStr":
+        if b"<rPh" in content:
+            content = _PHONETIC.sub(b"", content)
+        texts = _T.findall(content)
+        if not texts:
+            return None
+        raw = b"".join(texts)
+    elif content.startswith(b"<v>"):
+        raw = content[3:content.find(b"</v>")]
+    else:
+        m = _V.search(content)  # after a formula
+        if m is None:
+            return None
+        raw = m.group(1)
+    text = raw.decode("utf-8")
+    return [html.unescape(text) if "&" in text else text]
+
+
+def _cell_type(attrs):
+    if b't="' not in attrs:
+        return None
+    if attrs.endswith(b' t="s"'):
+        return "s"
+    return _TYPE.search(attrs).group(1).decode("ascii")
+
+
+def _scan_sheet_rows(fh, strings, columns):
+    """read_sheet_rows on the sheet XML stream fh with regular expressions
+
+    The XML is inflated SCAN_WINDOW_BYTES at a time; each window is cut
+    before its last <row and the rest carried into the next, so cells are
+    never split and the sheet is never held whole.
+    Returns None if the XML is not laid out the way the scanner expects
+    (every cell as <c r="..."> and rows numbered from 1).
+    """
+    # Writers lay out every cell of a sheet alike: check the first MB,
+    # then read on until the header row is complete
+    data = fh.read(1 << 20)
+    if _OTHER_CELL.search(data):
+        return None
+    while True:
+        first = data.find(b"<row ")
+        # The header row ends at its </row>, or at the next row if it is <row .../>
+        end = data.find(b"</row>", first) if first >= 0 else -1
+        following = data.find(b"<row ", first + 1) if first >= 0 else -1
+        if 0 <= following < end or end < 0 <= following:
+            end = following
+        if end >= 0:
+            break
+        window = fh.read(SCAN_WINDOW_BYTES)
+        if not window:
+            end = len(data)
+            break
+        data += window
+    row = _ROW_NUM.match(data, first) if first >= 0 else None
+    if row is None or row.group(1) != b"1":
+        return None
+
+    values = {}
+    for letters, _, attrs, content in _ANY_CELL.findall(data, first, end):
+        t = _cell_type(attrs)
+        col = column_index(letters.decode("ascii"))
+        values[col] = _value(t, _cell_text(t, content), strings, None, None, col)
+    header = [values.get(i) for i in range(max(values) + 1)] if values else []
+    if callable(columns):
+        columns = columns(header)
+
+    if columns is None:
+        # Cells keyed by column until the sheet's width is known
+        positions, wanted, pattern = None, None, _ANY_CELL
+    else:
+        positions = sorted(set(columns))
+        wanted = {p: j for j, p in enumerate(positions)}
+        pattern = re.compile(_CELL % b"|".join(column_letters(p).encode("ascii") for p in positions), re.S)
+
+    rows, pending, index_of = [], [], {}
+    # Sheet row of the last value in any column: data rows end there
+    last_row = 0
+    data = data[end:]
+    while True:
+        window = fh.read(SCAN_WINDOW_BYTES)
+        if window:
+            data += window
+            cut = data.rfind(b"<row ")
+            if cut <= 0:
+                continue
+        else:
+            cut = len(data)
+
+        last = max(data.rfind(b"<v>", 0, cut), data.rfind(b"<is>", 0, cut))
+        if last >= 0:
+            row = _ROW_NUM.search(data, data.rfind(b"<row ", 0, last))
+            if row:
+                last_row = max(last_row, int(row.group(1)))
+        for letters, row_num, attrs, content in (pattern.findall(data, 0, cut) if positions != [] else ()):
+            if not content:
+                continue
+            row_pos = int(row_num) - 2
+            while len(rows) <= row_pos:
+                rows.append({} if wanted is None else [None] * len(positions))
+            j = index_of.get(letters)
+            if j is None:
+                col = column_index(letters.decode("ascii"))
+                j = index_of[letters] = col if wanted is None else wanted[col]
+            t = _cell_type(attrs)
+            if (t is None or t == "s") and content.startswith(b"<v>"):
+                # Numbers and shared string indexes, the bulk of most sheets
+                text = content[3:content.find(b"</v>")]
+                if not text:
+                    continue
+                if t is None:
+                    rows[row_pos][j] = _number(text.decode("ascii"))
+                else:
+                    pending.append((row_pos, j, int(text)))
+            else:
+                rows[row_pos][j] = _value(t, _cell_text(t, content), strings, pending, row_pos, j)
+        if not window:
+            break
+        data = data[cut:]
+
+    # Data row i is sheet row i + 2, up to the last row with a value in any column
+    n_rows = max(last_row - 1, 0)
+    del rows[n_rows:]
+    rows.extend({} if wanted is None else [None] * len(positions) for _ in range(n_rows - len(rows)))
+    if positions is None:
+        width = max([max(r) + 1 for r in rows if r] + [len(header)])
+        positions = list(range(width))
+        rows = [[r.get(p) for p in positions] for r in rows]
+    for row_pos, j, index in pending:
+        rows[row_pos][j] = strings[index]
+    return header, positions, rows
+
+
+def read_sheet_rows(zf, member, strings, columns=None):
+    """(header values, positions, data rows) of one sheet, only the given columns
+
+    columns: 0-based column positions to keep (None for all) or a callable
+    that gets the header values (shared strings resolved) and returns them.
+    The header (first) row is always read whole. Rows hold the kept
+    columns in ascending position order. Data row i is sheet row i + 2
+    (by the rows' r attribute): rows without any kept cell, and blank rows
+    up to the last row with a value in any column, are all None, as in
+    pd.read_excel.
+    """
+    with zf.open(member) as fh:
+        scanned = _scan_sheet_rows(fh, strings, columns)
+    if scanned is not None:
+        return scanned
+    return _parse_sheet_rows(zf, member, strings, columns)
+
+
+def _parse_sheet_rows(zf, member, strings, columns):
+    """read_sheet_rows streamed through expat, for any sheet XML"""
+    import pyexpat
+
+    # Plain expat callbacks rather than iterparse: no Element is built for
+    # every cell, formula and value, which halves the time on large sheets.
+    # Only start tags are handled; a cell's text is whatever character data
+    # follows its <v> (or inline <t>) until the next tag of interest.
+    pick = columns if callable(columns) else None
+    positions = None if columns is None or pick else sorted(set(columns))
+    wanted = None if positions is None else {p: j for j, p in enumerate(positions)}
+    header, rows, pending = [], [], []
+    letters_cache = {}
+    current = {}
+    cell = parts = None
+    in_header = seen_row = valued = False
+    next_col = 0
+    row_num = 0
+
+    def blank():
+        return {} if wanted is None else [None] * len(positions)
+
+    def finish_row():
+        nonlocal header, positions, wanted
+        if in_header:
+            values = {col: _value(t, p, strings, None, None, col) for col, (t, p) in current.items()}
+            header = [values.get(i) for i in range(max(values) + 1)] if values else []
+            if pick is not None:
+                positions = sorted(set(pick(header)))
+                wanted = {p: j for j, p in enumerate(positions)}
+        elif valued:
+            # Blank rows before this one (absent from the XML or without values)
+            while len(rows) < row_num - 2:
+                rows.append(blank())
+            row_pos = len(rows)
+            if wanted is None:
+                rows.append({col: _value(t, p, strings, pending, row_pos, col) for col, (t, p) in current.items()})
+            else:
+                row = [None] * len(positions)
+                for col, (t, p) in current.items():
+                    j = wanted[col]
+                    row[j] = _value(t, p, strings, pending, row_pos, j)
+                rows.append(row)
+
+    def start(name, attrs):
+        nonlocal cell, parts, current, in_header, seen_row, valued, next_col, row_num
+        if name == CELL:
+            parts = None
+            ref = attrs.get("r")
+            if ref:
+                letters = ref.rstrip(_DIGITS)
+                col = letters_cache.get(letters)
+                if col is None:
+                    col = letters_cache[letters] = column_index(letters)
+            else:
+                col = next_col
+            next_col = col + 1
+            if in_header or wanted is None or col in wanted:
+                cell = current[col] = [attrs.get("t"), None]
+            else:
+                cell = None
+        elif name == VALUE:
+            valued = True
+            if cell is not None:
+                parts = cell[1] = []
+        elif name == ROW:
+            cell = parts = None
+            if seen_row:
+                finish_row()
+            current, next_col, valued = {}, 0, False
+            r = attrs.get("r")
+            row_num = int(r) if r else row_num + 1
+            in_header = not seen_row and (r is None or r == "1")
+            seen_row = True
+        elif name == INLINE_TEXT:
+            valued = True
+            if cell is not None and cell[0] == "inlineStr":
+                if cell[1] is None:
+                    cell[1] = []
+                parts = cell[1]
+        else:
+            # Formulas, phonetic runs, anything after <sheetData>
+            parts = None
+
+    def characters(data):
+        if parts is not None:
+            parts.append(data)
+
+    expat = pyexpat.ParserCreate(namespace_separator="}")
+    expat.buffer_text = True
+    expat.StartElementHandler = start
+    expat.CharacterDataHandler = characters
+    with zf.open(member) as fh:
+        while True:
+            data = fh.read(1 << 20)
+            expat.Parse(data, not data)
+            if not data:
+                break
+    if seen_row:
+        finish_row()
+
+    if positions is None:
+        width = max([max(row) + 1 for row in rows if row] + [len(header)])
+        positions = list(range(width))
+        # Shared strings were queued by column, which is the position here
+        rows = [[row.get(p) for p in positions] for row in rows]
+    for row_pos, j, index in pending:
+        rows[row_pos][j] = strings[index]
+    return header, positions, rows
+
+
+def read_workbook_columns(excel_file, sheet_columns):
+    """Raw-XML counterpart of loader.read_workbook_sheets
+
+    sheet_columns: {sheet: columns (names or letters) or None for all}
+    Returns ({sheet: (df, header) or the Exception}, bytes read from disk).
+    """
+    import pandas as pd
+
+    from boreholes.loader import CountingReader, column_position
+    from boreholes.streaming import sheet_header
+
+    frames = {}
+    with open(excel_file, "rb") as fh:
+        reader = CountingReader(fh)
+        with zipfile.ZipFile(reader) as zf:
+            members, shared = sheet_members(zf)
+            strings = SharedStrings(zf, shared)
+            for sheet, columns in sheet_columns.items():
+                try:
+                    if sheet not in members:
+                        raise ValueError(f"Worksheet named '{sheet}' not found")
+
+                    def pick(values, columns=columns):
+                        names = sheet_header(values)
+                        return [column_position(names, c) for c in columns]
+
+                    values, positions, rows = read_sheet_rows(zf, members[sheet], strings, None if columns is None else pick)
+                    header = sheet_header(values + [None] * (max(positions, default=-1) + 1 - len(values)))
+                    frames[sheet] = (pd.DataFrame.from_records(rows, columns=header[positions]), header)
+                except Exception as e:
+                    frames[sheet] = e
+    return frames, reader.bytes_read
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        print("usage: python -m boreholes.xlsx_xml WORKBOOK SHEET [COLUMN ...]")
+        sys.exit(2)
+    with zipfile.ZipFile(sys.argv[1]) as zf:
+        members, shared = sheet_members(zf)
+        wanted = [column_index(c) for c in sys.argv[3:]] or None
+        header, positions, rows = read_sheet_rows(zf, members[sys.argv[2]], SharedStrings(zf, shared), wanted)
+    print("\t".join(str(header[p]) if p < len(header) else "" for p in positions))
+    for row in rows[:20]:
+        print("\t".join("" if v is None else str(v) for v in row))
+    print(f"... {len(rows)} rows")
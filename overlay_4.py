@@ -1,13 +1,15 @@
-import pandas as pd
-import numpy as np
-import folium
-import pyproj
-from pathlib import Path
-from datetime import datetime
+"""German Boreholes - Multi-Layer Overlay Map
 
-print("\n" + "="*70)
-print("🗺️  German Boreholes - Multi-Layer Overlay Map")
-print("="*70)
+Builds the map from the settings below. The same build runs from a config
+file (python -m boreholes build boreholes.toml) or in-process through
+boreholes.pipeline.build_map(config).
+
+python overlay_4.py --help lists the command line flags (--no-cache,
+--full-rebuild, --tiles, --merge, --dedup, ...).
+"""
+import sys
+
+from boreholes.cli import main
 
 # CONFIG - YOUR DATASETS
 DATASETS = [
@@ -48,291 +50,121 @@ DATASETS = [
         "color": "purple"
     }
 ]
+# Optional per dataset: "popup_cols": ["E", "F"] reads only bohr_id/x/y plus
+# these columns (names or letters) instead of the whole sheet.
+# "crs": "gk" (default, zone detected per row from X) or "utm32" (ETRS89 / EPSG:25832)
+# Layers can also come from the SQLite store of Main_DB_RL5-Jens.xlsx
+# (python -m boreholes import Main_DB_RL5-Jens.xlsx): "file" is the database and
+# "sheet" an imported sheet or an SQL query, e.g. the wells that have an SVZ:
+#     {"file": "boreholes.sqlite", "name": "SVZ wells", "bohr_id_col": "well_id", "x_col": "x", "y_col": "y",
+#      "sheet": "SELECT w.well_id, w.x, w.y, count(*) AS intervals FROM svz JOIN wells_outcrop w USING (well_id) GROUP BY w.well_id"}
 
 OUTPUT_MAP = "German_Boreholes_Map.html"
 
-print("\n📊 DATASETS TO LOAD:\n")
-for i, ds in enumerate(DATASETS, 1):
-    file_name = Path(ds['file']).name
-    print(f"  {i}. {ds['name']}")
-    print(f"     File: {file_name}")
-    print(f"     Sheet: {ds['sheet']}")
-    print(f"     Bohr ID: Column {ds['bohr_id_col']}, Coordinates: {ds['x_col']}, {ds['y_col']}")
-    print(f"     Color: {ds['color']}\n")
-
-# ==================== FUNCTION TO PROCESS FILE ====================
-def process_excel_file(excel_file, sheet_name, bohr_id_col, x_col, y_col, dataset_name):
-    """Read Excel and convert Gauß-Krüger to WGS84"""
-    
-    print(f"📁 {dataset_name}...", end='', flush=True)
-    
-    try:
-        df = pd.read_excel(excel_file, sheet_name=sheet_name)
-    except Exception as e:
-        print(f" ✗ {str(e)[:40]}")
-        return None
-    
-    # Extract Bohr ID column
-    try:
-        if bohr_id_col in df.columns:
-            bohr_column = bohr_id_col
-        else:
-            bohr_column = df.columns[int(ord(bohr_id_col) - ord('A'))]
-        
-        df['bohr_id'] = df[bohr_column].astype(str)
-    except:
-        df['bohr_id'] = 'N/A'
-    
-    # Extract X, Y
-    try:
-        if x_col in df.columns:
-            x_column = x_col
-        else:
-            x_column = df.columns[int(ord(x_col) - ord('A'))]
-        
-        if y_col in df.columns:
-            y_column = y_col
-        else:
-            y_column = df.columns[int(ord(y_col) - ord('A'))]
-        
-        df['X'] = pd.to_numeric(df[x_column], errors='coerce')
-        df['Y'] = pd.to_numeric(df[y_column], errors='coerce')
-        
-        df_clean = df.dropna(subset=['X', 'Y'])
-        
-    except Exception as e:
-        print(f" ✗ {str(e)[:40]}")
-        return None
-    
-    # Detect zone
-    x_mean = df_clean['X'].mean()
-    if 2500000 < x_mean < 3500000:
-        epsg_code = 31467  # Zone 3 (9°)
-        zone = 3
-    elif 3500000 < x_mean < 4500000:
-        epsg_code = 31468  # Zone 4 (12°)
-        zone = 4
-    elif 1500000 < x_mean < 2500000:
-        epsg_code = 31466  # Zone 2 (6°)
-        zone = 2
-    else:
-        epsg_code = 31467
-        zone = 3
-    
-    # Convert coordinates
-    gk_crs = pyproj.CRS.from_epsg(epsg_code)
-    wgs84_crs = pyproj.CRS.from_epsg(4326)
-    transformer = pyproj.Transformer.from_crs(gk_crs, wgs84_crs, always_xy=True)
-    
-    lons, lats = transformer.transform(df_clean['X'].values, df_clean['Y'].values)
-    
-    df_clean['latitude'] = lats
-    df_clean['longitude'] = lons
-    
-    print(f" ✓ {len(df_clean)} points")
-    
-    return df_clean
-
-# ==================== PROCESS ALL FILES ====================
-print("\n" + "="*70)
-print("STEP 1: Reading and Converting Datasets")
-print("="*70 + "\n")
-
-datasets_loaded = []
-for ds in DATASETS:
-    df = process_excel_file(
-        ds['file'], 
-        ds['sheet'], 
-        ds['bohr_id_col'],
-        ds['x_col'], 
-        ds['y_col'], 
-        ds['name']
-    )
-    if df is not None:
-        ds['data'] = df
-        datasets_loaded.append(ds)
-    else:
-        print(f"  ⚠️  Skipping {ds['name']}")
-
-if len(datasets_loaded) == 0:
-    print("\n✗ No datasets loaded!")
-    exit(1)
-
-print(f"\n✓ Successfully loaded {len(datasets_loaded)} datasets")
-
-# ==================== CREATE MAP ====================
-print("\n" + "="*70)
-print("STEP 2: Creating Overlay Map")
-print("="*70)
-
-# Calculate center from all datasets
-all_lats = []
-all_lons = []
-for ds in datasets_loaded:
-    all_lats.extend(ds['data']['latitude'].values)
-    all_lons.extend(ds['data']['longitude'].values)
-
-all_lats = np.array(all_lats)
-all_lons = np.array(all_lons)
-
-center_lat = all_lats.mean()
-center_lon = all_lons.mean()
-
-print(f"\n  Map center: {center_lat:.4f}°N, {center_lon:.4f}°E")
-print(f"  Total points: {len(all_lats):,}")
-
-m = folium.Map(
-    location=[center_lat, center_lon],
-    zoom_start=8,
-    tiles='OpenStreetMap'
-)
-
-# Add satellite layer
-folium.TileLayer(
-    'https://server.arcgisonline.com/ArcGIS/rest/services/World_Imagery/MapServer/tile/{z}/{y}/{x}',
-    attr='Esri',
-    name='Satellite',
-    overlay=False
-).add_to(m)
-
-# ==================== ADD ALL DATASETS ====================
-print(f"\nAdding datasets to map...\n")
-
-for ds in datasets_loaded:
-    print(f"  {ds['name']} ({len(ds['data'])} points, {ds['color']})...", end='', flush=True)
-    
-    df = ds['data']
-    color = ds['color']
-    name = ds['name']
-    
-    fg = folium.FeatureGroup(name=f"{name} ({len(df)} pts)", show=True)
-    
-    for idx, row in df.iterrows():
-        # Get bohr ID
-        bohr_id = row.get('bohr_id', 'N/A')
-        
-        popup_text = f"""
-        <b style="font-size: 14px; color: #{['0066CC', 'FF0000', '00AA00', '9933FF'][datasets_loaded.index(ds) % 4]};">{name}</b><br>
-        <hr style="margin: 5px 0;">
-        <table style="border-collapse: collapse; font-size: 12px;">
-        <tr><td><b>Bohr ID:</b></td><td><b style="color: #333;">{bohr_id}</b></td></tr>
-        <tr><td><b>Latitude:</b></td><td>{row['latitude']:.6f}°</td></tr>
-        <tr><td><b>Longitude:</b></td><td>{row['longitude']:.6f}°</td></tr>
-        <tr><td><b>GK X (m):</b></td><td>{row['X']:.0f}</td></tr>
-        <tr><td><b>GK Y (m):</b></td><td>{row['Y']:.0f}</td></tr>
-        """
-        
-        for col in df.columns:
-            if col not in ['X', 'Y', 'latitude', 'longitude', 'bohr_id', ds['x_col'], ds['y_col'], ds['bohr_id_col']]:
-                try:
-                    val = row[col]
-                    if pd.notna(val):
-                        popup_text += f"<tr><td><b>{col}:</b></td><td>{val}</td></tr>"
-                except:
-                    pass
-        
-        popup_text += """
-        </table>
-        <hr style="margin: 5px 0;">
-        <i style="font-size: 10px; color: #666;">Gauß-Krüger Zone 3 (9° meridian) → WGS84</i>
-        """
-        
-        folium.Marker(
-            location=[row['latitude'], row['longitude']],
-            popup=folium.Popup(popup_text, max_width=350),
-            icon=folium.Icon(color=color, icon='info-sign'),
-            tooltip=f"<b>{bohr_id}</b> • {name}"
-        ).add_to(fg)
-    
-    fg.add_to(m)
-    print(" ✓")
-
-# ==================== ADD LAYER CONTROL ====================
-print(f"\n  Adding layer control...")
-folium.LayerControl(position='topright', collapsed=False).add_to(m)
-
-# ==================== ADD TITLE ====================
-title_content = ""
-colors_hex = ['0066CC', 'FF0000', '00AA00', '9933FF']
-for i, ds in enumerate(datasets_loaded):
-    color_hex = colors_hex[i % len(colors_hex)]
-    title_content += f"<b style=\"color: #{color_hex}\">● {ds['name']}</b> ({len(ds['data'])} boreholes)<br>"
-
-title_html = f'''
-<div style="position: fixed; top: 10px; left: 50px; width: 450px; 
-            background-color: white; border:3px solid #333; z-index:9999; 
-            font-size:12px; padding: 12px; border-radius: 4px; box-shadow: 0 0 8px rgba(0,0,0,0.2);">
-<b style="font-size: 15px;">⛏️ German Boreholes Map</b><br>
-<b>Bohrungen Koordinaten Übersicht</b><br>
-<hr style="margin: 5px 0;">
-{title_content}
-<hr style="margin: 5px 0;">
-<b>Total Boreholes:</b> {len(all_lats):,}<br>
-<b>Datasets:</b> {len(datasets_loaded)}<br>
-<b>Region:</b> {center_lat:.4f}°N, {center_lon:.4f}°E<br>
-<i style="color: #666; font-size: 11px;">Use layer control (→) to toggle datasets</i>
-</div>
-'''
-m.get_root().html.add_child(folium.Element(title_html))
-
-# ==================== ADD LEGEND ====================
-legend_entries = ""
-colors_hex = ['0066CC', 'FF0000', '00AA00', '9933FF']
-for i, ds in enumerate(datasets_loaded):
-    color_hex = colors_hex[i % len(colors_hex)]
-    legend_entries += f'<i style="background: #{color_hex}; border-radius: 50%; display: inline-block; height: 12px; width: 12px; margin-right: 8px;"></i> {ds["name"]}<br>'
-
-legend_html = f'''
-<div style="position: fixed; bottom: 50px; right: 50px; width: 240px;
-            background-color: white; border:3px solid #333; z-index:9999; 
-            font-size:12px; padding: 10px; border-radius: 4px; box-shadow: 0 0 8px rgba(0,0,0,0.2);">
-<b>Legend ({len(datasets_loaded)} Datasets)</b><br>
-<hr style="margin: 5px 0;">
-{legend_entries}
-<hr style="margin: 5px 0;">
-<i style="font-size: 11px; color: #666;">• Hover for Bohr ID<br>• Click for details</i>
-</div>
-'''
-m.get_root().html.add_child(folium.Element(legend_html))
-
-# ==================== SAVE MAP ====================
-print(f"\nStep 3: Saving map...")
-
-try:
-    m.save(OUTPUT_MAP)
-    file_size = Path(OUTPUT_MAP).stat().st_size / (1024*1024)
-    print(f"  ✓ Saved: {OUTPUT_MAP}")
-    print(f"  File size: {file_size:.2f} MB")
-except Exception as e:
-    print(f"  ✗ Error saving: {e}")
-    exit(1)
-
-# ==================== EXPORT COMBINED CSV ====================
-print(f"\nStep 4: Saving combined coordinates...")
-
-dfs_to_combine = []
-for ds in datasets_loaded:
-    df = ds['data'].copy()
-    df['dataset'] = ds['name']
-    dfs_to_combine.append(df[['bohr_id', 'X', 'Y', 'latitude', 'longitude', 'dataset']])
-
-df_export = pd.concat(dfs_to_combine, ignore_index=True)
-
-output_csv = OUTPUT_MAP.replace('.html', '_combined.csv')
-df_export.to_csv(output_csv, index=False)
-print(f"  ✓ Saved: {output_csv}")
-
-# ==================== DONE ====================
-print("\n" + "="*70)
-print("✓ SUCCESS!")
-print("="*70)
-print(f"\nOutputs created:")
-print(f"  1. {OUTPUT_MAP}")
-print(f"  2. {output_csv}")
-print(f"\nBoreholes loaded:")
-for i, ds in enumerate(datasets_loaded, 1):
-    print(f"  {i}. {ds['name']}: {len(ds['data'])} points ({ds['color']})")
-
-print(f"\nTotal: {len(all_lats):,} boreholes")
-print(f"\nOpen {OUTPUT_MAP} in your browser")
-print("="*70 + "\n")
\ No newline at end of file
+# "data": each dataset is embedded once as a JSON array and a single script
+#         creates the markers / popups in the browser (small HTML, fast to open)
+# "cluster": like "data", markers grouped into clusters (Leaflet.markercluster)
+# "canvas": like "data", boreholes drawn as circles on one canvas (no DOM icons)
+# "markers": one folium.Marker + Popup per borehole (the classic output)
+# "auto": "data" for small datasets, AUTO_LARGE_MODE above AUTO_MODE_THRESHOLD points
+# A dataset can override this with its own "render_mode" entry.
+RENDER_MODE = "markers"
+AUTO_MODE_THRESHOLD = 2000
+AUTO_LARGE_MODE = "cluster"
+
+# "inline": popup attributes are embedded in the map
+# "sidecar": the data / cluster / canvas layers only embed ID and coordinates;
+#            the attributes go to <map>_popups/ and are loaded on click
+# (tiled maps always work like "sidecar")
+POPUP_DETAILS = "inline"
+
+# Density layers: borehole counts per 8 px grid cell, binned for every zoom
+# DENSITY_MIN_ZOOM..DENSITY_MAX_ZOOM; only the counts go into the HTML.
+# "add": a density layer next to each dataset's points, "only": instead of
+# them (tiled and merged maps keep their points), "off". A dataset can
+# override this with its own "density" entry.
+DENSITY = "off"
+DENSITY_MIN_ZOOM = 5
+DENSITY_MAX_ZOOM = 10
+
+# Level of detail for the "data" and "canvas" layers: below LOD_MAX_ZOOM a zoom
+# only draws the first borehole of every 32 px cell (nested from zoom to zoom,
+# so zooming in only adds markers); from LOD_MAX_ZOOM on every borehole
+LOD = False
+LOD_MIN_ZOOM = 5
+LOD_MAX_ZOOM = 12
+
+# Workbooks are loaded in parallel ("thread" or "process" pool)
+LOAD_WORKERS = 4
+LOAD_EXECUTOR = "thread"
+
+# Very large sheets: read them row by row in chunks of this many rows (only the
+# needed columns, rows without coordinates dropped per chunk) instead of loading
+# the whole sheet with pd.read_excel. Without popup_cols only the ID and X/Y
+# columns are read. None = read whole sheets; --stream uses 50000
+STREAM_CHUNK_ROWS = None
+
+# Cleaned sheets are cached (Parquet) and reused until the workbook changes
+CACHE_MAX_AGE_DAYS = 30
+CACHE_MAX_SIZE_MB = 500
+
+# Tiled output: all points are written to <map>_tiles/{z}/{x}/{y}.js (thinned
+# below TILE_MAX_ZOOM) and the map only loads the tiles in view. The tiles are
+# plain script files, so the map + tile folder also work without a web server.
+EXPORT_TILES = False
+TILE_MIN_ZOOM = 5
+TILE_MAX_ZOOM = 12
+
+# Duplicates: boreholes of one dataset whose GK X/Y snap to the same
+# DEDUP_GRID_M grid cell. "report" lists them in <map>_duplicates.csv,
+# "collapse" also keeps one marker per location with a count badge, "off"
+DEDUP_MODE = "off"
+DEDUP_GRID_M = 1.0
+
+# Merge the datasets into one layer with one marker per physical borehole:
+# records are joined on their normalized Bohr ID ("Allmenhausen_10_1960" =
+# "Allmenhausen 10/1960"), then to the nearest record of another dataset within
+# MERGE_TOLERANCE_M metres. Popups show every dataset's attributes; the merged
+# records are also saved to <map>_merged.csv
+MERGE_DATASETS = False
+MERGE_TOLERANCE_M = 25
+
+# Save a grid index next to the combined CSV for radius / kNN / bbox queries
+# (python -m boreholes.spatial_index German_Boreholes_Map_combined.csv --near LAT LON --radius 500)
+BUILD_SPATIAL_INDEX = False
+
+# Layer colors (title, legend, popups), by position in DATASETS
+COLORS_HEX = ['0066CC', 'FF0000', '00AA00', '9933FF']
+
+SETTINGS = {
+    'output_map': OUTPUT_MAP,
+    'render_mode': RENDER_MODE,
+    'auto_mode_threshold': AUTO_MODE_THRESHOLD,
+    'auto_large_mode': AUTO_LARGE_MODE,
+    'popup_details': POPUP_DETAILS,
+    'density': DENSITY,
+    'density_min_zoom': DENSITY_MIN_ZOOM,
+    'density_max_zoom': DENSITY_MAX_ZOOM,
+    'lod': LOD,
+    'lod_min_zoom': LOD_MIN_ZOOM,
+    'lod_max_zoom': LOD_MAX_ZOOM,
+    'load_workers': LOAD_WORKERS,
+    'load_executor': LOAD_EXECUTOR,
+    'stream_chunk_rows': STREAM_CHUNK_ROWS,
+    'cache_max_age_days': CACHE_MAX_AGE_DAYS,
+    'cache_max_size_mb': CACHE_MAX_SIZE_MB,
+    'export_tiles': EXPORT_TILES,
+    'tile_min_zoom': TILE_MIN_ZOOM,
+    'tile_max_zoom': TILE_MAX_ZOOM,
+    'dedup_mode': DEDUP_MODE,
+    'dedup_grid_m': DEDUP_GRID_M,
+    'merge_datasets': MERGE_DATASETS,
+    'merge_tolerance_m': MERGE_TOLERANCE_M,
+    'build_spatial_index': BUILD_SPATIAL_INDEX,
+    'colors_hex': COLORS_HEX,
+    'datasets': DATASETS,
+}
+
+if __name__ == '__main__':
+    # The guard also keeps LOAD_EXECUTOR = "process" working on Windows
+    sys.exit(main(['build'] + sys.argv[1:], settings=SETTINGS))
@@ -0,0 +1,100 @@
+"""A rebuild reloads only the datasets whose workbook changed"""
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("pandas")
+openpyxl = pytest.importorskip("openpyxl")
+pytest.importorskip("folium")
+pytest.importorskip("pyproj")
+
+from boreholes.build_manifest import BuildManifest  # noqa: E402
+from boreholes.config import validate_config  # noqa: E402
+from boreholes.pipeline import build_map, output_paths, plan_build  # noqa: E402
+
+
+def quiet(*args, **kwargs):
+    pass
+
+
+def write_workbook(path, rows, seed):
+    rng = np.random.default_rng(seed)
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Bohrungen"
+    ws.append(["Bohrung", "Rechtswert", "Hochwert", "Tiefe"])
+    for i in range(rows):
+        ws.append([f"B{seed}-{i}", round(float(rng.uniform(4400000, 4420000)), 1),
+                   round(float(rng.uniform(5610000, 5630000)), 1), int(rng.integers(1, 200))])
+    wb.save(path)
+
+
+@pytest.fixture
+def config(tmp_path):
+    datasets = []
+    for i in range(2):
+        path = tmp_path / f"registry_{i}.xlsx"
+        write_workbook(path, 50, seed=i)
+        datasets.append({"file": str(path), "sheet": "Bohrungen", "bohr_id_col": "Bohrung",
+                         "x_col": "Rechtswert", "y_col": "Hochwert", "name": f"Registry {i}"})
+    # "data" layers are stored in the manifest ("markers" ones never are)
+    return validate_config({"cache": False, "render_mode": "data", "output_map": str(tmp_path / "map.html"),
+                            "datasets": datasets})
+
+
+def touch(path):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def dirty_names(config):
+    return [ds['name'] for ds in plan_build(config)[1]]
+
+
+def test_unchanged_build_is_up_to_date(config):
+    assert build_map(config, log=quiet)['status'] == "built"
+    assert dirty_names(config) == []
+    result = build_map(config, log=quiet)
+    assert result['status'] == "up to date"
+    assert result['datasets'] == {"Registry 0": 50, "Registry 1": 50}
+
+
+def test_touched_workbook_is_the_only_dirty_dataset(config):
+    build_map(config, log=quiet)
+    csv = output_paths(config)['csv'].read_text(encoding='utf-8')
+
+    touch(config['datasets'][1]['file'])
+    assert dirty_names(config) == ["Registry 1"]
+    lines = []
+    assert build_map(config, log=lambda *args, **kwargs: lines.append(" ".join(map(str, args))))['status'] == "built"
+    assert any("Rebuilding 1 of 2 datasets" in line for line in lines)
+    # Same rows: the clean layer was spliced back from the manifest
+    assert output_paths(config)['csv'].read_text(encoding='utf-8') == csv
+    assert dirty_names(config) == []
+
+
+def test_changed_settings_or_missing_outputs_rebuild(config):
+    build_map(config, log=quiet)
+    assert dirty_names(dict(config, render_mode="canvas")) == ["Registry 0", "Registry 1"]
+
+    output_paths(config)['csv'].unlink()
+    assert dirty_names(config) == []
+    assert build_map(config, log=quiet)['status'] == "built"
+    assert output_paths(config)['csv'].exists()
+
+    # A layer whose stored fragment is gone is dirty again
+    manifest = BuildManifest(config['output_map'])
+    (manifest.dir / manifest.layer("Registry 0")['fragment']).unlink()
+    assert dirty_names(config) == ["Registry 0"]
+
+
+def test_outputs_of_disabled_modes_are_deleted(config):
+    build_map(dict(config, build_spatial_index=True, dedup_mode="report"), log=quiet)
+    paths = output_paths(config)
+    assert paths['index'].exists() and paths['duplicates'].exists()
+
+    assert build_map(config, log=quiet)['status'] == "built"
+    assert not paths['index'].exists()
+    assert not paths['duplicates'].exists()
+    assert paths['map'].exists() and paths['csv'].exists()
@@ -0,0 +1,60 @@
+"""validate_config fills in the defaults and rejects bad settings by name"""
+import json
+
+import pytest
+
+from boreholes.config import DEFAULTS, ConfigError, load_config, validate_config
+
+DATASET = {"file": "SVZ.xlsx", "sheet": "Tabelle1", "x_col": "C", "y_col": "D", "name": "SVZ"}
+
+
+def config(**settings):
+    return dict(settings, datasets=settings.get('datasets', [dict(DATASET)]))
+
+
+def test_defaults_write_the_original_outputs():
+    checked = validate_config(config())
+    assert checked['render_mode'] == "markers"
+    assert checked['dedup_mode'] == "off"
+    assert checked['build_spatial_index'] is False
+    assert checked['datasets'][0]['bohr_id_col'] is None
+    assert {k: v for k, v in checked.items() if k != 'datasets'} == {k: v for k, v in DEFAULTS.items() if k != 'datasets'}
+
+
+@pytest.mark.parametrize("settings, message", [
+    ({'render_mode': "tiles"}, "render_mode must be one of"),
+    ({'dedup_mode': "remove"}, "dedup_mode must be one of"),
+    ({'dedup_mode': None}, "dedup_mode must be one of"),
+    ({'datasets': [dict(DATASET, crs="wgs84")]}, "datasets[0]: crs must be one of"),
+    ({'datasets': [dict(DATASET, crs="GK")]}, "datasets[0]: crs must be one of"),
+    ({'datasets': [dict(DATASET, render_mode="heatmap")]}, "datasets[0]: render_mode must be one of"),
+    ({'build_spatial_index': "yes"}, "build_spatial_index must be true or false"),
+    ({'dedup_grid_m': -1}, "dedup_grid_m must be a number >= 0"),
+    ({'tile_min_zoom': 9, 'tile_max_zoom': 5}, "tile_min_zoom must not be above tile_max_zoom"),
+    ({'export_tiles': True, 'merge_datasets': True}, "can't be combined"),
+    ({'bbox': [51, 10, 50, 11]}, "south < north"),
+    ({'output_map': "map.png"}, "output_map must be an .html file"),
+    ({'rendermode': "data"}, "Unknown setting(s): rendermode"),
+    ({'datasets': []}, "No datasets configured"),
+    ({'datasets': [dict(DATASET), dict(DATASET)]}, "Dataset names must be unique: SVZ"),
+    ({'datasets': [{k: v for k, v in DATASET.items() if k != 'sheet'}]}, "datasets[0]: missing sheet"),
+])
+def test_bad_settings_are_rejected(settings, message):
+    with pytest.raises(ConfigError) as e:
+        validate_config(config(**settings))
+    assert message in str(e.value)
+
+
+def test_valid_choices_pass():
+    checked = validate_config(config(render_mode="auto", dedup_mode="collapse",
+                                     datasets=[dict(DATASET, crs="utm32", render_mode="canvas")]))
+    assert checked['dedup_mode'] == "collapse"
+    assert checked['datasets'][0]['crs'] == "utm32"
+
+
+def test_paths_are_relative_to_the_config_file(tmp_path):
+    path = tmp_path / "boreholes.json"
+    path.write_text(json.dumps(config(output_map="out/map.html")), encoding='utf-8')
+    checked = load_config(path)
+    assert checked['output_map'] == str(tmp_path / "out" / "map.html")
+    assert checked['datasets'][0]['file'] == str(tmp_path / "SVZ.xlsx")
@@ -0,0 +1,81 @@
+"""Duplicate coordinates are reported as exact copies or shared locations, or collapsed"""
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+from boreholes.dedup import (COUNT_COLUMN, IDS_COLUMN, REPORT_COLUMNS, collapse_duplicates, collapsed_rows,  # noqa: E402
+                             duplicate_groups, duplicate_report, duplicated_rows)
+
+
+def boreholes():
+    rows = [
+        ("B1", 4400100.2, 5600200.3, 5.0),   # exact copy of the next row
+        ("B1", 4400100.2, 5600200.3, 5.0),
+        ("B2", 4400300.1, 5600400.1, 7.0),   # two records at one spot
+        ("B3", 4400300.9, 5600400.5, 8.0),
+        ("C", 4400500.0, 5600600.0, 1.0),    # three, one with another depth
+        ("C", 4400500.0, 5600600.0, 1.0),
+        ("C", 4400500.0, 5600600.0, 2.0),
+        ("D", 4400700.0, 5600800.0, 3.0),    # single
+    ]
+    df = pd.DataFrame(rows, columns=['bohr_id', 'X', 'Y', 'Tiefe'])
+    # Stand-ins for the projected coordinates: same X/Y, same lat/lon
+    df['latitude'] = 50.5 + (df['Y'] - 5600000) / 111200
+    df['longitude'] = 10.5 + (df['X'] - 4400000) / 70600
+    return df
+
+
+def test_report_tells_exact_copies_from_shared_locations():
+    df = boreholes()
+    report = duplicate_report(df, "SVZ", duplicate_groups(df))
+    assert list(report.columns) == REPORT_COLUMNS
+    assert report[['bohr_id', 'count', 'kind', 'bohr_ids']].values.tolist() == [
+        ["B1", 2, "exact", "B1"],
+        ["B2", 2, "location", "B2 / B3"],
+        ["C", 3, "location", "C"],
+    ]
+    assert (report['dataset'] == "SVZ").all()
+
+
+def test_report_of_the_duplicated_rows_alone_is_the_same():
+    df = boreholes()
+    groups = duplicate_groups(df)
+    dup = duplicated_rows(groups)
+    assert dup.tolist() == [0, 1, 2, 3, 4, 5, 6]
+    pd.testing.assert_frame_equal(duplicate_report(df.iloc[dup], "SVZ", groups[dup]),
+                                  duplicate_report(df, "SVZ", groups))
+
+
+def test_no_duplicates_give_an_empty_report():
+    df = boreholes().iloc[[0, 2, 4, 7]]
+    report = duplicate_report(df, "SVZ", duplicate_groups(df))
+    assert report.empty and list(report.columns) == REPORT_COLUMNS
+
+
+def test_grid_size_decides_what_counts_as_one_spot():
+    df = pd.DataFrame({'X': [4400000.9, 4400001.1], 'Y': [5600000.0, 5600000.0]})
+    assert len(set(duplicate_groups(df, grid_m=1.0))) == 2
+    assert len(set(duplicate_groups(df, grid_m=10.0))) == 1
+
+
+def test_collapse_keeps_the_first_row_with_counts_and_ids():
+    df = boreholes()
+    groups = duplicate_groups(df)
+    collapsed = collapse_duplicates(df, groups)
+    assert collapsed['bohr_id'].tolist() == ["B1", "B2", "C", "D"]
+    assert collapsed['Tiefe'].tolist() == [5.0, 7.0, 1.0, 3.0]
+    assert collapsed[COUNT_COLUMN].tolist()[:3] == [2, 2, 3]
+    assert np.isnan(collapsed[COUNT_COLUMN].iloc[3])
+    assert collapsed[IDS_COLUMN].tolist()[:3] == ["B1", "B2 / B3", "C"]
+    assert pd.isna(collapsed[IDS_COLUMN].iloc[3])
+    assert collapsed[COUNT_COLUMN].sum() + collapsed[COUNT_COLUMN].isna().sum() == len(df)
+
+
+def test_collapsed_rows_need_only_the_ids():
+    df = boreholes()
+    groups = duplicate_groups(df)
+    first, added = collapsed_rows(df[['bohr_id']], groups)
+    assert first.tolist() == [0, 2, 4, 7]
+    collapsed = collapse_duplicates(df, groups)
+    pd.testing.assert_frame_equal(added, collapsed[[COUNT_COLUMN, IDS_COLUMN]])
@@ -0,0 +1,86 @@
+"""Records of several datasets are merged by normalized ID, then by proximity"""
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+pytest.importorskip("pyproj")
+
+from boreholes.matching import match_datasets, normalize_ids  # noqa: E402
+
+LAT, LON = 51.2, 10.8
+# Degrees per metre near LAT
+M_LAT = 1 / 111_200
+M_LON = 1 / 69_700
+
+
+def records(rows):
+    """A loaded dataset from (bohr_id, metres north, metres east, attribute) rows"""
+    df = pd.DataFrame(rows, columns=['bohr_id', 'north', 'east', 'Tiefe'])
+    df['latitude'] = LAT + df.pop('north') * M_LAT
+    df['longitude'] = LON + df.pop('east') * M_LON
+    df['X'] = 4400000.0
+    df['Y'] = 5670000.0
+    return df
+
+
+def merged_row(merged, bohr_id):
+    return merged[merged['bohr_ids'].str.contains(bohr_id, regex=False)].iloc[0]
+
+
+def test_normalize_ids():
+    keys = normalize_ids(["Allmenhausen 10/1960", "Allmenhausen_10_1960", "Kirchheilingen 002/1960",
+                          " Großengottern-Süd 7 ", "", None])
+    assert keys[:4].tolist() == ["allmenhausen_10_1960", "allmenhausen_10_1960", "kirchheilingen_2_1960",
+                                 "grossengottern_sued_7"]
+    assert keys[4:].isna().all()
+
+
+def test_id_join_across_separators():
+    a = records([("Allmenhausen 10/1960", 0, 0, 12.5)])
+    b = records([("Allmenhausen_10_1960", 300, 200, 13.0)])
+    merged, group = match_datasets([a, b], ["SVZ", "All Points"], columns={"SVZ": ["Tiefe"], "All Points": ["Tiefe"]})
+    assert len(merged) == 1
+    row = merged.iloc[0]
+    assert row['match'] == "id"
+    assert row['n_records'] == 2
+    assert row['datasets'] == "SVZ, All Points"
+    assert row['SVZ: Tiefe'] == 12.5 and row['All Points: Tiefe'] == 13.0
+    assert group.tolist() == [0, 0]
+
+
+def test_same_id_too_far_apart_is_not_joined():
+    a = records([("Allmenhausen 10/1960", 0, 0, 1.0)])
+    b = records([("Allmenhausen_10_1960", 5000, 0, 2.0)])
+    merged, _ = match_datasets([a, b], ["SVZ", "All Points"])
+    assert merged['match'].tolist() == ["single", "single"]
+
+
+def test_proximity_link_without_id_partner():
+    a = records([("Bohrung A", 0, 0, 1.0), ("Far", 2000, 0, 3.0)])
+    b = records([("B 77", 10, 5, 2.0)])
+    merged, _ = match_datasets([a, b], ["SVZ", "All Points"], tolerance_m=25)
+    row = merged_row(merged, "Bohrung A")
+    assert row['match'] == "proximity"
+    assert row['bohr_ids'] == "Bohrung A / B 77"
+    assert merged_row(merged, "Far")['match'] == "single"
+    assert len(merged) == 2
+
+
+def test_records_of_one_dataset_never_merge_by_proximity():
+    a = records([("A 1", 0, 0, 1.0), ("A 2", 3, 0, 2.0)])
+    b = records([("B 1", 5000, 0, 3.0)])
+    merged, group = match_datasets([a, b], ["SVZ", "All Points"], tolerance_m=25)
+    assert len(merged) == 3
+    assert group[0] != group[1]
+    assert set(merged['match']) == {"single"}
+
+
+def test_same_dataset_duplicate_ids_keep_their_attributes():
+    a = records([("Dup 1", 0, 0, 10.0), ("Dup 1", 2, 0, 11.0)])
+    b = records([("Dup_1", 1, 1, 20.0)])
+    merged, group = match_datasets([a, b], ["SVZ", "All Points"], columns={"SVZ": ["Tiefe"], "All Points": ["Tiefe"]})
+    # The first SVZ record joins the All Points one; the second stays apart
+    assert group[0] == group[2] != group[1]
+    assert sorted(merged['SVZ: Tiefe'].tolist()) == [10.0, 11.0]
+    assert merged['n_records'].sum() == 3
+    assert all(n <= 2 for n in merged['n_records'])
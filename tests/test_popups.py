@@ -0,0 +1,114 @@
+"""Batched popups are the same HTML as the original per-row iterrows loop"""
+import re
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+from boreholes.popups import build_popups, build_tooltips, format_column, popup_columns  # noqa: E402
+
+NAME = "All Points"
+EXCLUDE = ['X', 'Y', 'latitude', 'longitude', 'bohr_id']
+
+
+def boreholes(n=300, seed=0):
+    """Loaded boreholes with the column kinds registry sheets have"""
+    rng = np.random.default_rng(seed)
+    depth = rng.uniform(0, 300, n).round(1)
+    depth[rng.random(n) < 0.3] = np.nan
+    notes = np.where(rng.random(n) < 0.7, None, "Kern archiviert & <geprüft>")
+    return pd.DataFrame({
+        'bohr_id': [f"Allmenhausen {i}/19{50 + i % 50}" for i in range(n)],
+        'X': rng.uniform(4350000, 4500000, n).round(1),
+        'Y': rng.uniform(5550000, 5720000, n).round(1),
+        'latitude': rng.uniform(50.2, 51.6, n),
+        'longitude': rng.uniform(9.9, 12.0, n),
+        'Tiefe (m)': depth,
+        'Jahr': (1950 + rng.integers(0, 70, n)).astype(np.int64),
+        'Art': pd.Categorical(rng.choice(["Kernbohrung", "Pegel", "Brunnen"], n)),
+        'Bemerkung': notes,
+        'Ausgebaut': rng.random(n) < 0.5,
+        'Gemischt': rng.choice(np.array([1, 2.5, "k.A.", None], dtype=object), n),
+        'Datum': pd.Timestamp("1990-01-01") + pd.to_timedelta(rng.integers(0, 9000, n), unit="D"),
+    })
+
+
+def legacy_popups(df, name):
+    """The original overlay_4.py loop (popup + tooltip strings)"""
+    out = []
+    for idx, row in df.iterrows():
+        bohr_id = row.get('bohr_id', 'N/A')
+        popup_text = f"""
+        <b style="font-size: 14px; color: #0066CC;">{name}</b><br>
+        <hr style="margin: 5px 0;">
+        <table style="border-collapse: collapse; font-size: 12px;">
+        <tr><td><b>Bohr ID:</b></td><td><b style="color: #333;">{bohr_id}</b></td></tr>
+        <tr><td><b>Latitude:</b></td><td>{row['latitude']:.6f}°</td></tr>
+        <tr><td><b>Longitude:</b></td><td>{row['longitude']:.6f}°</td></tr>
+        <tr><td><b>GK X (m):</b></td><td>{row['X']:.0f}</td></tr>
+        <tr><td><b>GK Y (m):</b></td><td>{row['Y']:.0f}</td></tr>
+        """
+        for col in df.columns:
+            if col not in EXCLUDE:
+                try:
+                    val = row[col]
+                    if pd.notna(val):
+                        popup_text += f"<tr><td><b>{col}:</b></td><td>{val}</td></tr>"
+                except Exception:
+                    pass
+        popup_text += "</table>"
+        out.append((popup_text, f"<b>{bohr_id}</b> • {name}"))
+    return out
+
+
+def batched_popups(df, name):
+    popups = build_popups(
+        df,
+        header=f'<b style="font-size: 14px; color: #0066CC;">{name}</b><br><hr style="margin: 5px 0;">',
+        fields=[
+            ('Bohr ID', 'bohr_id', '<b style="color: #333;">{}</b>'),
+            ('Latitude', 'latitude', '{:.6f}°'),
+            ('Longitude', 'longitude', '{:.6f}°'),
+            ('GK X (m)', 'X', '{:.0f}'),
+            ('GK Y (m)', 'Y', '{:.0f}'),
+        ],
+        columns=popup_columns(df, EXCLUDE),
+        skip_na=True,
+    )
+    tooltips = build_tooltips(df, "<b>{bohr_id}</b> • " + name, bohr_id='bohr_id')
+    return list(zip(popups, tooltips))
+
+
+def markup(html):
+    """HTML without the indentation between tags (the loop's f-string layout)"""
+    return re.sub(r">\s+<", "><", html.strip())
+
+
+def test_batched_popups_equal_iterrows_popups():
+    df = boreholes()
+    expected = legacy_popups(df, NAME)
+    actual = batched_popups(df, NAME)
+    assert len(actual) == len(expected)
+    for (popup, tooltip), (old_popup, old_tooltip) in zip(actual, expected):
+        assert markup(popup) == markup(old_popup)
+        assert tooltip == old_tooltip
+
+
+def test_popups_keep_the_frame_index():
+    df = boreholes(20).iloc[5:15]
+    popups = build_popups(df, columns=popup_columns(df, EXCLUDE))
+    assert list(popups.index) == list(df.index)
+
+
+@pytest.mark.parametrize("values", [
+    [1.5, 1.5, -0.0, 0.0, np.nan, 2.25] * 3,
+    np.array([0.1, 0.1, 0.2, 0.3] * 4, dtype=np.float32),
+    [3, 3, 7, 7, 7, 9],
+    ["a", None, "b", "a", np.nan],
+    [1, "x", None, 2.0, True],
+    pd.Categorical(["u", "v", None, "u"]),
+])
+def test_format_column_is_str_per_cell(values):
+    series = pd.Series(values)
+    assert format_column(series).tolist() == [str(v) for v in series.tolist()]
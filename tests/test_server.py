@@ -0,0 +1,146 @@
+"""The map server answers viewport queries with the visible, thinned points and reloads only changed workbooks"""
+import json
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.error import HTTPError
+from urllib.parse import quote
+from urllib.request import urlopen
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("pandas")
+openpyxl = pytest.importorskip("openpyxl")
+pytest.importorskip("pyproj")
+
+from boreholes.config import validate_config  # noqa: E402
+from boreholes.details import DETAIL_CALLBACK  # noqa: E402
+from boreholes.server import MapServer  # noqa: E402
+from boreholes.tiles import THIN_CELLS, tile_pixels  # noqa: E402
+
+# Viewports as (zoom, south, west, north, east); the points lie in a
+# ~20 km square around 50.71 N / 10.72 E, so the low zooms are thinned
+VIEWPORTS = [
+    (7, 50.0, 10.0, 51.5, 11.5),
+    (9, 50.6, 10.55, 50.8, 10.9),
+    (10, 50.65, 10.6, 50.75, 10.75),
+    (12, 50.68, 10.65, 50.74, 10.8),
+    (14, 50.70, 10.7, 50.72, 10.75),
+]
+
+
+def quiet(*args, **kwargs):
+    pass
+
+
+def write_workbook(path, rows, seed):
+    rng = np.random.default_rng(seed)
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Bohrungen"
+    ws.append(["Bohrung", "Rechtswert", "Hochwert", "Ort", "Tiefe"])
+    for i in range(rows):
+        ws.append([f"{path.stem} {i}/19{60 + i % 40}", round(float(rng.uniform(4400000, 4420000)), 1),
+                   round(float(rng.uniform(5610000, 5630000)), 1), f"Gemeinde {i % 7}", int(rng.integers(1, 200))])
+    wb.save(path)
+
+
+def get(base_url, path):
+    with urlopen(base_url + path) as response:
+        return response.read().decode('utf-8')
+
+
+def points_url(name, zoom, south, west, north, east):
+    return f"/points?dataset={quote(name)}&bbox={south},{west},{north},{east}&zoom={zoom}"
+
+
+@pytest.fixture
+def served(tmp_path):
+    datasets = []
+    for i, name in enumerate(("Registry A", "Registry B")):
+        path = tmp_path / f"registry_{i}.xlsx"
+        write_workbook(path, 400, seed=i)
+        datasets.append({"file": str(path), "sheet": "Bohrungen", "bohr_id_col": "Bohrung",
+                         "x_col": "Rechtswert", "y_col": "Hochwert", "name": name})
+    config = validate_config({"cache": False, "datasets": datasets})
+    server = MapServer(config, watch_interval=0, log=quiet)
+    server.load()
+    httpd = server.start("127.0.0.1", 0)
+    yield server, f"http://127.0.0.1:{httpd.server_address[1]}", datasets
+    server.close()
+
+
+def test_concurrent_viewports_return_visible_thinned_points(served):
+    server, base_url, datasets = served
+    queries = [(ds['name'],) + viewport for ds in datasets for viewport in VIEWPORTS]
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        answers = list(pool.map(lambda q: json.loads(get(base_url, points_url(*q))), queries * 2))
+
+    max_zoom = server.config['tile_max_zoom']
+    thinned = 0
+    for (name, zoom, south, west, north, east), answer in zip(queries * 2, answers):
+        ds = server._datasets[name]
+        lat, lon = ds['lat'], ds['lon']
+        visible = np.flatnonzero((lat >= south) & (lat <= north) & (lon >= west) & (lon <= east))
+        rows = np.array(answer['row'], dtype=np.int64)
+        assert answer['total'] == len(visible) > 0
+        assert set(rows.tolist()) <= set(visible.tolist())
+        assert answer['id'] == ds['id'][rows].tolist()
+        assert answer['lat'] == ds['lat'][rows].tolist()
+        if zoom >= max_zoom:
+            assert sorted(rows.tolist()) == visible.tolist()
+            continue
+        # One point per 4 px cell, and every cell with a visible point keeps one
+        cell = 256 / THIN_CELLS
+        px, py = tile_pixels(lat[rows], lon[rows], zoom)
+        kept = list(zip((px // cell).tolist(), (py // cell).tolist()))
+        px, py = tile_pixels(lat[visible], lon[visible], zoom)
+        assert len(set(kept)) == len(kept)
+        assert set(kept) == set(zip((px // cell).tolist(), (py // cell).tolist()))
+        thinned += len(rows) < len(visible)
+    assert thinned
+
+    stats = json.loads(get(base_url, "/stats"))
+    assert stats['points_requests']['count'] == len(answers)
+    assert stats['points_requests']['p50_ms'] > 0
+    assert stats['datasets'] == {"Registry A": 400, "Registry B": 400}
+
+
+def test_popup_shards_hold_the_returned_rows(served):
+    server, base_url, _ = served
+    answer = json.loads(get(base_url, points_url("Registry A", *VIEWPORTS[-1])))
+    row = answer['row'][0]
+    details = answer['details']
+    shard = get(base_url, f"{details['url']}{row // details['shard_rows']}.js")
+    assert shard.startswith(DETAIL_CALLBACK + "(")
+    payload = json.loads(shard.strip()[len(DETAIL_CALLBACK) + 1:-2])
+    values = [column[row - payload['start']] for column in payload['values']]
+    assert answer['columns'] == ["Ort", "Tiefe"]
+    assert values[0] == f"Gemeinde {row % 7}"
+
+
+def test_reload_changed_reloads_only_the_touched_workbook(served):
+    server, base_url, datasets = served
+    before = dict(server._datasets)
+    old_a = json.loads(get(base_url, points_url("Registry A", *VIEWPORTS[0])))
+    old_b = json.loads(get(base_url, points_url("Registry B", *VIEWPORTS[0])))
+    assert server.reload_changed() == []
+
+    write_workbook(Path(datasets[1]['file']), 150, seed=9)
+    assert server.reload_changed() == ["Registry B"]
+    assert server._datasets["Registry A"] is before["Registry A"]
+    assert server._datasets["Registry B"] is not before["Registry B"]
+
+    stats = json.loads(get(base_url, "/stats"))
+    assert stats['datasets'] == {"Registry A": 400, "Registry B": 150}
+    assert stats['reloads'] == 1
+    assert json.loads(get(base_url, points_url("Registry A", *VIEWPORTS[0]))) == old_a
+    new_b = json.loads(get(base_url, points_url("Registry B", *VIEWPORTS[0])))
+    assert new_b['total'] == 150
+    assert new_b['details']['url'] != old_b['details']['url']
+
+    # The replaced dataset's old shards are gone, the unchanged one's stay
+    assert get(base_url, f"{old_a['details']['url']}0.js").startswith(DETAIL_CALLBACK)
+    with pytest.raises(HTTPError) as e:
+        get(base_url, f"{old_b['details']['url']}0.js")
+    assert e.value.code == 404
@@ -0,0 +1,102 @@
+"""Sheets are imported into SQLite once, re-imported only when they change, and queried by bbox"""
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+openpyxl = pytest.importorskip("openpyxl")
+pytest.importorskip("pyproj")
+
+from boreholes.store import BoreholeStore, read_store_sheets  # noqa: E402
+
+SHEETS = {
+    "Wells_Outcrop": {"id": "Hole ID", "x": "E_EPSG31468", "y": "N_EPSG31468", "crs": "gk"},
+    "SVZ": {"id": "Hole ID"},
+}
+
+
+def quiet(*args, **kwargs):
+    pass
+
+
+def write_workbook(path, svz_rows=30):
+    rng = np.random.default_rng(0)
+    wb = openpyxl.Workbook()
+    wells = wb.active
+    wells.title = "Wells_Outcrop"
+    wells.append(["Hole ID", "E_EPSG31468", "N_EPSG31468", "Ort"])
+    for i in range(100):
+        located = i % 10 != 0
+        wells.append([1000 + i if i % 2 else f"W {1000 + i}",
+                      round(float(rng.uniform(4400000, 4440000)), 1) if located else None,
+                      round(float(rng.uniform(5610000, 5650000)), 1) if located else None, f"Ort {i % 5}"])
+    svz = wb.create_sheet("SVZ")
+    svz.append(["Hole ID", "Von", "Bis", "Schicht"])
+    for i in range(svz_rows):
+        svz.append([1001 + 2 * (i % 50), i, i + 1, "Ton" if i % 3 else "Sand"])
+    wb.save(path)
+
+
+@pytest.fixture
+def store(tmp_path):
+    workbook = tmp_path / "Main_DB.xlsx"
+    write_workbook(workbook)
+    db = tmp_path / "boreholes.sqlite"
+    with BoreholeStore(db) as store:
+        assert store.import_workbook(workbook, SHEETS, log=quiet) == {"Wells_Outcrop": 100, "SVZ": 30}
+    return workbook, db
+
+
+def test_unchanged_workbook_is_a_no_op(store):
+    workbook, db = store
+    before = os.stat(db)
+    with BoreholeStore(db) as s:
+        assert s.import_workbook(workbook, SHEETS, log=quiet) == {"Wells_Outcrop": None, "SVZ": None}
+    after = os.stat(db)
+    assert (after.st_mtime_ns, after.st_size) == (before.st_mtime_ns, before.st_size)
+
+
+def test_only_changed_sheets_are_reimported(store):
+    workbook, db = store
+    write_workbook(workbook, svz_rows=40)
+    with BoreholeStore(db) as s:
+        assert s.import_workbook(workbook, SHEETS, log=quiet) == {"Wells_Outcrop": None, "SVZ": 40}
+        assert s.import_workbook(workbook, SHEETS, force=True, log=quiet) == {"Wells_Outcrop": 100, "SVZ": 40}
+        assert s.sheets()["SVZ"]['rows'] == 40
+
+
+def test_well_ids_join_the_sheets(store):
+    _, db = store
+    with BoreholeStore(db, readonly=True) as s:
+        names, rows = s.query("SELECT DISTINCT well_id FROM svz JOIN wells_outcrop USING (well_id) ORDER BY well_id")
+    # SVZ's IDs are the odd wells, stored as numbers in both sheets
+    assert [r[0] for r in rows] == [str(1001 + 2 * i) for i in range(30)]
+
+
+def test_bbox_sql_returns_exactly_the_rows_inside(store):
+    _, db = store
+    with BoreholeStore(db, readonly=True) as s:
+        _, points = s.query("SELECT rowid, latitude, longitude FROM wells_outcrop")
+        located = [p for p in points if p[1] is not None]
+        assert len(located) == 90
+        lats = sorted(p[1] for p in located)
+        lons = sorted(p[2] for p in located)
+        south, north, west, east = lats[20], lats[70], lons[10], lons[60]
+        expected = sorted(p[0] for p in located if south <= p[1] <= north and west <= p[2] <= east)
+        _, rows = s.query(s.bbox_sql("Wells_Outcrop", "t.rowid"),
+                          {'south': south, 'west': west, 'north': north, 'east': east})
+        assert sorted(r[0] for r in rows) == expected and expected
+        assert len(s.bbox("Wells_Outcrop", south, west, north, east)[1]) == len(expected)
+        with pytest.raises(ValueError):
+            s.bbox_sql("SVZ")
+
+
+def test_store_sheets_read_like_workbook_sheets(store):
+    _, db = store
+    frames, _ = read_store_sheets(db, {"Wells_Outcrop": ["A", "B", "C"], "SVZ": None, "Missing": None})
+    df, header = frames["Wells_Outcrop"]
+    assert list(df.columns) == ["Hole ID", "E_EPSG31468", "N_EPSG31468"]
+    assert len(df) == 100
+    assert list(header[:4]) == ["Hole ID", "E_EPSG31468", "N_EPSG31468", "Ort"]
+    assert len(frames["SVZ"][0]) == 30
+    assert isinstance(frames["Missing"], ValueError)
@@ -0,0 +1,101 @@
+"""The tile pyramid holds exactly the combined CSV's points"""
+import json
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+from boreholes.tiles import TILE_CALLBACK, dataset_rows, read_points_csv, read_tile, verify_tiles, write_tile_pyramid  # noqa: E402
+
+MIN_ZOOM, MAX_ZOOM = 5, 9
+
+
+def synthetic_points(n=500, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'bohr_id': [f"B{i}" for i in range(n)],
+        'X': rng.uniform(4350000, 4500000, n).round(1),
+        'Y': rng.uniform(5550000, 5720000, n).round(1),
+        'latitude': rng.uniform(50.2, 51.6, n).round(6),
+        'longitude': rng.uniform(9.9, 12.0, n).round(6),
+        'dataset': rng.choice(["All Points", "SVZ"], n),
+    })
+
+
+def tile_rows(tile_dir, z):
+    """Every point of the zoom z tiles as (dataset, row in dataset, id, lat, lon, x, y)"""
+    rows = []
+    for path in (tile_dir / str(z)).glob("*/*.js"):
+        tile = read_tile(path)
+        rows.extend(zip([tile['datasets'][i] for i in tile['ds']], tile['row'], tile['id'],
+                        tile['lat'], tile['lon'], tile['x'], tile['y']))
+    return rows
+
+
+def csv_rows(points):
+    return list(zip(points['dataset'], dataset_rows(points).tolist(), points['bohr_id'],
+                    points['latitude'], points['longitude'], points['X'], points['Y']))
+
+
+def rewrite_tile(path, change):
+    tile = read_tile(path)
+    change(tile)
+    path.write_text(f"{TILE_CALLBACK}({json.dumps(tile)});\n", encoding='utf-8')
+
+
+@pytest.fixture
+def pyramid(tmp_path):
+    csv = tmp_path / "combined.csv"
+    synthetic_points().to_csv(csv, index=False)
+    tile_dir = tmp_path / "tiles"
+    write_tile_pyramid(read_points_csv(csv), tile_dir, min_zoom=MIN_ZOOM, max_zoom=MAX_ZOOM)
+    return tile_dir, csv
+
+
+def test_full_zoom_tiles_equal_csv_rows(pyramid):
+    tile_dir, csv = pyramid
+    expected = csv_rows(read_points_csv(csv))
+    assert sorted(tile_rows(tile_dir, MAX_ZOOM)) == sorted(expected)
+    assert verify_tiles(tile_dir, csv) == []
+
+
+def test_lower_zooms_hold_a_thinned_subset(pyramid):
+    tile_dir, csv = pyramid
+    expected = set(csv_rows(read_points_csv(csv)))
+    for z in range(MIN_ZOOM, MAX_ZOOM):
+        found = tile_rows(tile_dir, z)
+        assert len(set(found)) == len(found)
+        assert set(found) <= expected
+
+
+def test_rows_index_the_popup_shards(pyramid):
+    tile_dir, csv = pyramid
+    points = read_points_csv(csv)
+    for dataset, row, bohr_id, *_ in tile_rows(tile_dir, MAX_ZOOM):
+        assert points.loc[points['dataset'] == dataset, 'bohr_id'].iloc[row] == bohr_id
+
+
+def test_dropped_point_fails(pyramid):
+    tile_dir, csv = pyramid
+    path = next((tile_dir / str(MAX_ZOOM)).glob("*/*.js"))
+
+    def drop_first(tile):
+        for key in ('ds', 'row', 'id', 'lat', 'lon', 'x', 'y'):
+            del tile[key][0]
+
+    rewrite_tile(path, drop_first)
+    assert sorted(tile_rows(tile_dir, MAX_ZOOM)) != sorted(csv_rows(read_points_csv(csv)))
+    assert verify_tiles(tile_dir, csv)
+
+
+def test_shifted_point_fails(pyramid):
+    tile_dir, csv = pyramid
+    path = next((tile_dir / str(MAX_ZOOM)).glob("*/*.js"))
+
+    def shift_first(tile):
+        tile['lat'][0] = round(tile['lat'][0] + 0.5, 6)
+
+    rewrite_tile(path, shift_first)
+    assert sorted(tile_rows(tile_dir, MAX_ZOOM)) != sorted(csv_rows(read_points_csv(csv)))
+    assert verify_tiles(tile_dir, csv)
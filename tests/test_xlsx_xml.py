@@ -0,0 +1,84 @@
+"""The raw-XML reader returns what pd.read_excel returns, blank rows included"""
+import zipfile
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+openpyxl = pytest.importorskip("openpyxl")
+
+from boreholes import xlsx_xml  # noqa: E402
+from boreholes.xlsx_xml import (SharedStrings, _parse_sheet_rows, column_index, column_letters,  # noqa: E402
+                                read_workbook_columns, sheet_members)
+
+SHEET = "Bohrungen"
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    """A registry sheet with blank rows, sparse cells, formulas and mixed types"""
+    rng = np.random.default_rng(0)
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = SHEET
+    ws.append(["Bohrung", "Rechtswert", "Hochwert", "Ort", None, "Tiefe", "Tiefe", "Geprüft"])
+    for r in range(2, 400):
+        if r % 23 == 0:
+            continue  # blank row between data rows
+        row = [f"B {r}/19{60 + r % 40}", round(float(rng.uniform(4400000, 4420000)), 1),
+               round(float(rng.uniform(5610000, 5630000)), 1), rng.choice(["Erfurt", "Jena", "Gera & Co", "<Weimar>"]),
+               None, int(rng.integers(1, 300)), float(rng.uniform(0, 5)), bool(r % 2)]
+        if r % 17 == 0:
+            row[:3] = [None, None, None]  # values only outside columns A-C
+        if r % 29 == 0:
+            row[5] = "=F2*2"  # formula without a cached value
+        if r % 31 == 0:
+            row[3] = None
+        ws.append(row)
+    ws.cell(405, 4, "Nachtrag")  # blank rows, then one value in another column
+    ws.cell(420, 2).style = "Good"  # styled but empty: no row for pandas
+    path = tmp_path / "registry.xlsx"
+    wb.save(path)
+    return path
+
+
+def cells(column):
+    """A column's values with every kind of missing value as None"""
+    return [None if pd.isna(v) else v for v in column.tolist()]
+
+
+def assert_same_frame(expected, actual):
+    assert list(actual.columns) == list(expected.columns)
+    for col in expected.columns:
+        assert cells(actual[col]) == cells(expected[col]), col
+
+
+@pytest.mark.parametrize("columns", [None, ["A", "B", "C"], ["Ort", "Tiefe.1"], ["H", "F"]])
+def test_read_workbook_columns_equals_read_excel(workbook, columns):
+    df, header = read_workbook_columns(workbook, {SHEET: columns})[0][SHEET]
+    if columns is None:
+        expected = pd.read_excel(workbook, sheet_name=SHEET)
+    else:
+        full = pd.read_excel(workbook, sheet_name=SHEET, nrows=0).columns
+        positions = sorted({full.get_loc(c) if c in full else column_index(c) for c in columns})
+        expected = pd.read_excel(workbook, sheet_name=SHEET, usecols=positions)
+    assert list(header) == list(pd.read_excel(workbook, sheet_name=SHEET, nrows=0).columns)
+    assert len(expected) == 404  # up to the "Nachtrag" row, blank rows kept
+    assert_same_frame(expected, df)
+
+
+@pytest.mark.parametrize("window", [64, 4096])
+def test_scanner_windows_and_expat_agree(workbook, monkeypatch, window):
+    monkeypatch.setattr(xlsx_xml, "SCAN_WINDOW_BYTES", window)
+    with zipfile.ZipFile(workbook) as zf:
+        members, shared = sheet_members(zf)
+        strings = SharedStrings(zf, shared)
+        for columns in (None, [0, 1, 2], [3, 7], []):
+            scanned = xlsx_xml.read_sheet_rows(zf, members[SHEET], strings, columns)
+            assert scanned == _parse_sheet_rows(zf, members[SHEET], strings, columns)
+
+
+def test_column_letters_round_trip():
+    for index in (0, 25, 26, 51, 52, 701, 702, 16383):
+        assert column_index(column_letters(index)) == index
+    assert column_letters(27) == "AB"